@@ -10,19 +10,231 @@ Features:
 - Clean, beginner-friendly codebase
 """
 
-import customtkinter as ctk
+import os
+from startup import startup
+
+# ACROPAD_IMPORT_TIMES=1 adds per-module import times to the startup report.
+if __name__ == "__main__" and os.environ.get("ACROPAD_IMPORT_TIMES"):
+    startup.track_imports()
+
+with startup.phase("import customtkinter"):
+    import customtkinter as ctk
 from tkinter import filedialog, messagebox
 from pathlib import Path
 import json
 import threading
 import time
+import bisect
 from datetime import datetime
-import os
+
+from metrics import metrics, configure_from_env
+from metadata_store import VaultMetadataStore, ScanBatches
+from link_index import LinkIndex
+from quick_switcher import QuickSwitcherIndex
+from storage import Storage
+from journal import EditJournal
+import find_replace
+from large_file import LargeFile, is_large_file
+from watcher import VaultWatcher, ADDED, REMOVED, MOVED
 
 # Set the appearance mode and theme
 ctk.set_appearance_mode("Dark")
 ctk.set_default_color_theme("dark-blue")
 
+# Edits are journaled this long after typing pauses; the file itself is
+# rewritten only every auto_save_interval seconds (and on switching files).
+JOURNAL_DELAY_MS = 300
+
+
+class VirtualFileList(ctk.CTkFrame):
+    """
+    Scrollable list of file names that only creates widgets for visible rows.
+
+    A fixed pool of row buttons is re-labelled as the list scrolls, so the
+    widget count stays constant no matter how many files the vault holds.
+    """
+
+    ROW_HEIGHT = 30
+
+    def __init__(self, master, on_select, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_select = on_select
+        self.items = []
+        self.offset = 0
+        self.rows = []
+
+        self.grid_rowconfigure(1, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.lbl_header = ctk.CTkLabel(self, text="FILES", text_color="#808080")
+        self.lbl_header.grid(row=0, column=0, columnspan=2, sticky="ew")
+
+        self.rows_frame = ctk.CTkFrame(self, fg_color="transparent")
+        self.rows_frame.grid(row=1, column=0, sticky="nsew")
+        self.rows_frame.pack_propagate(False)  # Row pool follows the frame, not vice versa
+        self.rows_frame.bind("<Configure>", self._on_resize)
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns")
+
+        for widget in (self, self.rows_frame):
+            self._bind_wheel(widget)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel)
+        widget.bind("<Button-4>", lambda e: self.scroll_to(self.offset - 3))
+        widget.bind("<Button-5>", lambda e: self.scroll_to(self.offset + 3))
+
+    def _on_resize(self, event):
+        """Grow or shrink the row pool to fill the visible height."""
+        needed = max(1, event.height // self.ROW_HEIGHT)
+        while len(self.rows) < needed:
+            slot = len(self.rows)
+            btn = ctk.CTkButton(
+                self.rows_frame,
+                text="",
+                command=lambda s=slot: self._on_row_click(s),
+                fg_color="transparent",
+                text_color="#CCCCCC",
+                hover_color="#37373D",
+                anchor="w",
+                height=self.ROW_HEIGHT - 2,
+            )
+            btn.pack(fill="x", pady=1)
+            self._bind_wheel(btn)
+            self.rows.append(btn)
+        while len(self.rows) > needed:
+            self.rows.pop().destroy()
+        self.refresh()
+
+    def _on_wheel(self, event):
+        step = -1 if event.delta > 0 else 1
+        if abs(event.delta) >= 120:
+            step *= abs(event.delta) // 120
+        self.scroll_to(self.offset + step * 3)
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(value) * len(self.items)))
+        elif action == "scroll":
+            amount = int(value) * (len(self.rows) if unit == "pages" else 1)
+            self.scroll_to(self.offset + amount)
+
+    def _on_row_click(self, slot):
+        index = self.offset + slot
+        if index < len(self.items):
+            self.on_select(self.items[index])
+
+    def set_items(self, items):
+        """Show ``items`` (a sorted list of names); the list is used as-is, not copied."""
+        self.items = items
+        self.refresh()
+
+    def scroll_to(self, offset):
+        max_offset = max(0, len(self.items) - len(self.rows))
+        self.offset = min(max(0, offset), max_offset)
+        self.refresh()
+
+    def refresh(self):
+        """Re-label the row pool for the current offset."""
+        self.offset = min(self.offset, max(0, len(self.items) - len(self.rows)))
+        for slot, btn in enumerate(self.rows):
+            index = self.offset + slot
+            text = self.items[index] if index < len(self.items) else ""
+            if btn.cget("text") != text:
+                btn.configure(text=text)
+        if self.items:
+            first = self.offset / len(self.items)
+            last = min(1.0, (self.offset + len(self.rows)) / len(self.items))
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
+        self.lbl_header.configure(text=f"FILES ({len(self.items)})")
+
+
+class QuickSwitcherDialog(ctk.CTkToplevel):
+    """
+    Ctrl+P file switcher: type part of a file name, Enter opens the best match.
+
+    Results come from a ``QuickSwitcherIndex`` on every keystroke; a fixed
+    set of row buttons is re-labelled, as in ``VirtualFileList``.
+    """
+
+    ROWS = 12
+
+    def __init__(self, master, index, on_select):
+        """Create the (hidden) dialog."""
+        super().__init__(master)
+        self.index = index
+        self.on_select = on_select
+        self.results = []
+        self.selected = 0
+
+        self.title("Go to file")
+        self.geometry("560x420")
+        self.resizable(False, False)
+        self.transient(master)
+        self.protocol("WM_DELETE_WINDOW", self.withdraw)
+
+        self.query = ctk.StringVar()
+        self.query.trace_add("write", lambda *args: self._update_results())
+        self.entry = ctk.CTkEntry(self, textvariable=self.query, placeholder_text="Go to file...", height=36)
+        self.entry.pack(fill="x", padx=10, pady=(10, 5))
+        self.entry.bind("<Up>", lambda e: self._move(-1))
+        self.entry.bind("<Down>", lambda e: self._move(1))
+        self.entry.bind("<Return>", lambda e: self._choose(self.selected))
+        self.entry.bind("<Escape>", lambda e: self.withdraw())
+
+        self.rows = []
+        for slot in range(self.ROWS):
+            btn = ctk.CTkButton(
+                self,
+                text="",
+                command=lambda s=slot: self._choose(s),
+                fg_color="transparent",
+                text_color="#CCCCCC",
+                hover_color="#37373D",
+                anchor="w",
+                height=26,
+            )
+            btn.pack(fill="x", padx=10, pady=1)
+            self.rows.append(btn)
+        self.withdraw()
+
+    def popup(self):
+        """Show the dialog with an empty query (recent files)."""
+        self.query.set("")
+        self._update_results()
+        self.deiconify()
+        self.lift()
+        self.entry.focus_set()
+
+    def _update_results(self):
+        """Re-run the query and re-label the rows."""
+        self.results = self.index.search(self.query.get(), limit=self.ROWS)
+        self.selected = 0
+        self._paint()
+
+    def _paint(self):
+        """Label each row and highlight the selected one."""
+        for slot, btn in enumerate(self.rows):
+            text = self.results[slot] if slot < len(self.results) else ""
+            btn.configure(text=text, fg_color="#2563EB" if text and slot == self.selected else "transparent")
+
+    def _move(self, step):
+        """Move the selection with the arrow keys."""
+        if self.results:
+            self.selected = (self.selected + step) % len(self.results)
+            self._paint()
+        return "break"
+
+    def _choose(self, slot):
+        """Open the result in ``slot`` and hide the dialog."""
+        if slot < len(self.results):
+            self.withdraw()
+            self.on_select(self.results[slot])
+        return "break"
+
 
 class AcropadApp(ctk.CTk):
     """
@@ -41,11 +253,26 @@ class AcropadApp(ctk.CTk):
 
         # Application state
         self.vault_path = None
-        self.files_list = []
+        self.files_list = []  # Sorted vault-relative paths
+        self.scan_generation = 0
+        self.scan_thread = None
+        self.metadata_store = None
+        self.link_index = None
+        self.switcher_index = QuickSwitcherIndex()
+        self.quick_switcher = None
+        self.watcher = None
         self.current_file_path = None
-        self.auto_save_interval = 2  # Auto-save every 2 seconds
+        self.auto_save_interval = 30  # Full save every 30 seconds; edits in between go to the journal
         self.is_modified = False
         self.auto_save_thread = None
+        self.storage = Storage()
+        self.save_service = self.storage.save_service
+        self.opening_path = None  # Note being read for _open_file, if any
+        self.journal = None
+        self.journal_job = None
+        self.large_file = None
+        self.large_offset = 0
+        self.large_window_lines = 2000  # Lines kept in the textbox in large-file mode
         self.running = True
 
         # Configuration file for storing recent vault
@@ -56,12 +283,15 @@ class AcropadApp(ctk.CTk):
         self._create_sidebar()
         self._create_editor()
 
-        # Load last vault if it exists
-        self._load_last_vault()
+        # Load last vault if it exists, once the window is up
+        self.after_idle(self._load_last_vault)
 
         # Start auto-save thread
         self._start_auto_save()
 
+        # Quick switcher
+        self.bind("<Control-p>", self._show_quick_switcher)
+
         # Handle window close
         self.protocol("WM_DELETE_WINDOW", self._on_close)
 
@@ -116,11 +346,10 @@ class AcropadApp(ctk.CTk):
         self.lbl_vault_name.grid(row=4, column=0, padx=20, pady=(10, 5), sticky="w")
 
         # File List Container
-        self.file_list_frame = ctk.CTkScrollableFrame(
+        self.file_list_frame = VirtualFileList(
             self.sidebar,
+            on_select=lambda rel: self._open_file(self.vault_path / rel),
             fg_color="transparent",
-            label_text="FILES",
-            label_text_color="#808080",
         )
         self.file_list_frame.grid(row=3, column=0, sticky="nsew", padx=10, pady=10)
 
@@ -177,50 +406,167 @@ class AcropadApp(ctk.CTk):
             self.lbl_vault_name.configure(text=f"📂 {self.vault_path.name}")
             self._save_config()
             self._refresh_file_list()
+            self._watch_vault()
+
+    def _open_journal(self):
+        """Switch to the vault's edit journal, first replaying edits a crashed session didn't save."""
+        if self.journal is not None:
+            if self.is_modified:
+                self._save_file()
+            self.journal.close()
+        self.journal = EditJournal(self.vault_path)
+        try:
+            # A find-and-replace interrupted mid-commit is undone before anything reads the notes
+            rolled_back = find_replace.recover(self.vault_path)
+        except Exception as e:
+            print(f"Error undoing interrupted replace: {e}")
+            self.lbl_status.configure(text=f"Could not undo an interrupted replace: {e}", text_color="#F48771")
+            rolled_back = []
+        try:
+            recovered = self.journal.recover()
+        except Exception as e:
+            print(f"Error recovering journal: {e}")
+            return
+        if recovered:
+            self.lbl_status.configure(text=f"Recovered edits in {len(recovered)} file(s)", text_color="#DCDCAA")
+        elif rolled_back:
+            self.lbl_status.configure(text=f"Undid an interrupted replace in {len(rolled_back)} file(s)",
+                                      text_color="#DCDCAA")
 
     def _refresh_file_list(self):
-        """Scan vault for .md and .txt files."""
+        """Show the cached file list for the vault, then reconcile it with the disk in the background."""
         if not self.vault_path:
             return
 
-        # Clear existing buttons
-        for widget in self.file_list_frame.winfo_children():
-            widget.destroy()
+        self.scan_generation += 1
+        generation = self.scan_generation
+        if self.metadata_store is None or self.metadata_store.vault_path != os.path.abspath(self.vault_path):
+            if self.metadata_store is not None:
+                self._close_vault_indexes(self.metadata_store, self.link_index, self.scan_thread)
+            self._open_journal()
+            self.metadata_store = VaultMetadataStore(self.vault_path)
+            self.link_index = LinkIndex(self.vault_path)
+        store = self.metadata_store
+        link_index = self.link_index
+
+        self.files_list = store.load_paths()
+        self.file_list_frame.set_items(self.files_list)
+        switcher_index = self.switcher_index
+        cached_paths = list(self.files_list)
 
-        self.files_list = []
-        extensions = ['*.md', '*.txt']
-        
-        try:
-            for ext in extensions:
-                self.files_list.extend(list(self.vault_path.rglob(ext)))
-            
+        def worker():
+            batches = ScanBatches(lambda added, removed: self.after(0, self._on_scan_batch, generation, added, removed))
+            try:
+                switcher_index.build(cached_paths)
+                changes = store.reconcile(on_batch=batches, should_cancel=lambda: generation != self.scan_generation)
+                batches.flush()
+                if changes and any(changes):
+                    switcher_index.build(store.load_paths())
+                link_index.refresh(should_cancel=lambda: generation != self.scan_generation)
+            except Exception as e:
+                self.after(0, lambda: messagebox.showerror("Error", f"Failed to scan vault: {e}"))
+
+        self.scan_thread = threading.Thread(target=worker, daemon=True)
+        self.scan_thread.start()
+
+    def _close_vault_indexes(self, store, link_index, scan_thread):
+        """
+        Close the previous vault's metadata store and link index once the scan
+        using them has stopped; bumping ``scan_generation`` cancelled it.
+        """
+        def close():
+            if scan_thread is not None:
+                scan_thread.join()
+            store.close()
+            link_index.close()
+
+        threading.Thread(target=close, daemon=True).start()
+
+    def _on_scan_batch(self, generation, added, removed):
+        """Merge one directory's worth of reconcile results into the file list."""
+        if generation != self.scan_generation:
+            return
+        if removed:
+            gone = set(removed)
+            self.files_list[:] = [rel for rel in self.files_list if rel not in gone]
+        if added:
+            self.files_list.extend(sorted(added))
             self.files_list.sort()
+        self.file_list_frame.refresh()
+
+    def _watch_vault(self):
+        """Start watching the current vault, replacing any previous watcher."""
+        if self.watcher:
+            self.watcher.stop()
+        watcher = VaultWatcher(
+            self.vault_path,
+            lambda changes: self.after(0, self._apply_vault_changes, watcher, changes),
+        )
+        self.watcher = watcher
+        watcher.start()
 
-            for file_path in self.files_list:
-                self._add_file_button(file_path)
-                
+    def _apply_vault_changes(self, watcher, changes):
+        """Apply added/removed/moved files reported by the watcher to the file list."""
+        if watcher is not self.watcher:
+            return
+        prefix_len = len(os.path.join(str(self.vault_path), ""))
+        threading.Thread(target=self._index_changes, args=(self.metadata_store, self.link_index, changes, prefix_len),
+                         daemon=True).start()
+        files = self.files_list
+
+        def remove(path):
+            rel = path[prefix_len:]
+            index = bisect.bisect_left(files, rel)
+            if index < len(files) and files[index] == rel:
+                del files[index]
+
+        def add(path):
+            rel = path[prefix_len:]
+            index = bisect.bisect_left(files, rel)
+            if index == len(files) or files[index] != rel:
+                files.insert(index, rel)
+
+        for change in changes:
+            if change.kind in (REMOVED, MOVED):
+                self.switcher_index.remove((change.old_path or change.path)[prefix_len:])
+            if change.kind in (ADDED, MOVED):
+                self.switcher_index.add(change.path[prefix_len:])
+            if change.kind == REMOVED:
+                remove(change.path)
+            elif change.kind == MOVED:
+                remove(change.old_path)
+                add(change.path)
+            elif change.kind == ADDED:
+                add(change.path)
+        self.file_list_frame.refresh()
+
+    def _index_changes(self, store, link_index, changes, prefix_len):
+        """Record changed notes in the metadata store and re-parse their links (runs off the Tk thread)."""
+        updated = [change.path[prefix_len:] for change in changes if change.kind != REMOVED]
+        removed = [(change.old_path or change.path)[prefix_len:] for change in changes
+                   if change.kind in (REMOVED, MOVED)]
+        try:
+            store.apply_changes(updated, removed)
+            for change in changes:
+                if change.kind == REMOVED:
+                    link_index.remove_file(change.path)
+                elif change.kind == MOVED:
+                    link_index.remove_file(change.old_path)
+                    link_index.update_file(change.path)
+                else:
+                    link_index.update_file(change.path)
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to scan vault: {e}")
+            print(f"Error indexing vault changes: {e}")
 
-    def _add_file_button(self, file_path):
-        """Add a button for a file in the sidebar."""
-        try:
-            rel_path = file_path.relative_to(self.vault_path)
-            name = str(rel_path)
-        except ValueError:
-            name = file_path.name
-
-        btn = ctk.CTkButton(
-            self.file_list_frame,
-            text=name,
-            command=lambda p=file_path: self._open_file(p),
-            fg_color="transparent",
-            text_color="#CCCCCC",
-            hover_color="#37373D",
-            anchor="w",
-            height=28,
-        )
-        btn.pack(fill="x", pady=1)
+    def _show_quick_switcher(self, event=None):
+        """Open the Ctrl+P quick switcher."""
+        if not self.vault_path:
+            return "break"
+        if self.quick_switcher is None:
+            self.quick_switcher = QuickSwitcherDialog(
+                self, self.switcher_index, on_select=lambda rel: self._open_file(self.vault_path / rel))
+        self.quick_switcher.popup()
+        return "break"
 
     def _new_file(self):
         """Create a new file."""
@@ -235,61 +581,202 @@ class AcropadApp(ctk.CTk):
             # Sanitize filename
             filename = "".join(c for c in filename if c.isalnum() or c in (' ', '-', '_'))
             new_path = self.vault_path / f"{filename}.md"
-            
-            if new_path.exists():
-                messagebox.showerror("Error", "File already exists!")
-                return
-                
-            try:
-                new_path.touch()
-                self._refresh_file_list()
-                self._open_file(new_path)
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not create file: {e}")
+            future = self.storage.create_async(str(new_path))
+            future.add_done_callback(lambda f: self.after(0, self._on_file_created, new_path, f))
+
+    def _on_file_created(self, new_path, future):
+        """Add a note created by ``_new_file`` to the list and open it."""
+        try:
+            future.result()
+        except FileExistsError:
+            messagebox.showerror("Error", "File already exists!")
+            return
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not create file: {e}")
+            return
+        rel = str(new_path.relative_to(self.vault_path))
+        index = bisect.bisect_left(self.files_list, rel)
+        if index == len(self.files_list) or self.files_list[index] != rel:
+            self.files_list.insert(index, rel)
+            self.file_list_frame.refresh()
+        self.switcher_index.add(rel)
+        self._open_file(new_path)
 
     def _open_file(self, file_path):
-        """Open a specific file."""
+        """Open a specific file; it is read off the Tk thread and shown by ``_on_file_read``."""
         if self.is_modified:
             self._save_file()
+        self._close_large_file()
+        rel = os.path.relpath(file_path, self.vault_path)
+        self.switcher_index.touch(rel)
+        self.opening_path = file_path
 
+        if is_large_file(file_path):
+            self._open_large_file(file_path)
+            return
+
+        started = time.perf_counter()
+        future = self.storage.read_async(str(file_path))
+        future.add_done_callback(lambda f: self.after(0, self._on_file_read, file_path, f, started))
+        # The notes next to it in the list are the likeliest to be opened next.
+        index = bisect.bisect_left(self.files_list, rel)
+        neighbours = self.files_list[max(0, index - 1):index] + self.files_list[index + 1:index + 2]
+        self.storage.prefetch(str(self.vault_path / n) for n in neighbours)
+
+    def _on_file_read(self, file_path, future, started):
+        """Show a note read by ``_open_file``, unless another was opened meanwhile."""
+        if file_path != self.opening_path:
+            return
+        self.opening_path = None
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
-
-            self.current_file_path = file_path
-            self.editor.delete("0.0", "end")
-            self.editor.insert("0.0", content)
-            
-            self.lbl_filename.configure(text=f"📄 {file_path.name}")
-            self.lbl_status.configure(text="Saved", text_color="#6A9955")
-            self.is_modified = False
-            
+            content = future.result().text
         except Exception as e:
             messagebox.showerror("Error", f"Could not open file: {e}")
+            return
+        # Typing while the read was in flight went to the note still shown.
+        if self.is_modified:
+            self._save_file()
+
+        if self.journal is not None:
+            if self.current_file_path:
+                self.journal.closed(str(self.current_file_path))
+            self.journal.opened(str(file_path), content)
+        self.current_file_path = file_path
+        self.editor.delete("0.0", "end")
+        self.editor.insert("0.0", content)
+
+        self.lbl_filename.configure(text=f"📄 {file_path.name}")
+        self.lbl_status.configure(text="Saved", text_color="#6A9955")
+        self.is_modified = False
+        metrics.observe("file.open", time.perf_counter() - started)
+
+    def _open_large_file(self, file_path):
+        """Open a big file read-only, showing a window of lines that follows the scroll position."""
+        try:
+            self.large_file = LargeFile(file_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not open file: {e}")
+            return
+
+        self.current_file_path = file_path
+        self.is_modified = False
+        self.large_offset = 0
+        self.lbl_filename.configure(text=f"📄 {file_path.name}")
+        self.lbl_status.configure(text="Large file · read-only", text_color="#808080")
+        self.editor.delete("0.0", "end")
+        self.editor.configure(state="disabled")
+        threading.Thread(target=self.large_file.build_index, daemon=True).start()
+        self._large_file_tick(self.large_file, shown=0)
+
+    def _large_file_tick(self, large_file, shown):
+        """Poll while a large file is open: fill the first window as it is indexed, then page on scroll."""
+        if large_file is not self.large_file:
+            return
+        if shown < self.large_window_lines and large_file.line_count > shown:
+            self._show_large_window(self.large_offset)
+            shown = large_file.line_count
+        else:
+            self._check_large_window()
+        self.after(150, self._large_file_tick, large_file, shown)
+
+    def _show_large_window(self, offset, top_line=None):
+        """Load the lines starting at ``offset`` into the (read-only) textbox."""
+        lines = self.large_file.lines(offset, self.large_window_lines)
+        self.large_offset = offset
+        self.editor.configure(state="normal")
+        self.editor.delete("0.0", "end")
+        self.editor.insert("0.0", "\n".join(lines))
+        self.editor.configure(state="disabled")
+        if top_line is not None and lines:
+            self.editor.yview_moveto((top_line - offset) / len(lines))
+
+    def _check_large_window(self):
+        """Slide the window by half its size when the view nears either edge."""
+        first, last = self.editor.yview()
+        total = self.large_file.line_count
+        shown = min(self.large_window_lines, total - self.large_offset)
+        if not shown:
+            return
+        top_line = self.large_offset + int(first * shown)
+        step = self.large_window_lines // 2
+        if last > 0.9 and self.large_offset + shown < total:
+            self._show_large_window(min(self.large_offset + step, max(0, total - self.large_window_lines)), top_line)
+        elif first < 0.1 and self.large_offset > 0:
+            self._show_large_window(max(0, self.large_offset - step), top_line)
+
+    def _close_large_file(self):
+        """Leave large-file mode."""
+        if self.large_file is None:
+            return
+        self.large_file.close()
+        self.large_file = None
+        self.editor.configure(state="normal")
 
     def _on_text_change(self, event=None):
         """Mark file as modified."""
+        if self.large_file is not None:
+            return
         if self.current_file_path and not self.is_modified:
             self.is_modified = True
             self.lbl_status.configure(text="● Unsaved", text_color="#DCDCAA")
+        if self.journal_job is not None:
+            self.after_cancel(self.journal_job)
+        self.journal_job = self.after(JOURNAL_DELAY_MS, self._journal_edits)
+
+    def _journal_edits(self):
+        """Append what changed since the last journal entry (a typing pause ago) to the journal."""
+        self.journal_job = None
+        if self.journal is None or self.large_file is not None or not self.is_modified:
+            return
+        self.journal.record(str(self.current_file_path), self._editor_text())
+
+    def _editor_text(self):
+        """Editor content without the trailing newline the Text widget adds."""
+        content = self.editor.get("0.0", "end")
+        if content.endswith("\n"):
+            content = content[:-1]
+        return content
 
     def _save_file(self):
-        """Save the current file."""
+        """Queue the current file for saving; the write happens off the Tk thread."""
         if self.current_file_path and self.is_modified:
+            content = self._editor_text()
+            if self.journal is not None:
+                self.journal.checkpoint(str(self.current_file_path), content)
+
+            self.is_modified = False
+            self.lbl_status.configure(text="Saving...", text_color="#808080")
+            self.storage.write(
+                str(self.current_file_path),
+                content,
+                on_done=self._on_file_written,
+                on_error=lambda path, err: self.after(0, self._on_save_error, path, err),
+            )
+
+    def _on_file_written(self, path, content):
+        """Runs on the save thread once the write is durable."""
+        journal = self.journal
+        if journal is not None:
+            journal.saved(path, content)
+        link_index = self.link_index
+        if link_index is not None and path.startswith(os.path.join(link_index.vault_path, "")):
             try:
-                content = self.editor.get("0.0", "end")
-                # Remove extra newline added by Text widget at end
-                if content.endswith("\n"):
-                    content = content[:-1]
-                    
-                with open(self.current_file_path, "w", encoding="utf-8") as f:
-                    f.write(content)
-                
-                self.is_modified = False
-                self.lbl_status.configure(text="Saved", text_color="#6A9955")
-                
+                link_index.update_file(path, content)
             except Exception as e:
-                print(f"Error saving: {e}")
+                print(f"Error indexing links: {e}")
+        self.after(0, self._on_save_done, path)
+
+    def _on_save_done(self, path):
+        """Update the status label once a save is on disk."""
+        if path == str(self.current_file_path) and not self.is_modified:
+            self.lbl_status.configure(text="Saved", text_color="#6A9955")
+
+    def _on_save_error(self, path, err):
+        """Mark the file dirty again so the next auto-save retries."""
+        print(f"Error saving: {err[1]}")
+        if path == str(self.current_file_path):
+            self.is_modified = True
+            self.lbl_status.configure(text="● Save failed", text_color="#F48771")
 
     def _start_auto_save(self):
         """Run auto-save in background."""
@@ -313,6 +800,7 @@ class AcropadApp(ctk.CTk):
                         self.vault_path = Path(path)
                         self.lbl_vault_name.configure(text=f"📂 {self.vault_path.name}")
                         self._refresh_file_list()
+                        self._watch_vault()
             except:
                 pass
 
@@ -327,10 +815,28 @@ class AcropadApp(ctk.CTk):
     def _on_close(self):
         """Clean up before closing."""
         self.running = False
+        self.scan_generation += 1
+        if self.watcher:
+            self.watcher.stop()
         if self.is_modified:
             self._save_file()
+        self._close_large_file()
+        if not self.storage.shutdown(timeout=10):
+            print("Timed out waiting for pending saves")
+        if self.journal is not None:
+            self.journal.close()
+        metrics.stop_dumper(final_dump=True)
         self.destroy()
 
+def _report_startup():
+    """Log the startup timing once the first window has been drawn."""
+    startup.mark("first_window")
+    print(startup.report())
+
+
 if __name__ == "__main__":
-    app = AcropadApp()
+    configure_from_env()
+    with startup.phase("main window"):
+        app = AcropadApp()
+    app.after_idle(_report_startup)
     app.mainloop()
@@ -0,0 +1,98 @@
+// Live preview page script. The page is loaded once; after that Acropad only
+// sends rendered blocks. Blocks are the direct children of #content, so a
+// patch is a plain splice over the child list.
+window.acropad = {
+  // [key, html] of formulas typeset since Acropad last collected them (takeTypeset).
+  typesetDone: [],
+
+  // Formulas arrive typeset from Acropad's cache; the rest come as
+  // span.acropad-math and are typeset here one by one. Until MathJax has
+  // loaded they wait; its pageReady hook calls this for the whole page.
+  typeset: function (nodes) {
+    if (!window.MathJax || !MathJax.tex2svgPromise) {
+      return;
+    }
+    for (var i = 0; i < nodes.length; i++) {
+      var spans = nodes[i].querySelectorAll('span.acropad-math:not([data-busy])');
+      for (var j = 0; j < spans.length; j++) {
+        acropad.typesetFormula(spans[j]);
+      }
+    }
+  },
+
+  typesetFormula: function (span) {
+    span.setAttribute('data-busy', '');
+    // MathJax wants its conversions run one after another.
+    MathJax.startup.promise = MathJax.startup.promise.then(function () {
+      return MathJax.tex2svgPromise(span.getAttribute('data-tex'),
+                                    {display: span.getAttribute('data-display') === '1'});
+    }).then(function (node) {
+      acropad.typesetDone.push([span.getAttribute('data-key'), node.outerHTML]);
+      if (span.parentNode) {
+        span.parentNode.replaceChild(node, span);
+      }
+    }).catch(function (err) {
+      console.error('Typesetting failed: ' + err);
+    });
+  },
+
+  takeTypeset: function () {
+    var done = acropad.typesetDone;
+    acropad.typesetDone = [];
+    return done;
+  },
+
+  insert: function (root, anchor, blocks) {
+    var added = [];
+    for (var j = 0; j < blocks.length; j++) {
+      var tpl = document.createElement('template');
+      tpl.innerHTML = '<div class="acropad-block">' + blocks[j] + '</div>';
+      var node = tpl.content.firstChild;
+      root.insertBefore(node, anchor);
+      added.push(node);
+    }
+    return added;
+  },
+
+  patch: function (start, removeCount, blocks) {
+    var root = document.getElementById('content');
+    var anchor = root.children[start + removeCount] || null;
+    for (var i = 0; i < removeCount; i++) {
+      root.removeChild(root.children[start]);
+    }
+    var added = acropad.insert(root, anchor, blocks);
+    acropad.typeset(added);
+    return added.length;
+  },
+
+  // Replace the whole document (file switch) without reloading the page.
+  reset: function (blocks) {
+    var root = document.getElementById('content');
+    root.textContent = '';
+    var added = acropad.insert(root, null, blocks);
+    window.scrollTo(0, 0);
+    acropad.typeset(added);
+    return added.length;
+  },
+
+  // An image's thumbnail is ready: show it in place of the placeholder.
+  thumbnail: function (full, src) {
+    var images = document.querySelectorAll('img[data-full]');
+    for (var i = 0; i < images.length; i++) {
+      if (images[i].getAttribute('data-full') === full) {
+        images[i].src = src;
+        images[i].classList.remove('acropad-pending');
+      }
+    }
+  }
+};
+
+// Images show thumbnails; clicking one loads the full-resolution original.
+document.addEventListener('click', function (event) {
+  var img = event.target;
+  if (img.tagName === 'IMG' && img.hasAttribute('data-full')) {
+    img.src = img.getAttribute('data-full');
+    img.removeAttribute('data-full');
+    img.classList.remove('acropad-pending');
+  }
+});
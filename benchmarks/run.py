@@ -0,0 +1,311 @@
+"""
+Acropad microbenchmarks.
+
+Runs the hot paths of both frontends against a synthetic vault and writes the
+timings as JSON. With ``--baseline`` the run fails (exit status 1) when any
+benchmark is slower than the baseline by more than ``--threshold``.
+
+    python benchmarks/run.py --notes 10000 --output bench.json
+    python benchmarks/run.py --notes 10000 --baseline bench.json --threshold 0.15
+
+Regressions are judged on each benchmark's fastest run, which is far less
+noisy than the median, and differences under ``--min-delta`` milliseconds
+are ignored.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from vault_gen import generate_vault
+from renderer import render_markdown, render_blocks, render_cache
+from vault_scan import iter_vault_files
+from metadata_store import VaultMetadataStore
+from search_index import SearchIndex
+from link_index import LinkIndex
+from quick_switcher import QuickSwitcherIndex
+from file_table import FileTable
+from highlighter import highlight_line, NORMAL
+from save_service import SaveService, atomic_write, encode_text
+from storage import Storage, read_text
+
+QUERIES = ["render", "cache latency", "\"block index\"", "wor", "markdown preview thread"]
+SWITCHER_QUERIES = ["n", "no", "note", "render cache", "idx", "rendr"]
+
+
+def measure(fn, repeat, setup=None, warmup=1):
+    """
+    Run ``fn`` ``repeat`` times (``setup`` untimed before each) and summarize in
+    seconds, after ``warmup`` untimed runs to fill caches and settle the allocator.
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        fn()
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {
+        "runs": len(times),
+        "min": times[0],
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "p95": times[min(len(times) - 1, int(len(times) * 0.95))],
+        "max": times[-1],
+    }
+
+
+def _read(path):
+    # Decoded the way Storage.read, which both frontends open notes through, does.
+    return read_text(path).text
+
+
+def bench_render(vault, paths, repeat):
+    sizes = sorted(paths, key=lambda rel: os.path.getsize(os.path.join(vault, rel)))
+    typical = _read(os.path.join(vault, sizes[len(sizes) // 2]))
+    largest = _read(os.path.join(vault, sizes[-1]))
+    edited = largest.replace("\n\n", "\n\nEdited paragraph.\n\n", 1)
+    _, known = render_blocks(largest)
+
+    results = {}
+    results["render_markdown.typical"] = measure(lambda: render_markdown(typical), repeat, render_cache.clear)
+    results["render_markdown.largest"] = measure(lambda: render_markdown(largest), repeat, render_cache.clear)
+    results["render_markdown.cached"] = measure(lambda: render_markdown(largest), repeat)
+    results["render_blocks.one_edit"] = measure(lambda: render_blocks(edited, known), repeat, render_cache.clear)
+    return results
+
+
+def bench_scan(vault, workdir, repeat):
+    db_path = os.path.join(workdir, "metadata.db")
+
+    def fresh_db():
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.unlink(db_path + suffix)
+            except FileNotFoundError:
+                pass
+
+    def reconcile():
+        store = VaultMetadataStore(vault, db_path)
+        try:
+            store.reconcile()
+            store.load_paths()
+        finally:
+            store.close()
+
+    results = {}
+    results["scan.walk"] = measure(lambda: sum(1 for _ in iter_vault_files(vault)), repeat)
+    results["scan.cold"] = measure(reconcile, max(1, repeat // 5), fresh_db)
+    reconcile()
+    results["scan.warm"] = measure(reconcile, repeat)
+    return results
+
+
+def bench_files(vault, paths, workdir, repeat):
+    sample = [os.path.join(vault, rel) for rel in paths[:200]]
+    target = os.path.join(workdir, "save-target.md")
+    content = _read(sample[0])
+    atomic_write(target, encode_text(content))
+    counter = [0]
+
+    def save():
+        counter[0] += 1
+        service = SaveService()
+        service.submit(target, f"{content}\n{counter[0]}")
+        service.shutdown()
+
+    results = {}
+    storage = Storage(max_workers=1)
+    try:
+        results["files.read_200"] = measure(lambda: [storage.read(path) for path in sample], repeat)
+    finally:
+        storage.shutdown()
+    results["files.atomic_write"] = measure(lambda: atomic_write(target, encode_text(content)), repeat)
+    results["files.save_service"] = measure(save, repeat)
+    return results
+
+
+def bench_search(vault, workdir, repeat):
+    db_path = os.path.join(workdir, "search.db")
+    results = {}
+    index = SearchIndex(vault, db_path)
+    try:
+        # A warm-up would do the build; what's left is refresh_noop
+        results["search.build"] = measure(index.refresh, 1, warmup=0)
+        results["search.refresh_noop"] = measure(index.refresh, repeat)
+        for query in QUERIES:
+            results[f"search.query[{query}]"] = measure(lambda: index.search(query), repeat)
+    finally:
+        index.close()
+    return results
+
+
+def bench_links(vault, paths, workdir, repeat):
+    index = LinkIndex(vault, os.path.join(workdir, "links.db"))
+    target = os.path.join(vault, paths[len(paths) // 2])
+    results = {}
+    try:
+        results["links.build"] = measure(index.refresh, 1, warmup=0)
+        results["links.refresh_noop"] = measure(index.refresh, repeat)
+        results["links.backlinks"] = measure(lambda: index.backlinks(target), repeat)
+        results["links.unresolved"] = measure(index.unresolved, repeat)
+    finally:
+        index.close()
+    return results
+
+
+def bench_switcher(paths, repeat):
+    index = QuickSwitcherIndex()
+    results = {}
+    results["switcher.build"] = measure(lambda: index.build(paths), 1)
+    for rel in paths[:20]:
+        index.touch(rel)
+    for query in SWITCHER_QUERIES:
+        results[f"switcher.query[{query}]"] = measure(lambda: index.search(query), repeat)
+    results["switcher.add_remove"] = measure(
+        lambda: (index.add("new/untitled note.md"), index.remove("new/untitled note.md")), repeat)
+    return results
+
+
+def bench_tree(vault, paths, repeat, memory):
+    rows = [(rel, 0, 0) for rel in paths]
+    table = FileTable()
+    table.extend(rows)
+    memory["file_table.bytes_per_file"] = table.memory_usage() / len(table)
+    memory["path_strings.bytes_per_file"] = (sys.getsizeof(paths) + sum(map(sys.getsizeof, paths))) / len(paths)
+
+    def build():
+        FileTable().extend(rows)
+
+    middle = paths[len(paths) // 2]
+    results = {}
+    results["tree.build"] = measure(build, max(1, repeat // 5))
+    results["tree.scan"] = measure(lambda: FileTable.scan(vault), max(1, repeat // 5))
+    results["tree.find"] = measure(lambda: table.find(middle), repeat)
+    results["tree.add_remove"] = measure(lambda: (table.add("new/untitled note.md"), table.remove("new/untitled note.md")), repeat)
+    return results
+
+
+def bench_highlight(vault, paths, repeat):
+    text = "\n".join(_read(os.path.join(vault, rel)) for rel in paths[:200])
+    lines = text.split("\n")
+
+    def highlight():
+        state = NORMAL
+        for number, line in enumerate(lines):
+            state, _ = highlight_line(line, state, first=number == 0)
+
+    results = {}
+    results["highlight.document"] = measure(highlight, repeat)
+    results["highlight.line"] = measure(lambda: highlight_line(lines[len(lines) // 2], NORMAL), repeat)
+    return results
+
+
+def compare(results, baseline, threshold, min_delta=0.001):
+    """
+    Benchmarks whose fastest run regressed by more than ``threshold`` (a
+    fraction) and by at least ``min_delta`` seconds against ``baseline``.
+    """
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None or base["min"] <= 0:
+            continue
+        ratio = stats["min"] / base["min"]
+        if ratio > 1 + threshold and stats["min"] - base["min"] >= min_delta:
+            regressions.append((name, base["min"], stats["min"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Acropad benchmarks.")
+    parser.add_argument("--notes", type=int, default=1000, help="synthetic vault size (e.g. 1000, 10000, 100000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--vault", help="where to generate (or reuse) the vault; defaults to a temp dir")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--only", action="append", choices=["render", "scan", "files", "search", "links", "switcher", "tree", "highlight"],
+                        help="run only these groups (repeatable)")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown of the fastest run before failing (0.2 = 20%%)")
+    parser.add_argument("--min-delta", type=float, default=1.0,
+                        help="ignore slowdowns smaller than this many milliseconds")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="acropad-bench-")
+    vault = args.vault or os.path.join(workdir, "vault")
+    groups = args.only or ["render", "scan", "files", "search", "links", "switcher", "tree", "highlight"]
+    try:
+        start = time.perf_counter()
+        paths = generate_vault(vault, args.notes, args.seed)
+        print(f"Vault: {len(paths)} notes in {vault} ({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+
+        results = {}
+        memory = {}
+        if "render" in groups:
+            results.update(bench_render(vault, paths, args.repeat))
+        if "scan" in groups:
+            results.update(bench_scan(vault, workdir, args.repeat))
+        if "files" in groups:
+            results.update(bench_files(vault, paths, workdir, args.repeat))
+        if "search" in groups:
+            results.update(bench_search(vault, workdir, args.repeat))
+        if "links" in groups:
+            results.update(bench_links(vault, paths, workdir, args.repeat))
+        if "switcher" in groups:
+            results.update(bench_switcher(paths, args.repeat))
+        if "tree" in groups:
+            results.update(bench_tree(vault, paths, args.repeat, memory))
+        if "highlight" in groups:
+            results.update(bench_highlight(vault, paths, args.repeat))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "notes": args.notes, "seed": args.seed, "repeat": args.repeat,
+            "python": platform.python_version(), "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+        "memory": memory,
+    }
+    for name, stats in results.items():
+        print(f"{name:40s} min {stats['min'] * 1000:10.3f} ms   median {stats['median'] * 1000:10.3f} ms   "
+              f"p95 {stats['p95'] * 1000:10.3f} ms")
+    for name, value in memory.items():
+        print(f"{name:40s} {value:10.1f}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("notes") != args.notes:
+            print(f"Warning: baseline was run with {baseline['meta'].get('notes')} notes", file=sys.stderr)
+        regressions = compare(results, baseline["results"], args.threshold, args.min_delta / 1000)
+        for name, before, after, ratio in regressions:
+            print(f"REGRESSION {name}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
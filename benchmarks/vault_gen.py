@@ -0,0 +1,170 @@
+"""
+Deterministic synthetic vaults for benchmarking.
+
+The same ``(notes, seed)`` always produces the same files with the same
+content: nested folders, a long-tailed size distribution, wiki and Markdown
+links between notes, fenced code, tables and TeX math.
+
+    python benchmarks/vault_gen.py /tmp/vault-10k --notes 10000
+"""
+
+import os
+import sys
+import json
+import random
+import posixpath
+import argparse
+from bisect import bisect
+from itertools import accumulate
+
+MANIFEST = ".acropad-bench.json"
+
+_COMMON = (
+    "vault note editor preview render index search latency cache thread block "
+    "markdown link graph heading table query token buffer stream window frame "
+    "layout scroll cursor commit journal backup sync folder file path title "
+    "value signal worker queue batch parse split merge patch delta budget "
+    "memory disk page offset chunk schema column record event timer metric "
+    "alpha beta gamma delta epsilon lambda sigma omega theta kappa"
+).split()
+
+
+def _vocabulary(size=20000, seed=1234):
+    # Real notes have a long-tailed vocabulary; a handful of words repeated
+    # everywhere would make every search term match every note.
+    rng = random.Random(seed)
+    syllables = ["ka", "ro", "mi", "te", "lu", "sa", "ven", "dor", "pi", "qua", "zen", "bel", "tor", "ish", "ul"]
+    words = list(_COMMON)
+    seen = set(words)
+    while len(words) < size:
+        word = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+_WORDS = _vocabulary()
+# Zipf-like frequencies: the n-th word is about 1/n as common as the first.
+_CUM_WEIGHTS = list(accumulate(1.0 / (rank + 1) for rank in range(len(_WORDS))))
+_TOTAL_WEIGHT = _CUM_WEIGHTS[-1]
+
+
+def _word(rng):
+    return _WORDS[bisect(_CUM_WEIGHTS, rng.random() * _TOTAL_WEIGHT)]
+
+
+_CODE = [
+    ("python", "def {name}(items):\n    total = 0\n    for item in items:\n        total += item\n    return total\n"),
+    ("rust", "fn {name}(v: &[u64]) -> u64 {{\n    v.iter().sum()\n}}\n"),
+    ("js", "function {name}(xs) {{\n  return xs.reduce((a, b) => a + b, 0);\n}}\n"),
+]
+
+_MATH = [
+    "$$\n\\int_0^1 x^{n} \\, dx = \\frac{{1}}{{n+1}}\n$$",
+    "$$\n\\sum_{{k=1}}^{{{n}}} k = \\frac{{{n}({n}+1)}}{{2}}\n$$",
+    "$$\nE = mc^2 + \\alpha_{n}\n$$",
+]
+
+
+def _sentence(rng, lo=6, hi=18):
+    words = [_word(rng) for _ in range(rng.randint(lo, hi))]
+    words[0] = words[0].capitalize()
+    return " ".join(words) + "."
+
+
+def note_paths(notes, seed=0):
+    """Vault-relative paths for ``notes`` notes spread over nested folders."""
+    rng = random.Random(seed)
+    folders = [""]
+    for i in range(max(1, notes // 40)):
+        parent = rng.choice(folders) if rng.random() < 0.6 else ""
+        if parent.count(os.sep) >= 3:
+            parent = ""
+        folders.append(os.path.join(parent, f"{_word(rng)}-{i}"))
+    return [os.path.join(rng.choice(folders), f"{_word(rng)}-{i}.md") for i in range(notes)]
+
+
+def note_content(rng, index, paths):
+    """One note. Most are a few KB; about 1 in 50 is 20-40x longer."""
+    sections = rng.randint(2, 6)
+    if rng.random() < 0.02:
+        sections *= rng.randint(20, 40)
+    here = posixpath.dirname(paths[index].replace(os.sep, "/")) or "."
+    out = [f"# {_word(rng).capitalize()} {index}", ""]
+    for s in range(sections):
+        out.append(f"## {_sentence(rng, 2, 5)[:-1]}")
+        out.append("")
+        for _ in range(rng.randint(1, 4)):
+            para = [_sentence(rng) for _ in range(rng.randint(2, 6))]
+            if rng.random() < 0.5:
+                target = os.path.splitext(os.path.basename(rng.choice(paths)))[0]
+                if rng.random() < 0.05:
+                    target = f"draft-{rng.randrange(len(paths))}"  # A note nobody wrote yet
+                para.insert(rng.randrange(len(para) + 1), f"See [[{target}]].")
+            if rng.random() < 0.3:
+                target = posixpath.relpath(rng.choice(paths).replace(os.sep, "/"), here)
+                para.append(f"[{_word(rng)}]({target})")
+            if rng.random() < 0.2:
+                para.append(f"Inline math $x_{s} = {rng.randint(1, 99)}$.")
+            out.append(" ".join(para))
+            out.append("")
+        roll = rng.random()
+        if roll < 0.25:
+            lang, body = rng.choice(_CODE)
+            out.append(f"```{lang}\n{body.format(name=_word(rng))}```")
+            out.append("")
+        elif roll < 0.4:
+            out.append(rng.choice(_MATH).format(n=rng.randint(2, 9)))
+            out.append("")
+        elif roll < 0.5:
+            out.append("| key | value |\n|-----|-------|")
+            out.extend(f"| {_word(rng)} | {rng.randint(0, 999)} |" for _ in range(rng.randint(2, 8)))
+            out.append("")
+        elif roll < 0.7:
+            out.extend(f"- {_sentence(rng, 3, 8)}" for _ in range(rng.randint(2, 6)))
+            out.append("")
+    return "\n".join(out)
+
+
+def generate_vault(root, notes=1000, seed=0):
+    """
+    Write a synthetic vault under ``root`` and return its note paths (relative).
+
+    A manifest records the parameters; calling this again on a complete vault
+    with the same parameters reuses it instead of rewriting every file.
+    """
+    params = {"notes": notes, "seed": seed}
+    manifest = os.path.join(root, MANIFEST)
+    paths = note_paths(notes, seed)
+    try:
+        with open(manifest, 'r', encoding='utf-8') as f:
+            if json.load(f) == params:
+                return paths
+    except (OSError, ValueError):
+        pass
+
+    os.makedirs(root, exist_ok=True)
+    rng = random.Random(seed + 1)
+    for index, rel in enumerate(paths):
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(note_content(rng, index, paths))
+    with open(manifest, 'w', encoding='utf-8') as f:
+        json.dump(params, f)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic Acropad vault.")
+    parser.add_argument("root")
+    parser.add_argument("--notes", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    paths = generate_vault(args.root, args.notes, args.seed)
+    print(f"{len(paths)} notes in {args.root}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import os
+
+from cache import LRUCache
+
+# Rough resident cost of a QTextDocument: its UTF-16 text plus piece-table
+# overhead per character, and a layout with highlighting formats per block.
+_BYTES_PER_CHAR = 6
+_BYTES_PER_BLOCK = 512
+_BYTES_PER_UNDO_STEP = 256
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class OpenDocument:
+    """
+    A note as it was last shown in the editor: its ``QTextDocument`` (with
+    undo history and highlighting), the cursor and scroll position, and the
+    preview blocks rendered for it.
+
+    ``stat`` is the file's ``(size, mtime_ns)`` when the document was known to
+    match it; a different stat means the file changed behind our back. Pass
+    the one the text was read with, or the file is stat'ed now.
+    """
+
+    def __init__(self, path, document, highlighter=None, stat=None):
+        self.path = path
+        self.document = document
+        self.highlighter = highlighter
+        self.cursor = (0, 0)    # (anchor, position)
+        self.scroll = 0
+        self.preview = None     # PreviewDocument.snapshot()
+        self.stat = stat if stat is not None else _stat(path)
+
+    def memory_estimate(self):
+        size = (self.document.characterCount() * _BYTES_PER_CHAR
+                + self.document.blockCount() * _BYTES_PER_BLOCK
+                + self.document.availableUndoSteps() * _BYTES_PER_UNDO_STEP)
+        if self.preview is not None:
+            size += sum(len(html) for html in self.preview[1].values())
+        return size
+
+    def saved(self):
+        """A save of the note finished: unless edited since, the document matches the file again."""
+        if not self.document.isModified():
+            self.stat = _stat(self.path)
+
+    def is_current(self):
+        """Whether the file on disk is still the one this document was loaded from (or saved to)."""
+        return self.stat is not None and _stat(self.path) == self.stat
+
+
+class DocumentCache:
+    """
+    Recently shown documents, so switching back to a note skips the read,
+    the ``setPlainText`` and the preview render, and keeps its undo history.
+
+    The document being edited is not in the cache: it is ``put`` when the
+    editor switches away and ``take``n back when the note is reopened, so
+    eviction never pulls a document out from under the editor. Bounded by an
+    estimate of the documents' memory, least recently used first.
+    """
+
+    def __init__(self, max_bytes):
+        self._cache = LRUCache(max_bytes, sizeof=OpenDocument.memory_estimate)
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def put(self, entry):
+        self._cache.put(entry.path, entry)
+
+    def take(self, path):
+        """Remove and return the cached document for ``path`` if the file hasn't changed since."""
+        entry = self._cache.pop(path)
+        if entry is None:
+            self.misses += 1
+            return None
+        if not entry.is_current():
+            self.stale += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def discard(self, path):
+        self._cache.pop(path)
+
+    def saved(self, path):
+        """A save of ``path`` finished: the cached document matches the file again."""
+        entry = self._cache.peek(path)
+        if entry is not None:
+            entry.saved()
+
+    def save_failed(self, path):
+        """A save of ``path`` failed after it was cached: keep it dirty so it is saved again once shown."""
+        entry = self._cache.peek(path)
+        if entry is not None:
+            entry.document.setModified(True)
+
+    def resize(self, max_bytes):
+        self._cache.resize(max_bytes)
+
+    def clear(self):
+        self._cache.clear()
+
+    def __contains__(self, path):
+        return path in self._cache
+
+    def __len__(self):
+        return len(self._cache)
+
+    def stats(self):
+        stats = self._cache.stats()
+        lookups = self.hits + self.misses + self.stale
+        stats.update(hits=self.hits, misses=self.misses, stale=self.stale,
+                     hit_rate=self.hits / lookups if lookups else 0.0)
+        return stats
+
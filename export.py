@@ -0,0 +1,257 @@
+"""
+Export a vault to a static HTML site.
+
+Each note becomes ``<name>.html`` at the same relative path, rendered with
+``render_markdown`` into ``HTML_TEMPLATE``; the preview stylesheet and any
+fetched vendor assets are copied to ``_assets/``. Exports are incremental: a
+manifest in the output directory records each note's size, mtime and content
+hash, so a re-export only renders notes whose content changed (and removes
+pages of deleted notes). Rendering is spread over a process pool.
+
+    python export.py ~/notes ~/site
+    python export.py ~/notes ~/site --jobs 4 --full
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import hashlib
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from renderer import ASSETS_DIR, HTML_TEMPLATE, MARKDOWN_EXTENSIONS, render_markdown
+from vault_scan import iter_vault_files, NOTE_EXTENSIONS
+
+MANIFEST_NAME = ".acropad-export.json"
+ASSETS_NAME = "_assets"
+MANIFEST_VERSION = 1
+
+# Notes per task sent to a worker process; large enough to amortize the
+# round trip, small enough to keep every worker busy until the end.
+_CHUNK = 64
+# Below this many notes to render, the pool costs more to start than it saves.
+_POOL_MIN = 200
+_MANIFEST_SAVE_INTERVAL = 5.0
+
+# href="other.md" / href="sub/other.md#heading" -> .html, leaving absolute URLs alone.
+_NOTE_HREF_RE = re.compile(r'href="(?![a-zA-Z][a-zA-Z0-9+.-]*:|/|#)([^"#]*?)\.(?:md|txt)(#[^"]*)?"', re.IGNORECASE)
+_TITLE_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+
+def output_path(rel):
+    """Page path (relative to the output directory) for a vault-relative note path."""
+    root, ext = os.path.splitext(rel)
+    return root + ".html" if ext.lower() in NOTE_EXTENSIONS else rel + ".html"
+
+
+def render_settings_hash():
+    """Changes whenever pages rendered earlier would come out differently."""
+    settings = json.dumps([MANIFEST_VERSION, HTML_TEMPLATE, MARKDOWN_EXTENSIONS])
+    return hashlib.sha1(settings.encode("utf-8")).hexdigest()
+
+
+def export_page(text, rel):
+    """Render one note as a standalone page of the exported site."""
+    depth = rel.count(os.sep)
+    assets = "/".join([".."] * depth + [ASSETS_NAME])
+    title = os.path.splitext(os.path.basename(rel))[0].translate(_TITLE_ESCAPES)
+    html = render_markdown(text, assets, head=f"<title>{title}</title>")
+    return _NOTE_HREF_RE.sub(lambda m: f'href="{m.group(1)}.html{m.group(2) or ""}"', html)
+
+
+def _write(path, data):
+    # Temp file + rename so an interrupted export never leaves a truncated
+    # page behind; no fsync, as a lost page is simply rendered again.
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _export_notes(vault, out_dir, jobs):
+    """
+    Worker task: ``jobs`` is a list of ``(rel, previous_hash)``. Each note is
+    read and hashed; it is rendered only if the hash differs. Returns
+    ``(rel, hash, mtime_ns, size, rendered)`` for every note still present.
+    """
+    results = []
+    for rel, previous_hash in jobs:
+        path = os.path.join(vault, rel)
+        try:
+            st = os.stat(path)
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            continue
+        digest = hashlib.sha1(data).hexdigest()
+        rendered = digest != previous_hash
+        if rendered:
+            target = os.path.join(out_dir, output_path(rel))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            page = export_page(data.decode("utf-8", errors="replace"), rel)
+            _write(target, page.encode("utf-8"))
+        results.append((rel, digest, st.st_mtime_ns, st.st_size, rendered))
+    return results
+
+
+class Exporter:
+    """
+    Incremental vault-to-HTML export.
+
+    ``run()`` stats every note and hands the ones whose size or mtime changed
+    to workers, which re-render only when the content hash differs too. The
+    manifest is saved every few seconds while rendering, so an interrupted
+    export resumes where it stopped.
+    """
+
+    def __init__(self, vault_path, out_dir, jobs=None, full=False, progress=None):
+        self.vault_path = os.path.abspath(vault_path)
+        self.out_dir = os.path.abspath(out_dir)
+        self.jobs = jobs or os.cpu_count() or 1
+        self.full = full
+        self.progress = progress
+        self.manifest_path = os.path.join(self.out_dir, MANIFEST_NAME)
+        self.files = {}
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if self.full or manifest.get("settings") != render_settings_hash():
+            return {}
+        return manifest.get("files", {})
+
+    def _save_manifest(self):
+        manifest = {"settings": render_settings_hash(), "files": self.files}
+        _write(self.manifest_path, json.dumps(manifest, separators=(",", ":")).encode("utf-8"))
+
+    def _copy_assets(self):
+        target_root = os.path.join(self.out_dir, ASSETS_NAME)
+        for directory, dirs, names in os.walk(ASSETS_DIR):
+            target_dir = os.path.join(target_root, os.path.relpath(directory, ASSETS_DIR))
+            os.makedirs(target_dir, exist_ok=True)
+            for name in names:
+                if name == "preview.js":
+                    continue  # Drives the live preview only
+                source = os.path.join(directory, name)
+                target = os.path.join(target_dir, name)
+                try:
+                    st = os.stat(source)
+                    tt = os.stat(target)
+                    if st.st_size == tt.st_size and st.st_mtime_ns <= tt.st_mtime_ns:
+                        continue
+                except OSError:
+                    pass
+                shutil.copy2(source, target)
+
+    def run(self):
+        """Export the vault. Returns counts: ``rendered``, ``unchanged``, ``removed``, ``seconds``."""
+        start = time.perf_counter()
+        os.makedirs(self.out_dir, exist_ok=True)
+        previous = self._load_manifest()
+        self._copy_assets()
+
+        todo = []
+        seen = set()
+        for entry in iter_vault_files(self.vault_path):
+            rel = os.path.relpath(entry.path, self.vault_path)
+            seen.add(rel)
+            known = previous.get(rel)
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            if known is not None and known["mtime_ns"] == st.st_mtime_ns and known["size"] == st.st_size \
+                    and os.path.exists(os.path.join(self.out_dir, output_path(rel))):
+                self.files[rel] = known
+                continue
+            # A touched file whose content is unchanged is hashed but not re-rendered.
+            has_page = known is not None and os.path.exists(os.path.join(self.out_dir, output_path(rel)))
+            todo.append((rel, known["hash"] if has_page else None))
+
+        removed = 0
+        for rel in previous:
+            if rel not in seen:
+                removed += 1
+                try:
+                    os.unlink(os.path.join(self.out_dir, output_path(rel)))
+                except OSError:
+                    pass
+
+        rendered = self._process(todo)
+        self._save_manifest()
+        stats = {
+            "rendered": rendered,
+            "unchanged": len(self.files) - rendered,
+            "removed": removed,
+            "seconds": time.perf_counter() - start,
+        }
+        logging.info(f"Exported {self.vault_path} to {self.out_dir}: {stats}")
+        return stats
+
+    def _record(self, results):
+        rendered = 0
+        for rel, digest, mtime_ns, size, was_rendered in results:
+            self.files[rel] = {"hash": digest, "mtime_ns": mtime_ns, "size": size}
+            rendered += was_rendered
+        return rendered
+
+    def _process(self, todo):
+        if not todo:
+            return 0
+        chunks = [todo[i:i + _CHUNK] for i in range(0, len(todo), _CHUNK)]
+        if self.jobs == 1 or len(todo) < _POOL_MIN:
+            rendered = 0
+            for done, chunk in enumerate(chunks, 1):
+                rendered += self._record(_export_notes(self.vault_path, self.out_dir, chunk))
+                self._report(done, len(chunks))
+            return rendered
+
+        rendered = 0
+        last_save = time.monotonic()
+        with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+            futures = [pool.submit(_export_notes, self.vault_path, self.out_dir, chunk) for chunk in chunks]
+            for done, future in enumerate(as_completed(futures), 1):
+                rendered += self._record(future.result())
+                self._report(done, len(chunks))
+                if time.monotonic() - last_save > _MANIFEST_SAVE_INTERVAL:
+                    self._save_manifest()
+                    last_save = time.monotonic()
+        return rendered
+
+    def _report(self, done, total):
+        if self.progress is not None:
+            self.progress(done, total)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export an Acropad vault to static HTML.")
+    parser.add_argument("vault", help="vault directory")
+    parser.add_argument("output", help="output directory (created if needed)")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--full", action="store_true", help="ignore the manifest and re-render every note")
+    parser.add_argument("--quiet", "-q", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format='%(message)s')
+    if not os.path.isdir(args.vault):
+        parser.error(f"not a directory: {args.vault}")
+
+    def progress(done, total):
+        if not args.quiet:
+            print(f"\r{done}/{total} batches", end="" if done < total else "\n", file=sys.stderr, flush=True)
+
+    stats = Exporter(args.vault, args.output, jobs=args.jobs, full=args.full, progress=progress).run()
+    print(f"{stats['rendered']} rendered, {stats['unchanged']} unchanged, {stats['removed']} removed "
+          f"in {stats['seconds']:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
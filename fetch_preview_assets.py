@@ -0,0 +1,56 @@
+"""
+Download the preview's third-party assets into assets/preview/vendor so the
+preview works fully offline: MathJax (SVG output, no font files needed) and the
+Inter / JetBrains Mono web fonts. Run once before launching from source or
+building a release; the CI build runs it before PyInstaller.
+
+    python fetch_preview_assets.py
+"""
+
+import io
+import os
+import sys
+import tarfile
+import urllib.request
+
+VENDOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "preview", "vendor")
+
+PACKAGES = [
+    ("https://registry.npmjs.org/mathjax/-/mathjax-3.2.2.tgz", {
+        "package/es5/tex-mml-svg.js": "mathjax/tex-mml-svg.js",
+    }),
+    ("https://registry.npmjs.org/@fontsource/inter/-/inter-5.0.18.tgz", {
+        f"package/files/inter-latin-{w}-normal.woff2": f"fonts/inter-latin-{w}-normal.woff2"
+        for w in (400, 500, 600, 700)
+    }),
+    ("https://registry.npmjs.org/@fontsource/jetbrains-mono/-/jetbrains-mono-5.0.20.tgz", {
+        f"package/files/jetbrains-mono-latin-{w}-normal.woff2": f"fonts/jetbrains-mono-latin-{w}-normal.woff2"
+        for w in (400, 700)
+    }),
+]
+
+
+def fetch(url, members):
+    print(f"Fetching {url}")
+    with urllib.request.urlopen(url, timeout=60) as response:
+        data = response.read()
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as tar:
+        for member, target in members.items():
+            source = tar.extractfile(member)
+            if source is None:
+                raise FileNotFoundError(f"{member} not found in {url}")
+            path = os.path.join(VENDOR_DIR, target)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(source.read())
+            print(f"  -> {os.path.relpath(path)}")
+
+
+def main():
+    for url, members in PACKAGES:
+        fetch(url, members)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+import os
+import sys
+import bisect
+from array import array
+
+from vault_scan import iter_vault_files
+
+ROOT = 0      # Directory id of the vault root
+_DELETED = 0xFFFFFFFF
+
+
+def _sort_key(name):
+    return name.lower(), name
+
+
+class FileTable:
+    """
+    Compact in-memory table of a vault's notes.
+
+    Each directory path is stored once and files refer to it by id. File
+    names live in one UTF-8 buffer indexed by an offsets array, and sizes and
+    mtimes are typed arrays, so a file costs a few dozen bytes instead of the
+    hundreds a ``Path`` or a per-file dict would. Every directory keeps its
+    child directories and files sorted by name, which is what the tree model
+    serves.
+
+    Paths are vault-relative with ``os.sep`` separators. Removed files leave a
+    tombstone; ``compact()`` (or building a new table) reclaims the space.
+    Not thread-safe: build a table on a worker, then hand it over.
+    """
+
+    def __init__(self):
+        self._names = bytearray()
+        self._offsets = array('I', [0])
+        self._dir = array('I')
+        self._size = array('q')
+        self._mtime = array('q')
+        self._dirs = [""]
+        self._dir_ids = {"": ROOT}
+        self._dir_parent = array('I', [ROOT])
+        self._subdirs = {}   # dir id -> child dir ids, sorted by name
+        self._files = {}     # dir id -> array of file ids, sorted by name
+        self._count = 0
+
+    @classmethod
+    def scan(cls, root, should_cancel=None):
+        """Build a table from the notes under ``root``; ``None`` if cancelled."""
+        root = os.path.abspath(root)
+        prefix = len(os.path.join(root, ""))
+        rows = []
+        for entry in iter_vault_files(root):
+            if should_cancel is not None and should_cancel():
+                return None
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            rows.append((entry.path[prefix:], st.st_size, st.st_mtime_ns))
+        table = cls()
+        table.extend(rows)
+        return table
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, rel):
+        return self.find(rel) is not None
+
+    def extend(self, rows):
+        """Add many ``(rel, size, mtime_ns)`` rows at once, sorting each directory once."""
+        pending = {}  # dir id -> {name: new file id}
+        for rel, size, mtime_ns in rows:
+            dir_id, name = self._split(rel, create=True)
+            existing = self._find_in(dir_id, name) if dir_id in self._files else None
+            if existing is not None:
+                self._size[existing] = size
+                self._mtime[existing] = mtime_ns
+                continue
+            new = pending.setdefault(dir_id, {})
+            if name not in new:
+                new[name] = self._append(dir_id, name, size, mtime_ns)
+        for dir_id, new in pending.items():
+            files = list(self._files.get(dir_id, ())) + list(new.values())
+            files.sort(key=self._file_key)
+            self._files[dir_id] = array('I', files)
+
+    def add(self, rel, size=0, mtime_ns=0):
+        """Add (or update) one file; returns its id."""
+        dir_id, name = self._split(rel, create=True)
+        existing = self._find_in(dir_id, name)
+        if existing is not None:
+            self._size[existing] = size
+            self._mtime[existing] = mtime_ns
+            return existing
+        file_id = self._append(dir_id, name, size, mtime_ns)
+        files = self._files.setdefault(dir_id, array('I'))
+        files.insert(bisect.bisect_left(files, _sort_key(name), key=self._file_key), file_id)
+        return file_id
+
+    def remove(self, rel):
+        """Remove one file; directories left empty are removed too. Returns whether it existed."""
+        dir_id, name = self._split(rel)
+        file_id = self._find_in(dir_id, name) if dir_id is not None else None
+        if file_id is None:
+            return False
+        files = self._files[dir_id]
+        del files[self.file_row(file_id)]
+        self._dir[file_id] = _DELETED
+        self._count -= 1
+        while dir_id != ROOT and not self._files.get(dir_id) and not self._subdirs.get(dir_id):
+            parent = self._dir_parent[dir_id]
+            siblings = self._subdirs[parent]
+            siblings.remove(dir_id)
+            self._files.pop(dir_id, None)
+            del self._dir_ids[self._dirs[dir_id]]
+            self._dirs[dir_id] = None
+            dir_id = parent
+        return True
+
+    def compact(self):
+        """Rebuild without tombstones; file and directory ids change."""
+        rows = list(self.rows())
+        self.__init__()
+        self.extend(rows)
+
+    # Lookups
+
+    def find(self, rel):
+        """File id for ``rel``, or ``None``."""
+        dir_id, name = self._split(rel)
+        return None if dir_id is None else self._find_in(dir_id, name)
+
+    def find_dir(self, rel_dir):
+        return self._dir_ids.get(rel_dir)
+
+    def name(self, file_id):
+        return self._names[self._offsets[file_id]:self._offsets[file_id + 1]].decode("utf-8")
+
+    def path(self, file_id):
+        directory = self._dirs[self._dir[file_id]]
+        return os.path.join(directory, self.name(file_id)) if directory else self.name(file_id)
+
+    def size(self, file_id):
+        return self._size[file_id]
+
+    def mtime_ns(self, file_id):
+        return self._mtime[file_id]
+
+    def file_dir(self, file_id):
+        return self._dir[file_id]
+
+    def dir_path(self, dir_id):
+        return self._dirs[dir_id]
+
+    def dir_name(self, dir_id):
+        return os.path.basename(self._dirs[dir_id])
+
+    def dir_parent(self, dir_id):
+        return self._dir_parent[dir_id]
+
+    def subdirs(self, dir_id):
+        return self._subdirs.get(dir_id, ())
+
+    def files(self, dir_id):
+        return self._files.get(dir_id, ())
+
+    def dir_row(self, dir_id):
+        """Position of a directory among its parent's subdirectories."""
+        siblings = self._subdirs[self._dir_parent[dir_id]]
+        return bisect.bisect_left(siblings, _sort_key(self.dir_name(dir_id)), key=self._dir_key)
+
+    def file_row(self, file_id):
+        """Position of a file among its directory's files."""
+        files = self._files[self._dir[file_id]]
+        return bisect.bisect_left(files, _sort_key(self.name(file_id)), key=self._file_key)
+
+    def file_insert_row(self, dir_id, name):
+        """Row a new file ``name`` would take among ``dir_id``'s files."""
+        return bisect.bisect_left(self.files(dir_id), _sort_key(name), key=self._file_key)
+
+    def dir_insert_row(self, parent_id, name):
+        """Row a new directory ``name`` would take among ``parent_id``'s subdirectories."""
+        return bisect.bisect_left(self.subdirs(parent_id), _sort_key(name), key=self._dir_key)
+
+    def paths(self):
+        for file_id in range(len(self._dir)):
+            if self._dir[file_id] != _DELETED:
+                yield self.path(file_id)
+
+    def rows(self):
+        for file_id in range(len(self._dir)):
+            if self._dir[file_id] != _DELETED:
+                yield self.path(file_id), self._size[file_id], self._mtime[file_id]
+
+    def memory_usage(self):
+        """Approximate bytes held by the table (buffers, arrays, directory structures)."""
+        total = sys.getsizeof(self._names)
+        for column in (self._offsets, self._dir, self._size, self._mtime, self._dir_parent):
+            total += sys.getsizeof(column)
+        total += sys.getsizeof(self._dirs) + sys.getsizeof(self._dir_ids)
+        total += sum(sys.getsizeof(d) for d in self._dirs if d is not None)
+        total += sys.getsizeof(self._subdirs) + sum(sys.getsizeof(ids) for ids in self._subdirs.values())
+        total += sys.getsizeof(self._files) + sum(sys.getsizeof(ids) for ids in self._files.values())
+        return total
+
+    # Internals
+
+    def _file_key(self, file_id):
+        return _sort_key(self.name(file_id))
+
+    def _dir_key(self, dir_id):
+        return _sort_key(self.dir_name(dir_id))
+
+    def _append(self, dir_id, name, size, mtime_ns):
+        self._names += name.encode("utf-8")
+        self._offsets.append(len(self._names))
+        self._dir.append(dir_id)
+        self._size.append(size)
+        self._mtime.append(mtime_ns)
+        self._count += 1
+        return len(self._dir) - 1
+
+    def _split(self, rel, create=False):
+        directory, name = os.path.split(rel)
+        if create:
+            return self._ensure_dir(directory), name
+        return self._dir_ids.get(directory), name
+
+    def _ensure_dir(self, rel_dir):
+        dir_id = self._dir_ids.get(rel_dir)
+        if dir_id is not None:
+            return dir_id
+        parent = self._ensure_dir(os.path.dirname(rel_dir))
+        # Intern the path, so later lookups hit the same string object.
+        rel_dir = sys.intern(rel_dir)
+        dir_id = len(self._dirs)
+        self._dirs.append(rel_dir)
+        self._dir_ids[rel_dir] = dir_id
+        self._dir_parent.append(parent)
+        siblings = self._subdirs.setdefault(parent, [])
+        siblings.insert(bisect.bisect_left(siblings, _sort_key(os.path.basename(rel_dir)), key=self._dir_key), dir_id)
+        return dir_id
+
+    def _find_in(self, dir_id, name):
+        files = self._files.get(dir_id)
+        if not files:
+            return None
+        row = bisect.bisect_left(files, _sort_key(name), key=self._file_key)
+        if row < len(files) and self.name(files[row]) == name:
+            return files[row]
+        return None
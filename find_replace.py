@@ -0,0 +1,393 @@
+"""
+Vault-wide find and replace.
+
+``FindReplace.scan`` walks the vault with ``iter_vault_files`` (the same walk
+as the file list) and searches the notes in chunks on a process pool,
+handing each chunk's matches to a callback as soon as it is done. Nothing is
+kept per note beyond its first few matching lines, so memory stays flat on
+very large vaults. ``diff`` shows what a replacement would do to one note.
+
+``apply`` changes a set of notes all-or-nothing: new contents are staged in
+temp files and each original is linked (or copied) to a hidden backup next
+to it, then the temp files are renamed over the notes. If any step fails, or
+a note changed since it was staged, the notes already replaced are restored
+from their backups. A transaction interrupted by a crash is rolled back by
+``recover`` on the next start.
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import difflib
+import logging
+import tempfile
+import itertools
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from metrics import metrics
+from paths import vault_cache_dir
+from save_service import atomic_write
+from storage import decode_bytes
+from vault_scan import iter_vault_files
+
+# Files per worker task, and the vault size from which a process pool is worth starting.
+_CHUNK = 64
+_POOL_MIN = 200
+# Matching lines kept per note for display, and their width around the first match.
+MAX_LINES = 20
+_LINE_CHARS = 160
+_TRANSACTIONS = "replace"
+_ENTRIES = "entries"
+_STATE = "state"
+_COMMITTING = "committing"
+_COMMITTED = "committed"
+
+FileMatch = namedtuple("FileMatch", "path count lines")
+# lines: [(line_number, text)] for the first MAX_LINES lines with a match (1-based)
+
+
+class ReplaceError(Exception):
+    """An ``apply`` that was rolled back; ``path`` is the note it failed on."""
+
+    def __init__(self, message, path=None):
+        super().__init__(message)
+        self.path = path
+
+
+class Query:
+    """
+    What to look for: ``pattern`` taken literally or, with ``regex``, as a
+    Python regular expression (``^`` / ``$`` match at line ends). Raises
+    ``re.error`` for an invalid expression. ``replacement`` may refer to
+    groups (``\\1``, ``\\g<name>``) only in regex mode.
+    """
+
+    def __init__(self, pattern, replacement="", regex=False, case_sensitive=True, whole_word=False):
+        self.pattern = pattern
+        self.replacement = replacement
+        self.regex = regex
+        source = pattern if regex else re.escape(pattern)
+        if whole_word:
+            source = rf"\b(?:{source})\b"
+        flags = re.MULTILINE | (0 if case_sensitive else re.IGNORECASE)
+        self.compiled = re.compile(source, flags)
+
+    def replace(self, text):
+        """``(new_text, count)``."""
+        if self.regex:
+            return self.compiled.subn(self.replacement, text)
+        replacement = self.replacement
+        return self.compiled.subn(lambda match: replacement, text)
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        data = f.read()
+    text, encoding = decode_bytes(data)
+    return text, encoding, st
+
+
+def _snippet(line, start):
+    if len(line) <= _LINE_CHARS:
+        return line
+    begin = max(0, min(start - _LINE_CHARS // 4, len(line) - _LINE_CHARS))
+    return ("…" if begin else "") + line[begin:begin + _LINE_CHARS] + ("…" if begin + _LINE_CHARS < len(line) else "")
+
+
+def search_file(path, query):
+    """``FileMatch`` for one note, or ``None`` if it has no match (or can't be read)."""
+    try:
+        text, _, _ = _read(path)
+    except OSError:
+        return None
+    count = 0
+    lines = []
+    line_number = 1
+    line_start = 0
+    for match in query.compiled.finditer(text):
+        count += 1
+        if len(lines) >= MAX_LINES:
+            continue
+        start = match.start()
+        line_number += text.count("\n", line_start, start)
+        line_start = text.rfind("\n", 0, start) + 1
+        if lines and lines[-1][0] == line_number:
+            continue
+        line_end = text.find("\n", start)
+        line = text[line_start:line_end if line_end != -1 else len(text)].rstrip("\r")
+        lines.append((line_number, _snippet(line, start - line_start)))
+    return FileMatch(path, count, lines) if count else None
+
+
+def _search_chunk(paths, query):
+    """Worker task: matches in ``paths``, plus how many were searched."""
+    matches = []
+    for path in paths:
+        match = search_file(path, query)
+        if match is not None:
+            matches.append(match)
+    return matches, len(paths)
+
+
+class FindReplace:
+    """
+    Find and replace over one vault. The process pool is started on the
+    first scan of a vault big enough to need it and kept for later ones;
+    ``close`` stops it.
+    """
+
+    def __init__(self, vault_path, jobs=None):
+        self.vault_path = os.path.abspath(vault_path)
+        self.jobs = jobs or os.cpu_count() or 1
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            # Spawned, not forked: the GUI process has threads of its own.
+            self._pool = ProcessPoolExecutor(max_workers=self.jobs, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    @metrics.timer("find_replace.scan")
+    def scan(self, query, on_batch=None, should_cancel=None):
+        """
+        Search every note, calling ``on_batch(matches)`` (from this thread)
+        with the ``FileMatch`` list of each chunk as it completes. Returns
+        counts: ``files``, ``matched_files``, ``matches``, ``cancelled``.
+        """
+        stats = {"files": 0, "matched_files": 0, "matches": 0, "cancelled": False}
+
+        def report(result):
+            matches, searched = result
+            stats["files"] += searched
+            stats["matched_files"] += len(matches)
+            stats["matches"] += sum(m.count for m in matches)
+            if matches and on_batch is not None:
+                on_batch(matches)
+
+        chunks = self._chunks()
+        head = list(itertools.islice(chunks, _POOL_MIN // _CHUNK + 1))
+        chunks = itertools.chain(head, chunks)
+        if self.jobs == 1 or len(head) <= _POOL_MIN // _CHUNK:
+            # Small vault: searched right here, a pool would take longer to start.
+            for chunk in chunks:
+                if should_cancel is not None and should_cancel():
+                    stats["cancelled"] = True
+                    break
+                report(_search_chunk(chunk, query))
+            return stats
+
+        pool = self._get_pool()
+        pending = set()
+        exhausted = False
+        # At most two chunks per worker are in flight, so paths are walked only as fast as they are searched.
+        while True:
+            while not exhausted and len(pending) < self.jobs * 2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(_search_chunk, chunk, query))
+            if not pending:
+                break
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                report(future.result())
+            if should_cancel is not None and should_cancel():
+                for future in pending:
+                    future.cancel()
+                stats["cancelled"] = True
+                break
+        return stats
+
+    def _chunks(self):
+        chunk = []
+        for entry in iter_vault_files(self.vault_path):
+            chunk.append(entry.path)
+            if len(chunk) >= _CHUNK:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def diff(self, query, path):
+        """Unified diff of what replacing would do to ``path`` (vault-relative names)."""
+        text, _, _ = _read(path)
+        new_text, _ = query.replace(text)
+        rel = os.path.relpath(path, self.vault_path)
+        return "".join(difflib.unified_diff(text.splitlines(keepends=True), new_text.splitlines(keepends=True),
+                                            f"a/{rel}", f"b/{rel}", n=2))
+
+    @metrics.timer("find_replace.apply")
+    def apply(self, query, paths, progress=None):
+        """
+        Replace in all of ``paths`` or none of them (raises ``ReplaceError``
+        after rolling back). Returns ``{path: replacements}`` for the notes
+        that changed. ``progress(done, total)`` is called while staging.
+        """
+        paths = list(dict.fromkeys(paths))
+        transaction = Transaction(self.vault_path)
+        changed = {}
+        try:
+            for done, path in enumerate(paths, 1):
+                try:
+                    text, encoding, st = _read(path)
+                    new_text, count = query.replace(text)
+                    if count and new_text != text:
+                        transaction.stage(path, new_text.encode(encoding), st)
+                        changed[path] = count
+                except (OSError, UnicodeEncodeError, re.error) as e:
+                    raise ReplaceError(f"{os.path.relpath(path, self.vault_path)}: {e}", path) from e
+                if progress is not None:
+                    progress(done, len(paths))
+            try:
+                transaction.commit()
+            except OSError as e:
+                raise ReplaceError(f"Replacing failed: {e}", getattr(e, "filename", None)) from e
+        except BaseException:
+            transaction.rollback()
+            raise
+        logging.info(f"Replaced {sum(changed.values())} matches in {len(changed)} notes")
+        return changed
+
+
+class Transaction:
+    """
+    One multi-file replacement. ``stage`` writes the new content next to the
+    note and links (or copies) the original to a hidden backup beside it, on
+    the same filesystem, so ``commit`` is a series of renames and
+    ``rollback`` can undo any prefix of them. Each staged note is logged to
+    ``entries`` under the vault's cache directory and the ``state`` file
+    marks the start and end of the renames, which is what ``recover`` goes
+    by after a crash.
+    """
+
+    def __init__(self, vault_path):
+        root = os.path.join(vault_cache_dir(vault_path), _TRANSACTIONS)
+        os.makedirs(root, exist_ok=True)
+        self.directory = tempfile.mkdtemp(dir=root, prefix=time.strftime("%Y%m%d-%H%M%S-"))
+        self.entries = []   # [path, staged temp file, backup, [size, mtime_ns] when read]
+        self.replaced = 0
+        self._log = open(os.path.join(self.directory, _ENTRIES), 'w', encoding='utf-8')
+
+    def stage(self, path, data, st):
+        directory, name = os.path.split(path)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{name}.", suffix=".tmp")
+        backup = os.path.join(directory, f".{name}.{os.path.basename(self.directory)}.bak")
+        entry = [path, tmp_path, backup, [st.st_size, st.st_mtime_ns]]
+        self.entries.append(entry)
+        self._log.write(json.dumps(entry) + "\n")
+        self._log.flush()
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, st.st_mode & 0o7777)
+        try:
+            os.link(path, backup)   # The old inode stays reachable once the note is replaced.
+        except OSError:
+            shutil.copy2(path, backup)
+
+    def _set_state(self, state):
+        atomic_write(os.path.join(self.directory, _STATE), state.encode("utf-8"))
+
+    def commit(self):
+        os.fsync(self._log.fileno())
+        self._log.close()
+        self._set_state(_COMMITTING)
+        for path, tmp_path, _, known in self.entries:
+            st = os.stat(path)
+            if [st.st_size, st.st_mtime_ns] != known:
+                raise ReplaceError(f"{path} changed while replacing", path)
+            os.replace(tmp_path, path)
+            self.replaced += 1
+        self._set_state(_COMMITTED)
+        for _, _, backup, _ in self.entries:
+            _unlink(backup)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def rollback(self):
+        self._log.close()
+        for path, tmp_path, backup, _ in self.entries[:self.replaced]:
+            try:
+                os.replace(backup, path)
+            except OSError:
+                logging.error(f"Could not restore {path} from {backup}", exc_info=True)
+                return  # Keep the backups for recover()
+        for _, tmp_path, backup, _ in self.entries[self.replaced:]:
+            _unlink(tmp_path)
+            _unlink(backup)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def recover(vault_path):
+    """
+    Roll back replacements a crash left half-committed. Returns the notes
+    restored. Call before anything reads the vault.
+
+    Raises ``ReplaceError`` if a note could not be restored; its transaction
+    is kept so the next call tries again.
+    """
+    root = os.path.join(vault_cache_dir(vault_path), _TRANSACTIONS)
+    try:
+        names = sorted(os.listdir(root))
+    except FileNotFoundError:
+        return []
+    restored = []
+    failed = []
+    for name in names:
+        directory = os.path.join(root, name)
+        try:
+            with open(os.path.join(directory, _STATE), 'r', encoding='utf-8') as f:
+                state = f.read()
+        except OSError:
+            state = None    # Still staging: no note was touched
+        entries = []
+        try:
+            with open(os.path.join(directory, _ENTRIES), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        break   # Torn last line
+        except OSError:
+            pass
+        rolled_back = 0
+        kept = False
+        for path, tmp_path, backup, _ in entries:
+            if state == _COMMITTING and os.path.exists(backup):
+                # Whether or not the note was replaced yet, the backup holds its original content.
+                try:
+                    os.replace(backup, path)
+                except OSError:
+                    logging.error(f"Could not restore {path} from {backup}", exc_info=True)
+                    failed.append(path)
+                    kept = True
+                    continue
+                restored.append(path)
+                rolled_back += 1
+            _unlink(tmp_path)
+            _unlink(backup)
+        if rolled_back:
+            logging.warning(f"Rolled back interrupted replace {name}: {rolled_back} notes")
+        if not kept:
+            shutil.rmtree(directory, ignore_errors=True)
+    if failed:
+        raise ReplaceError(f"Could not undo an interrupted replace in {len(failed)} notes", failed[0])
+    return restored
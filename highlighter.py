@@ -0,0 +1,235 @@
+import re
+import time
+
+from PyQt6.QtCore import QObject, QTimer
+from PyQt6.QtGui import QColor, QFont, QTextCharFormat, QTextLayout
+
+from metrics import metrics
+
+# Block states, stored in QTextBlock.userState(). Fences also carry their
+# marker: state = FENCE | char << 3 | length << 4, so only a matching fence closes.
+NORMAL = 0
+FRONT_MATTER = 1
+MATH = 2
+FENCE = 4
+_UNSET = -1
+_FENCE_CHARS = "`~"
+
+_HEADING_RE = re.compile(r' {0,3}#{1,6}(?:\s|$)')
+_FENCE_RE = re.compile(r' {0,3}(`{3,}|~{3,})')
+_MATH_FENCE_RE = re.compile(r' {0,3}\$\$\s*$')
+_HR_RE = re.compile(r' {0,3}([-*_])(?: *\1){2,} *$')
+_QUOTE_RE = re.compile(r' {0,3}>')
+_LIST_RE = re.compile(r'\s*(?:[-*+]|\d{1,9}[.)])(?=\s)')
+# (style, characters one of which must occur for a match, pattern)
+_INLINE_RES = (
+    ("strong", "*_", re.compile(r'(\*\*|__)(?=\S)(.+?)(?<=\S)\1')),
+    ("emphasis", "*_", re.compile(r'(?<![\w*])\*(?=\S)([^*]+?)(?<=\S)\*(?!\*)|(?<!\w)_(?=\S)([^_]+?)(?<=\S)_(?!\w)')),
+    ("link", "[<", re.compile(r'!?\[[^\]\n]*\]\([^)\n]*\)|\[\[[^\[\]\n]+\]\]|<https?://[^>\s]+>')),
+    ("math", "$", re.compile(r'(?<![\\$])\$(?=\S)[^$\n]+?(?<=\S)\$(?!\$)')),
+    # Last, so code spans override the styles of anything inside them.
+    ("code", "`", re.compile(r'(`+)(?!`).+?(?<!`)\1(?!`)')),
+)
+
+
+def _fence_state(marker):
+    return FENCE | (_FENCE_CHARS.index(marker[0]) << 3) | (len(marker) << 4)
+
+
+def highlight_line(text, state, first=False):
+    """
+    Style one line given the state left by the line before it.
+
+    Returns ``(state, spans)``: the state for the next line and a list of
+    ``(start, length, style)``. ``first`` marks the document's first line,
+    the only place front matter can start.
+    """
+    if state & FENCE:
+        char = _FENCE_CHARS[(state >> 3) & 1]
+        stripped = text.strip()
+        if (len(text) - len(text.lstrip(" ")) <= 3 and len(stripped) >= state >> 4
+                and stripped == char * len(stripped)):
+            return NORMAL, [(0, len(text), "fence")]
+        return state, [(0, len(text), "code_block")]
+    if state == FRONT_MATTER:
+        if text.rstrip() in ("---", "..."):
+            return NORMAL, [(0, len(text), "fence")]
+        return FRONT_MATTER, [(0, len(text), "front_matter")]
+    if state == MATH:
+        if _MATH_FENCE_RE.match(text):
+            return NORMAL, [(0, len(text), "math")]
+        return MATH, [(0, len(text), "math")]
+
+    if first and text.rstrip() == "---":
+        return FRONT_MATTER, [(0, len(text), "fence")]
+    match = _FENCE_RE.match(text)
+    if match:
+        return _fence_state(match.group(1)), [(0, len(text), "fence")]
+    if _MATH_FENCE_RE.match(text):
+        return MATH, [(0, len(text), "math")]
+    if _HEADING_RE.match(text):
+        return NORMAL, [(0, len(text), "heading")]
+    if _HR_RE.match(text):
+        return NORMAL, [(0, len(text), "rule")]
+
+    spans = []
+    match = _QUOTE_RE.match(text)
+    if match:
+        spans.append((0, len(text), "quote"))
+    else:
+        match = _LIST_RE.match(text)
+        if match:
+            spans.append((0, match.end(), "list"))
+    for style, chars, pattern in _INLINE_RES:
+        if not any(c in text for c in chars):
+            continue
+        for match in pattern.finditer(text):
+            spans.append((match.start(), match.end() - match.start(), style))
+    return NORMAL, spans
+
+
+def default_formats():
+    """Dark-theme character formats for each style ``highlight_line`` produces."""
+    def fmt(color, bold=False, italic=False, background=None):
+        f = QTextCharFormat()
+        f.setForeground(QColor(color))
+        f.setFontWeight(QFont.Weight.Bold if bold else QFont.Weight.Normal)
+        f.setFontItalic(italic)
+        if background is not None:
+            f.setBackground(QColor(background))
+        return f
+
+    return {
+        "heading": fmt("#60A5FA", bold=True),
+        "strong": fmt("#F5F5F5", bold=True),
+        "emphasis": fmt("#E5E5E5", italic=True),
+        "link": fmt("#3B82F6"),
+        "math": fmt("#C586C0"),
+        "code": fmt("#CE9178", background="#262626"),
+        "code_block": fmt("#CE9178"),
+        "fence": fmt("#737373"),
+        "front_matter": fmt("#8B8B8B"),
+        "quote": fmt("#A3A3A3", italic=True),
+        "list": fmt("#2563EB", bold=True),
+        "rule": fmt("#525252"),
+    }
+
+
+class MarkdownHighlighter(QObject):
+    """
+    Markdown highlighting for a QTextDocument that never blocks for long.
+
+    Like ``QSyntaxHighlighter`` it keeps each block's fence / front-matter /
+    math state in ``userState()`` and, after an edit, restyles from the edited
+    block onwards only until a block's state comes out unchanged. Unlike it,
+    the work is cut into slices of at most ``budget_ms``: the first runs as
+    part of the edit, the rest from the event loop, so opening a huge note or
+    typing a fence at its top never stalls a keystroke.
+    """
+
+    def __init__(self, document, budget_ms=4.0, formats=None):
+        super().__init__(document)
+        self.document = document
+        self.budget = budget_ms / 1000
+        self.formats = formats or default_formats()
+        self._next = None    # First block still to restyle
+        self._until = -1     # Restyle at least up to this block number
+        self._block_count = document.blockCount()
+        self._applying = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._continue)
+        # contentsChange is only emitted once the document has a layout.
+        document.documentLayout()
+        document.contentsChange.connect(self._on_contents_change)
+        self.rehighlight()
+
+    @property
+    def pending(self):
+        return self._next is not None
+
+    def rehighlight(self):
+        """Restyle the whole document (in slices)."""
+        self._next = 0
+        self._until = self.document.blockCount() - 1
+        self._block_count = self.document.blockCount()
+        self._run()
+
+    def finish(self):
+        """Complete any pending work now, regardless of the budget (for tests)."""
+        while self._next is not None:
+            self._run(budget=None)
+
+    def _on_contents_change(self, position, removed, added):
+        if self._applying:
+            return
+        first = self.document.findBlock(position).blockNumber()
+        last = self.document.findBlock(position + added).blockNumber()
+        if last < 0:
+            last = self.document.blockCount() - 1
+        delta = self.document.blockCount() - self._block_count
+        self._block_count = self.document.blockCount()
+        if self._next is None:
+            self._next, self._until = first, last
+        else:
+            if first <= self._until:
+                # Pending work past the edit moved with the lines inserted or removed.
+                self._until += delta
+            self._next = min(self._next, first)
+            self._until = max(self._until, last)
+        self._run()
+
+    def _continue(self):
+        self._run()
+
+    def _run(self, budget=-1):
+        if self._next is None:
+            return
+        budget = self.budget if budget == -1 else budget
+        start = time.perf_counter()
+        block = self.document.findBlockByNumber(self._next)
+        dirty_from = block.position()
+        dirty_to = dirty_from
+        self._applying = True
+        try:
+            while block.isValid():
+                number = block.blockNumber()
+                previous = block.previous()
+                state = previous.userState() if previous.isValid() else NORMAL
+                if state == _UNSET:
+                    state = NORMAL
+                new_state, spans = highlight_line(block.text(), state, first=number == 0)
+                old_state = block.userState()
+                if self._apply(block, spans):
+                    dirty_to = block.position() + block.length()
+                block.setUserState(new_state)
+                block = block.next()
+                if number >= self._until and new_state == old_state:
+                    break
+                if budget is not None and time.perf_counter() - start > budget:
+                    self._next = number + 1
+                    self._timer.start(0)
+                    return
+            self._next = None
+            self._until = -1
+        finally:
+            # One relayout for the whole slice; per block it is far costlier than the styling.
+            if dirty_to > dirty_from:
+                self.document.markContentsDirty(dirty_from, dirty_to - dirty_from)
+            self._applying = False
+            metrics.observe("highlight.slice", time.perf_counter() - start)
+
+    def _apply(self, block, spans):
+        """Set the block's formats; returns whether anything changed."""
+        ranges = []
+        for start, length, style in spans:
+            r = QTextLayout.FormatRange()
+            r.start = start
+            r.length = length
+            r.format = self.formats[style]
+            ranges.append(r)
+        layout = block.layout()
+        if not ranges and not layout.formats():
+            return False
+        layout.setFormats(ranges)
+        return True
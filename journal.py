@@ -0,0 +1,349 @@
+import os
+import json
+import zlib
+import struct
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import metrics
+from paths import vault_cache_dir
+from save_service import atomic_write, encode_text
+from storage import read_text
+
+JOURNAL_NAME = "journal.bin"
+
+# Record frame: payload length and CRC-32, then the JSON payload. A frame cut
+# short by a crash fails the length or CRC check and ends the replay there.
+_HEADER = struct.Struct("<II")
+# Past this size the journal is rewritten with only what is still unsaved.
+_ROTATE_BYTES = 4 * 1024 * 1024
+# Granularity of the prefix/suffix scan that finds the edited range.
+_DIFF_CHUNK = 4096
+
+# Recovery outcomes
+RESTORED = "restored"
+CONFLICT = "conflict"
+LOST = "lost"
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _common_prefix(a, b):
+    limit = min(len(a), len(b))
+    i = 0
+    # Whole chunks first (each comparison runs in C), then the first differing one char by char.
+    while i + _DIFF_CHUNK <= limit and a[i:i + _DIFF_CHUNK] == b[i:i + _DIFF_CHUNK]:
+        i += _DIFF_CHUNK
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _common_suffix(a, b, limit):
+    end_a, end_b = len(a), len(b)
+    i = 0
+    while i + _DIFF_CHUNK <= limit and \
+            a[end_a - i - _DIFF_CHUNK:end_a - i] == b[end_b - i - _DIFF_CHUNK:end_b - i]:
+        i += _DIFF_CHUNK
+    while i < limit and a[end_a - i - 1] == b[end_b - i - 1]:
+        i += 1
+    return i
+
+
+def text_delta(old, new):
+    """
+    The single replacement that turns ``old`` into ``new``: ``(at, removed, inserted)``
+    meaning ``new == old[:at] + inserted + old[at + removed:]``, or ``None`` if equal.
+    """
+    if old == new:
+        return None
+    at = _common_prefix(old, new)
+    tail = _common_suffix(old, new, min(len(old), len(new)) - at)
+    return at, len(old) - at - tail, new[at:len(new) - tail]
+
+
+def apply_delta(text, at, removed, inserted):
+    return text[:at] + inserted + text[at + removed:]
+
+
+def _frame(record):
+    payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(path):
+    """Records of a journal file up to the first torn or corrupt frame."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    records = []
+    pos = 0
+    while pos + _HEADER.size <= len(data):
+        length, crc = _HEADER.unpack_from(data, pos)
+        payload = data[pos + _HEADER.size:pos + _HEADER.size + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            break
+        try:
+            records.append(json.loads(payload))
+        except ValueError:
+            break
+        pos += _HEADER.size + length
+    return records
+
+
+class EditJournal:
+    """
+    Append-only, per-vault journal of editor changes.
+
+    Instead of rewriting a note on every autosave, the frontends call
+    ``record(path, text)`` shortly after each burst of typing; the journal
+    diffs against the text it saw last and appends just the replaced range,
+    so disk writes are proportional to the edit. Now and then the note is
+    written out in full (compacted) through ``SaveService``: ``checkpoint``
+    before submitting the save, ``saved`` once it landed.
+
+    Records (JSON in CRC-checked frames, paths vault-relative):
+
+    * ``base``: ``hash`` of the note's text at this point of the chain, i.e.
+      the content on disk when it was opened, or about to be saved;
+    * ``edit``: ``at`` / ``del`` / ``ins`` replacement applied to the text;
+    * ``text``: the full text (written only when the journal is rotated);
+    * ``saved``: a save of content with ``hash`` reached the disk.
+
+    ``recover()`` replays the journal left by a previous session: starting
+    from the file on disk (matched against a ``base`` hash) it applies the
+    edits after it and writes the result back if it differs. A file that
+    changed outside Acropad in the meantime is never overwritten: if the
+    journal holds a full snapshot the recovered text goes to a
+    ``(recovered)`` copy next to it, otherwise the edits (deltas against
+    content that no longer exists) are reported lost.
+
+    Appends happen in order on one writer thread and are fsync'ed there.
+    """
+
+    def __init__(self, vault_path, journal_path=None, sync=True):
+        self.vault_path = os.path.abspath(vault_path)
+        if journal_path is None:
+            journal_path = os.path.join(vault_cache_dir(self.vault_path), JOURNAL_NAME)
+        self.journal_path = journal_path
+        self.sync = sync
+        self._lock = threading.Lock()
+        self._texts = {}        # rel -> text the last record brought the chain to
+        self._based = set()     # rels whose chain has a base record in this journal
+        self._disk_hash = {}    # rel -> hash of what we believe is on disk
+        self._unconfirmed = {}  # rel -> hashes checkpointed but not yet saved
+        self._size = 0
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="journal")
+        self._fd = None
+        self._stats = {"records": 0, "bytes": 0, "rotations": 0}
+
+    def _rel(self, path):
+        return os.path.relpath(os.path.abspath(path), self.vault_path)
+
+    # Recovery
+
+    def recover(self):
+        """
+        Replay what a previous session journaled but never saved, then start a
+        fresh journal. Returns ``[(path, outcome)]`` with outcome ``RESTORED``,
+        ``CONFLICT`` (written to a copy: the note was changed or deleted
+        since) or ``LOST`` (the base is gone).
+        """
+        records = read_records(self.journal_path)
+        chains = {}
+        for record in records:
+            chains.setdefault(record["path"], []).append(record)
+        results = []
+        for rel, chain in chains.items():
+            try:
+                outcome = self._recover_file(rel, chain)
+            except OSError:
+                logging.error(f"Journal recovery failed for {rel}", exc_info=True)
+                outcome = (os.path.join(self.vault_path, rel), LOST)
+            if outcome is not None:
+                results.append(outcome)
+        self._open_journal(truncate=True)
+        self._size = 0
+        for path, outcome in results:
+            logging.info(f"Journal recovery: {outcome} {path}")
+        return results
+
+    def _recover_file(self, rel, chain):
+        path = os.path.join(self.vault_path, rel)
+        # Read as the editor did, so the hashes in the chain can match.
+        try:
+            result = read_text(path)
+            disk, encoding = result.text, result.encoding
+        except FileNotFoundError:
+            disk, encoding = None, "utf-8"
+        disk_hash = text_hash(disk) if disk is not None else None
+
+        text = None
+        known = set()   # Content hashes the file legitimately had
+        for record in chain:
+            op = record["op"]
+            if op == "base":
+                known.add(record["hash"])
+                if text is None or text_hash(text) != record["hash"]:
+                    text = disk if disk_hash == record["hash"] else None
+            elif op == "saved":
+                known.add(record["hash"])
+            elif op == "text":
+                text = record["text"]
+            elif op == "edit" and text is not None:
+                text = apply_delta(text, record["at"], record["del"], record["ins"])
+
+        if text is None:
+            return (path, LOST) if any(r["op"] == "edit" for r in chain) else None
+        if text == disk:
+            return None
+        if disk is not None and disk_hash in known:
+            atomic_write(path, encode_text(text, encoding))
+            return path, RESTORED
+        # Changed or deleted since: leave that alone and put our text next to it.
+        root, ext = os.path.splitext(path)
+        copy = f"{root} (recovered){ext}"
+        os.makedirs(os.path.dirname(copy), exist_ok=True)
+        atomic_write(copy, encode_text(text, encoding))
+        return copy, CONFLICT
+
+    # Recording
+
+    def opened(self, path, text):
+        """The editor now shows ``path`` with ``text``, which matches the file on disk."""
+        rel = self._rel(path)
+        with self._lock:
+            self._texts[rel] = text
+            self._based.discard(rel)
+            self._disk_hash.pop(rel, None)
+
+    def record(self, path, text):
+        """Journal the difference between ``text`` and what was last recorded for ``path``."""
+        rel = self._rel(path)
+        with self._lock:
+            old = self._texts.get(rel)
+            if old is None or self._closed:
+                return
+            delta = text_delta(old, text)
+            if delta is None:
+                return
+            frames = []
+            if rel not in self._based:
+                # First edit since opening: anchor the chain to the content on disk.
+                disk_hash = text_hash(old)
+                self._disk_hash[rel] = disk_hash
+                frames.append(_frame({"op": "base", "path": rel, "hash": disk_hash}))
+                self._based.add(rel)
+            at, removed, inserted = delta
+            frames.append(_frame({"op": "edit", "path": rel, "at": at, "del": removed, "ins": inserted}))
+            self._texts[rel] = text
+            self._append(b"".join(frames))
+
+    def checkpoint(self, path, text):
+        """``text`` is about to be written to ``path`` in full; call ``saved`` when it is."""
+        self.record(path, text)
+        rel = self._rel(path)
+        with self._lock:
+            if self._closed or rel not in self._based:
+                return
+            digest = text_hash(text)
+            self._unconfirmed.setdefault(rel, set()).add(digest)
+            self._append(_frame({"op": "base", "path": rel, "hash": digest}))
+
+    def saved(self, path, content):
+        """A save of ``content`` reached the disk (may be called from the save thread)."""
+        rel = self._rel(path)
+        digest = text_hash(content)
+        with self._lock:
+            pending = self._unconfirmed.get(rel)
+            if self._closed or not pending or digest not in pending:
+                return
+            pending.discard(digest)
+            if not pending:
+                del self._unconfirmed[rel]
+            self._disk_hash[rel] = digest
+            self._append(_frame({"op": "saved", "path": rel, "hash": digest}))
+            self._maybe_rotate()
+
+    def closed(self, path):
+        """The editor no longer shows ``path``; journal nothing more for it until it is reopened."""
+        rel = self._rel(path)
+        with self._lock:
+            self._texts.pop(rel, None)
+
+    def flush(self):
+        """Wait until every record so far is on disk."""
+        self._executor.submit(lambda: None).result()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=True)
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+            stats["unsaved"] = len(self._unconfirmed)
+        return stats
+
+    # Internals (called with the lock held)
+
+    def _append(self, data):
+        self._size += len(data)
+        self._stats["records"] += 1
+        self._stats["bytes"] += len(data)
+        self._executor.submit(self._write, data)
+
+    def _maybe_rotate(self):
+        # Only once every checkpoint has landed: until then the journal still
+        # holds the only copy of what those saves are writing.
+        if self._size < _ROTATE_BYTES or self._unconfirmed:
+            return
+        frames = []
+        for rel, text in self._texts.items():
+            if rel in self._based and text_hash(text) != self._disk_hash.get(rel):
+                frames.append(_frame({"op": "base", "path": rel, "hash": self._disk_hash.get(rel)}))
+                frames.append(_frame({"op": "text", "path": rel, "text": text}))
+        data = b"".join(frames)
+        self._size = len(data)
+        self._stats["rotations"] += 1
+        self._executor.submit(self._rewrite, data)
+
+    # Writer thread
+
+    def _open_journal(self, truncate=False):
+        if self._fd is not None:
+            os.close(self._fd)
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0)
+        if truncate:
+            flags |= os.O_TRUNC
+        self._fd = os.open(self.journal_path, flags, 0o600)
+
+    def _write(self, data):
+        try:
+            if self._fd is None:
+                self._open_journal()
+            with metrics.timed("journal.append"):
+                os.write(self._fd, data)
+                if self.sync:
+                    os.fsync(self._fd)
+        except OSError:
+            logging.error(f"Journal write failed: {self.journal_path}", exc_info=True)
+
+    def _rewrite(self, data):
+        try:
+            atomic_write(self.journal_path, data)
+            self._open_journal()
+        except OSError:
+            logging.error(f"Journal rotation failed: {self.journal_path}", exc_info=True)
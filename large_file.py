@@ -0,0 +1,99 @@
+import os
+import mmap
+import threading
+from array import array
+from itertools import accumulate
+
+# Files above this size open read-only in large-file mode.
+LARGE_FILE_THRESHOLD = int(os.environ.get("ACROPAD_LARGE_FILE_MB", "16")) * 1024 * 1024
+
+_CHUNK = 4 * 1024 * 1024
+
+
+def is_large_file(path, threshold=None):
+    try:
+        return os.path.getsize(path) > (LARGE_FILE_THRESHOLD if threshold is None else threshold)
+    except OSError:
+        return False
+
+
+class LargeFile:
+    """
+    Read-only, memory-mapped view of a big text file with a lazily built line index.
+
+    ``build_index()`` (meant for a worker thread) records the byte offset of
+    every line start in an ``array('Q')``; ``lines()`` can be used while it runs
+    and sees the lines indexed so far. Only the requested lines are decoded.
+    """
+
+    def __init__(self, path, encoding='utf-8'):
+        self.path = path
+        self.encoding = encoding
+        self._lock = threading.Lock()
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self._offsets = array('Q', [0])
+        self.indexed = self.size == 0
+        self._closed = False
+
+    @property
+    def line_count(self):
+        # Until indexing finishes the last known line start is also the end of what we can show.
+        return len(self._offsets) if self.indexed else max(1, len(self._offsets) - 1)
+
+    def build_index(self):
+        pos = 0
+        while pos < self.size:
+            with self._lock:
+                if self._closed:
+                    return
+                chunk = self._mm[pos:pos + _CHUNK]
+            last_nl = chunk.rfind(b'\n')
+            if last_nl < 0:
+                if pos + len(chunk) >= self.size:
+                    break  # Final line has no trailing newline
+                # A single line longer than a chunk; jump to its end.
+                with self._lock:
+                    if self._closed:
+                        return
+                    nl = self._mm.find(b'\n', pos + len(chunk))
+                if nl < 0:
+                    break
+                with self._lock:
+                    self._offsets.append(nl + 1)
+                pos = nl + 1
+                continue
+            starts = accumulate((len(line) + 1 for line in chunk[:last_nl].split(b'\n')), initial=pos)
+            next(starts)
+            new = array('Q', starts)
+            with self._lock:
+                self._offsets.extend(new)
+            pos += last_nl + 1
+        self.indexed = True
+
+    def lines(self, start, count):
+        """Decode up to ``count`` lines beginning at line ``start``."""
+        with self._lock:
+            if self._closed or self._mm is None:
+                return []
+            offsets = self._offsets
+            limit = len(offsets) if self.indexed else len(offsets) - 1
+            start = max(0, min(start, limit))
+            end = min(start + count, limit)
+            if start >= end:
+                return []
+            begin = offsets[start]
+            stop = offsets[end] if end < len(offsets) else self.size
+            data = self._mm[begin:stop]
+        lines = data.decode(self.encoding, errors='replace').split('\n')[:end - start]
+        return [line[:-1] if line.endswith('\r') else line for line in lines]
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._mm is not None:
+                self._mm.close()
+            self._file.close()
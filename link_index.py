@@ -0,0 +1,167 @@
+import os
+import re
+import posixpath
+from collections import Counter, namedtuple
+from urllib.parse import unquote
+
+from metrics import metrics
+from note_index import NoteIndex
+from vault_scan import NOTE_EXTENSIONS
+
+Backlink = namedtuple("Backlink", "path count")
+UnresolvedLink = namedtuple("UnresolvedLink", "target sources")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS names (
+    key TEXT NOT NULL,
+    file INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS names_key ON names (key);
+CREATE INDEX IF NOT EXISTS names_file ON names (file);
+CREATE TABLE IF NOT EXISTS links (
+    src INTEGER NOT NULL,
+    target TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (src, target)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS links_target ON links (target, src);
+"""
+
+# [[Target]], [[Target#Heading]], [[Target|Alias]], ![[Embed]]
+_WIKILINK_RE = re.compile(r'\[\[([^\[\]|#\n]*)[^\[\]\n]*\]\]')
+# [text](relative/path.md) and [text](<path with spaces.md>)
+_MDLINK_RE = re.compile(r'\[[^\]\n]*\]\(\s*<?([^)<>\n]+?\.(?:md|txt))>?(?:#[^)\s]*)?(?:\s+"[^"]*")?\s*\)', re.IGNORECASE)
+_FENCED_RE = re.compile(r'^ {0,3}(`{3,}|~{3,}).*?(?:^ {0,3}\1[`~]*\s*$|\Z)', re.MULTILINE | re.DOTALL)
+_INLINE_CODE_RE = re.compile(r'`[^`\n]*`')
+
+
+def _strip_ext(path):
+    root, ext = posixpath.splitext(path)
+    return root if ext.lower() in NOTE_EXTENSIONS else path
+
+
+def note_keys(rel):
+    """
+    Every link target that resolves to the note at vault-relative ``rel``:
+    its name and each trailing part of its path (``b/note``, ``a/b/note``),
+    lower-cased and without the extension.
+    """
+    parts = _strip_ext(rel.replace(os.sep, "/")).lower().split("/")
+    return ["/".join(parts[i:]) for i in range(len(parts))]
+
+
+def extract_links(rel, content):
+    """
+    Link targets in a note as a ``Counter`` of normalized keys (see ``note_keys``).
+
+    Wikilinks are taken as written; Markdown links to notes are resolved
+    relative to the linking note. Links inside code are ignored.
+    """
+    content = _INLINE_CODE_RE.sub("", _FENCED_RE.sub("", content))
+    targets = Counter()
+    for match in _WIKILINK_RE.finditer(content):
+        target = match.group(1).strip().replace("\\", "/").strip("/")
+        if target:
+            targets[_strip_ext(target).lower()] += 1
+    base = posixpath.dirname(rel.replace(os.sep, "/"))
+    for match in _MDLINK_RE.finditer(content):
+        target = unquote(match.group(1).strip())
+        if "://" in target:
+            continue
+        if target.startswith("/"):
+            resolved = posixpath.normpath(target.lstrip("/"))
+        else:
+            resolved = posixpath.normpath(posixpath.join(base, target))
+        if resolved.startswith(".."):
+            continue
+        targets[_strip_ext(resolved).lower()] += 1
+    return targets
+
+
+class LinkIndex(NoteIndex):
+    """
+    Persistent wikilink/backlink graph of a vault, backed by SQLite.
+
+    Each note's outgoing links are stored by normalized target key, and each
+    note registers the keys it answers to, so backlinks and unresolved links
+    are indexed lookups rather than vault scans. Kept up to date as described
+    in ``NoteIndex``.
+    """
+
+    NAME = "links"
+    DB_NAME = "links.db"
+    SCHEMA = _SCHEMA
+
+    def _index(self, rel, content, mtime_ns, size):
+        row = self._conn.execute("SELECT id FROM files WHERE path = ?", (rel,)).fetchone()
+        if row is None:
+            file_id = self._conn.execute(
+                "INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)", (rel, mtime_ns, size)).lastrowid
+            self._conn.executemany("INSERT INTO names (key, file) VALUES (?, ?)",
+                                   [(key, file_id) for key in note_keys(rel)])
+        else:
+            file_id = row[0]
+            self._conn.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?", (mtime_ns, size, file_id))
+            self._conn.execute("DELETE FROM links WHERE src = ?", (file_id,))
+        self._conn.executemany("INSERT INTO links (src, target, count) VALUES (?, ?, ?)",
+                               [(file_id, target, count) for target, count in extract_links(rel, content).items()])
+
+    def _unindex(self, rel):
+        row = self._conn.execute("SELECT id FROM files WHERE path = ?", (rel,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM links WHERE src = ?", (row[0],))
+            self._conn.execute("DELETE FROM names WHERE file = ?", (row[0],))
+            self._conn.execute("DELETE FROM files WHERE id = ?", (row[0],))
+
+    @metrics.timer("links.backlinks")
+    def backlinks(self, path):
+        """Notes linking to ``path`` as ``Backlink(path, count)``, sorted by path."""
+        rel = self._relpath(path)
+        keys = note_keys(rel)
+        sql = ("SELECT files.path, SUM(links.count) FROM links JOIN files ON files.id = links.src "
+               f"WHERE links.target IN ({', '.join('?' * len(keys))}) AND files.path != ? "
+               "GROUP BY files.path ORDER BY files.path")
+        with self._lock:
+            rows = self._conn.execute(sql, (*keys, rel)).fetchall()
+        return [Backlink(os.path.join(self.vault_path, src), count) for src, count in rows]
+
+    def outgoing(self, path):
+        """``{target key: count}`` for the links in ``path``."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT links.target, links.count FROM links JOIN files ON files.id = links.src "
+                "WHERE files.path = ?", (self._relpath(path),)).fetchall()
+        return dict(rows)
+
+    @metrics.timer("links.unresolved")
+    def unresolved(self, limit=None):
+        """
+        Link targets that match no note, most-referenced first, as
+        ``UnresolvedLink(target, sources)`` with the linking notes' paths.
+        """
+        # Probe each distinct target once (via links_target) rather than every link.
+        sql = ("WITH missing AS (SELECT target FROM (SELECT DISTINCT target FROM links) AS t "
+               "WHERE NOT EXISTS (SELECT 1 FROM names WHERE names.key = t.target)) "
+               "SELECT links.target, files.path FROM missing "
+               "JOIN links ON links.target = missing.target JOIN files ON files.id = links.src")
+        with self._lock:
+            rows = self._conn.execute(sql).fetchall()
+        grouped = {}
+        for target, src in rows:
+            grouped.setdefault(target, []).append(os.path.join(self.vault_path, src))
+        report = sorted(grouped.items(), key=lambda item: (-len(item[1]), item[0]))
+        if limit is not None:
+            report = report[:limit]
+        return [UnresolvedLink(target, sorted(sources)) for target, sources in report]
+
+    def stats(self):
+        with self._lock:
+            files = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            links = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(count), 0) FROM links").fetchone()
+        return {"files": files, "distinct_links": links[0], "links": links[1]}
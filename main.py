@@ -1,28 +1,48 @@
 import sys
 import os
 import logging
-from PyQt6.QtWidgets import QApplication
-
-# Configure Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("acropad.log", mode='w')
-    ]
-)
+import multiprocessing
+
+from startup import startup
+
+# Qt, the UI and logging are set up in main(), not on import: find/replace
+# worker processes are spawned, re-import this module, and need none of them.
+
+def setup_logging():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout),
+            logging.FileHandler("acropad.log", mode='w')
+        ]
+    )
+    sys.excepthook = exception_hook
 
 def exception_hook(exctype, value, traceback):
     logging.critical("Uncaught exception", exc_info=(exctype, value, traceback))
     sys.__excepthook__(exctype, value, traceback)
 
-sys.excepthook = exception_hook
-
-from ui import AcropadWindow
+def on_first_window():
+    startup.mark("first_window")
+    startup.report()
 
 def main():
+    if os.environ.get("ACROPAD_IMPORT_TIMES") or "--import-times" in sys.argv:
+        startup.track_imports()
+
+    with startup.phase("import PyQt6"):
+        from PyQt6.QtCore import Qt, QCoreApplication, QTimer
+        from PyQt6.QtWidgets import QApplication
+    setup_logging()
+    from metrics import configure_from_env
+    with startup.phase("import ui"):
+        from ui import AcropadWindow
+
     logging.info("Starting Acropad...")
+    metrics_file = configure_from_env(sys.argv)
+    if metrics_file:
+        logging.info(f"Writing metrics to {metrics_file}")
     
     # Optimize for Wayland/Hyprland (auto-detect)
     session_type = os.environ.get("XDG_SESSION_TYPE", "").lower()
@@ -31,8 +51,12 @@ def main():
         os.environ["QT_QPA_PLATFORM"] = "wayland"
         os.environ["QT_AUTO_SCREEN_SCALE_FACTOR"] = "1"
         logging.info("Detected Wayland session - using wayland platform plugin")
-    
-    app = QApplication(sys.argv)
+
+    # QtWebEngine is imported only once the preview is needed, which Qt
+    # allows only if contexts are shared from before the application exists.
+    QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+    with startup.phase("QApplication"):
+        app = QApplication(sys.argv)
     app.setApplicationName("Acropad")
 
     # Determine initial directory
@@ -40,13 +64,23 @@ def main():
     base_dir = os.path.join(os.getcwd(), "notes")
     
     try:
-        window = AcropadWindow(base_dir)
-        window.show()
+        with startup.phase("main window"):
+            window = AcropadWindow(base_dir)
+            window.show()
         logging.info("Window shown successfully.")
-        sys.exit(app.exec())
+        # Runs once the event loop has processed the show.
+        QTimer.singleShot(0, on_first_window)
+        code = app.exec()
+        if window.saves_abandoned:
+            # Interpreter exit would join the save thread still stuck in a write.
+            logging.shutdown()
+            os._exit(code)
+        sys.exit(code)
     except Exception as e:
         logging.critical(f"Fatal error initializing app: {e}", exc_info=True)
         sys.exit(1)
 
 if __name__ == "__main__":
+    # Frozen builds start their worker processes through this entry point.
+    multiprocessing.freeze_support()
     main()
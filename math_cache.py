@@ -0,0 +1,193 @@
+import os
+import re
+import html
+import time
+import sqlite3
+import hashlib
+import threading
+
+from cache import LRUCache
+from paths import cache_root
+
+# Typeset formulas kept on disk across sessions, and in memory in front of that.
+MATH_CACHE_BYTES = int(os.environ.get("ACROPAD_MATH_CACHE_MB", "64")) * 1024 * 1024
+MATH_MEMORY_BYTES = 8 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS formulas (
+    key TEXT PRIMARY KEY,
+    html TEXT NOT NULL,
+    used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS formulas_used ON formulas (used);
+"""
+
+# Text MathJax never looks into, and tags splitting the text it searches.
+_SKIP_TAGS = ("script", "style", "pre", "code", "textarea")
+_TAG_RE = re.compile(r'<!--.*?-->|<(/?)([a-zA-Z][a-zA-Z0-9]*)\b[^>]*>', re.DOTALL)
+# The delimiters the preview's MathJax configuration used to find: $$ and \[ display, $ and \( inline.
+_MATH_RE = re.compile(r'\$\$(.+?)\$\$|\\\[(.+?)\\\]|\\\((.+?)\\\)|(?<!\\)\$([^$]+?)(?<!\\)\$', re.DOTALL)
+# SQLite's default limit on bound parameters is 999.
+_QUERY_CHUNK = 500
+
+
+def formula_key(tex, display):
+    return hashlib.sha1(("D:" if display else "I:").encode("utf-8") + tex.encode("utf-8")).hexdigest()
+
+
+def find_math(fragment):
+    """
+    Formulas in an HTML fragment, as MathJax would find them: in text outside
+    ``<code>``, ``<pre>`` and the like, never across tags. Yields
+    ``(start, end, tex, display)`` with ``tex`` unescaped.
+    """
+    skip = 0
+    pos = 0
+    for tag in _TAG_RE.finditer(fragment + "<x>"):
+        if not skip and tag.start() > pos:
+            text = fragment[pos:tag.start()]
+            if "$" in text or "\\" in text:
+                for match in _MATH_RE.finditer(text):
+                    index = match.lastindex
+                    yield (pos + match.start(), pos + match.end(), html.unescape(match.group(index)), index <= 2)
+        pos = tag.end()
+        name = (tag.group(2) or "").lower()
+        if name in _SKIP_TAGS:
+            skip += -1 if tag.group(1) else 1
+            skip = max(skip, 0)
+
+
+class MathCache:
+    """
+    Typeset output of TeX formulas, by formula.
+
+    The preview used to run MathJax over every block it inserted, so editing
+    one formula in a note full of them re-typeset all of its neighbours, and
+    every note's math was typeset again in each session. ``rewrite`` now
+    replaces the formulas of rendered HTML with their cached SVG and wraps
+    the rest in ``<span class="acropad-math">`` for preview.js to typeset one
+    by one; what it produces comes back through ``store``.
+
+    Entries are keyed by the SHA-1 of the TeX source (and display mode), live
+    in an LRU in memory and in an SQLite table under the cache directory that
+    ``trim`` keeps under ``max_bytes`` by dropping the least recently used.
+    """
+
+    def __init__(self, db_path=None, max_bytes=MATH_CACHE_BYTES, memory_bytes=MATH_MEMORY_BYTES):
+        if db_path is None:
+            os.makedirs(cache_root(), exist_ok=True)
+            db_path = os.path.join(cache_root(), "math.db")
+        self.max_bytes = max_bytes
+        self._memory = LRUCache(memory_bytes)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._used = set()    # Keys read from disk this session; their use time is updated by trim()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+    def lookup(self, keys):
+        """Cached output for whichever of ``keys`` have some, as ``{key: html}``."""
+        found = {}
+        missing = []
+        for key in keys:
+            value = self._memory.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        from_disk = {}
+        if missing:
+            with self._lock:
+                for i in range(0, len(missing), _QUERY_CHUNK):
+                    chunk = missing[i:i + _QUERY_CHUNK]
+                    rows = self._conn.execute(
+                        f"SELECT key, html FROM formulas WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                    from_disk.update(rows)
+                self._used.update(from_disk)
+        for key, value in from_disk.items():
+            self._memory.put(key, value)
+        found.update(from_disk)
+        with self._lock:
+            self._stats["hits"] += len(found) - len(from_disk)
+            self._stats["disk_hits"] += len(from_disk)
+            self._stats["misses"] += len(keys) - len(found)
+        return found
+
+    def rewrite(self, fragment):
+        """
+        Replace the formulas of an HTML fragment with cached output. Returns
+        ``(html, missing)``: formulas not cached yet are left for preview.js
+        in ``acropad-math`` spans and their keys listed in ``missing``.
+        """
+        if "$" not in fragment and "\\" not in fragment:
+            return fragment, []
+        formulas = [(start, end, tex, display, formula_key(tex, display))
+                    for start, end, tex, display in find_math(fragment)]
+        if not formulas:
+            return fragment, []
+        cached = self.lookup(list({f[4] for f in formulas}))
+        parts = []
+        missing = []
+        pos = 0
+        for start, end, tex, display, key in formulas:
+            parts.append(fragment[pos:start])
+            if key in cached:
+                parts.append(cached[key])
+            else:
+                if key not in missing:
+                    missing.append(key)
+                parts.append(f'<span class="acropad-math" data-key="{key}" data-tex="{html.escape(tex)}" '
+                             f'data-display="{int(display)}">{fragment[start:end]}</span>')
+            pos = end
+        parts.append(fragment[pos:])
+        return "".join(parts), missing
+
+    def store(self, entries):
+        """Add ``[(key, html)]`` typeset by the preview (safe to call from a worker)."""
+        if not entries:
+            return
+        for key, value in entries:
+            self._memory.put(key, value)
+        now = int(time.time())
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO formulas (key, html, used) VALUES (?, ?, ?)",
+                                       [(key, value, now) for key, value in entries])
+            self._stats["stored"] += len(entries)
+
+    def trim(self):
+        """Record this session's uses and evict the least recently used formulas beyond ``max_bytes``."""
+        now = int(time.time())
+        with self._lock, self._conn:
+            used = list(self._used)
+            self._used.clear()
+            for i in range(0, len(used), _QUERY_CHUNK):
+                chunk = used[i:i + _QUERY_CHUNK]
+                self._conn.execute(
+                    f"UPDATE formulas SET used = ? WHERE key IN ({','.join('?' * len(chunk))})", [now] + chunk)
+            total = self._conn.execute("SELECT COALESCE(SUM(LENGTH(html)), 0) FROM formulas").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            evict = []
+            for key, size in self._conn.execute("SELECT key, LENGTH(html) FROM formulas ORDER BY used"):
+                if total <= self.max_bytes:
+                    break
+                evict.append((key,))
+                total -= size
+            self._conn.executemany("DELETE FROM formulas WHERE key = ?", evict)
+            self._stats["evicted"] += len(evict)
+
+    def close(self):
+        self.trim()
+        with self._lock:
+            self._conn.close()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        stats["memory"] = self._memory.stats()
+        return stats
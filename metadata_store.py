@@ -0,0 +1,222 @@
+import os
+import time
+import sqlite3
+import threading
+
+from metrics import metrics
+from paths import vault_cache_dir
+from vault_scan import NOTE_EXTENSIONS
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    dir TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+"""
+
+class VaultMetadataStore:
+    """
+    On-disk cache of a vault's file listing (path, size, mtime).
+
+    ``load_paths()`` returns the cached listing without touching the vault so a
+    UI can draw immediately. ``reconcile()`` then stats every directory but
+    only lists the ones whose mtime changed since the last run, which is enough
+    to catch files added, removed or renamed while the app was closed; while
+    it is open, ``apply_changes`` records what the watcher reports.
+    Paths are vault-relative.
+    """
+
+    def __init__(self, vault_path, db_path=None, extensions=NOTE_EXTENSIONS):
+        self.vault_path = os.path.abspath(vault_path)
+        self.extensions = extensions
+        if db_path is None:
+            db_path = os.path.join(vault_cache_dir(self.vault_path), "metadata.db")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def load_paths(self):
+        """Cached note paths, sorted."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT path FROM files ORDER BY path")]
+
+    def get(self, rel):
+        """``(size, mtime_ns)`` for a cached note, or ``None``."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT size, mtime_ns FROM files WHERE path = ?", (rel,)).fetchone()
+
+    def apply_changes(self, updated=(), removed=()):
+        """
+        Record notes added or modified (``updated``) and deleted (``removed``)
+        since the last reconcile, e.g. from watcher events. Directory mtimes are
+        left alone, so the next ``reconcile`` still lists the directories
+        involved, but finds nothing more to report.
+        """
+        rows = []
+        for rel in updated:
+            try:
+                st = os.stat(self._abspath(rel))
+            except OSError:
+                continue
+            rows.append((rel, os.path.dirname(rel), st.st_size, st.st_mtime_ns))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, dir, size, mtime_ns) VALUES (?, ?, ?, ?)", rows)
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(rel,) for rel in removed])
+
+    def _abspath(self, rel):
+        return os.path.join(self.vault_path, rel) if rel else self.vault_path
+
+    @metrics.timer("vault.scan")
+    def reconcile(self, on_batch=None, should_cancel=None):
+        """
+        Bring the cache in line with the vault.
+
+        ``on_batch(added, removed)`` is called with lists of relative paths for
+        each directory that changed. Returns total ``(added, removed)`` counts,
+        or ``None`` if ``should_cancel`` returned true.
+        """
+        with self._lock:
+            known_dirs = {path: mtime for path, mtime in
+                          self._conn.execute("SELECT path, mtime_ns FROM dirs")}
+        total_added = total_removed = 0
+        stack = [""]
+        while stack:
+            if should_cancel is not None and should_cancel():
+                return None
+            rel_dir = stack.pop()
+            try:
+                mtime_ns = os.stat(self._abspath(rel_dir)).st_mtime_ns
+            except OSError:
+                continue
+
+            if known_dirs.get(rel_dir) == mtime_ns:
+                with self._lock:
+                    stack.extend(row[0] for row in self._conn.execute(
+                        "SELECT path FROM dirs WHERE parent = ?", (rel_dir,)))
+                continue
+
+            added, removed, subdirs = self._rescan_dir(rel_dir, mtime_ns)
+            stack.extend(subdirs)
+            total_added += len(added)
+            total_removed += len(removed)
+            if on_batch is not None and (added or removed):
+                on_batch(added, removed)
+        return total_added, total_removed
+
+    def _rescan_dir(self, rel_dir, mtime_ns):
+        notes = {}
+        subdirs = []
+        try:
+            with os.scandir(self._abspath(rel_dir)) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not entry.name.startswith("."):
+                                subdirs.append(os.path.join(rel_dir, entry.name))
+                        elif entry.name.lower().endswith(self.extensions):
+                            notes[os.path.join(rel_dir, entry.name)] = entry
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+
+        with self._lock:
+            cached = {row[0]: (row[1], row[2]) for row in self._conn.execute(
+                "SELECT path, size, mtime_ns FROM files WHERE dir = ?", (rel_dir,))}
+            cached_dirs = [row[0] for row in self._conn.execute(
+                "SELECT path FROM dirs WHERE parent = ?", (rel_dir,))]
+
+        rows = []
+        added = []
+        for rel, entry in notes.items():
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            if cached.get(rel) == (st.st_size, st.st_mtime_ns):
+                continue
+            if rel not in cached:
+                added.append(rel)
+            rows.append((rel, rel_dir, st.st_size, st.st_mtime_ns))
+        removed = [rel for rel in cached if rel not in notes]
+        gone_dirs = [d for d in cached_dirs if d not in subdirs]
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, dir, size, mtime_ns) VALUES (?, ?, ?, ?)", rows)
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(rel,) for rel in removed])
+            for gone in gone_dirs:
+                removed.extend(self._drop_subtree(gone))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)",
+                (rel_dir, os.path.dirname(rel_dir) if rel_dir else None, mtime_ns))
+            # Subdirectories seen for the first time are listed too, with an mtime
+            # that never matches, so a reconcile cancelled before reaching them
+            # doesn't leave them out of every later one.
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, -1)",
+                [(subdir, rel_dir) for subdir in subdirs])
+        added.sort()
+        return added, removed, subdirs
+
+    def _drop_subtree(self, rel_dir):
+        """Forget a directory that disappeared; returns the notes that went with it."""
+        prefix = rel_dir + os.sep
+        where = "= ? OR substr({0}, 1, ?) = ?"
+        args = (rel_dir, len(prefix), prefix)
+        removed = [row[0] for row in self._conn.execute(
+            "SELECT path FROM files WHERE dir " + where.format("dir"), args)]
+        self._conn.execute("DELETE FROM files WHERE dir " + where.format("dir"), args)
+        self._conn.execute("DELETE FROM dirs WHERE path " + where.format("path"), args)
+        return removed
+
+
+class ScanBatches:
+    """
+    ``on_batch`` callback for ``reconcile`` that hands changes to a UI in
+    larger batches. Directories are reconciled one at a time, and re-sorting
+    the file list per directory would stall a first-time scan.
+
+    ``emit(added, removed)`` gets fresh lists once ``max_items`` paths are
+    pending or ``interval`` seconds have passed since the last emit, and
+    whatever is left on ``flush()``.
+    """
+
+    def __init__(self, emit, max_items=1000, interval=0.2, clock=time.monotonic):
+        self.emit = emit
+        self.max_items = max_items
+        self.interval = interval
+        self.clock = clock
+        self.added = []
+        self.removed = []
+        self.last_emit = clock()
+
+    def __call__(self, added, removed):
+        self.added.extend(added)
+        self.removed.extend(removed)
+        if len(self.added) + len(self.removed) >= self.max_items or self.clock() - self.last_emit > self.interval:
+            self.flush()
+
+    def flush(self):
+        self.last_emit = self.clock()
+        if self.added or self.removed:
+            added, removed = self.added, self.removed
+            self.added, self.removed = [], []
+            self.emit(added, removed)
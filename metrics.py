@@ -0,0 +1,293 @@
+import os
+import io
+import sys
+import json
+import math
+import time
+import pstats
+import logging
+import cProfile
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+from paths import cache_root
+
+# Histogram buckets grow by 2**(1/4) (~19%) from 10 µs, which keeps percentile
+# estimates within one bucket of the truth with under a hundred buckets.
+_BUCKET_BASE = 1e-5
+_BUCKET_STEPS_PER_DOUBLING = 4
+_BUCKET_COUNT = 96
+
+
+def _bucket_upper(index):
+    return _BUCKET_BASE * 2 ** (index / _BUCKET_STEPS_PER_DOUBLING)
+
+
+class Histogram:
+    """Log-bucketed histogram of durations in seconds. ``observe`` is O(1) and thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = [0] * (_BUCKET_COUNT + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, value):
+        if value <= _BUCKET_BASE:
+            index = 0
+        else:
+            index = min(_BUCKET_COUNT, math.ceil(math.log2(value / _BUCKET_BASE) * _BUCKET_STEPS_PER_DOUBLING))
+        with self._lock:
+            self._buckets[index] += 1
+            self.count += 1
+            self.total += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of observations."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = fraction * self.count
+            seen = 0
+            for index, n in enumerate(self._buckets):
+                seen += n
+                if seen >= rank:
+                    return min(_bucket_upper(index), self.max)
+            return self.max
+
+    def snapshot(self):
+        """Summary in milliseconds."""
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000,
+            "min_ms": self.min * 1000,
+            "p50_ms": self.percentile(0.5) * 1000,
+            "p90_ms": self.percentile(0.9) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class Metrics:
+    """
+    Process-wide timers, histograms and gauges, cheap enough to leave on.
+
+    ``timed(name)`` records how long a block took. When profiling is enabled
+    for ``name`` (see ``enable_profiling``) the block also runs under cProfile
+    and, if tracemalloc is tracing, a memory snapshot diff is taken around it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._gauge_fns = {}
+        self._started = time.time()
+        self._dumper = None
+        self._dumper_stop = threading.Event()
+        self._dump_path = None
+        self.profile_names = None  # None: off; empty set: every operation
+        self.profile_dir = os.path.join(cache_root(), "profiles")
+        self.profile_limit = 20
+        self._profile_counts = {}
+        self._profile_lock = threading.Lock()
+
+    def histogram(self, name):
+        hist = self._histograms.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self._histograms.setdefault(name, Histogram())
+        return hist
+
+    def observe(self, name, seconds):
+        self.histogram(name).observe(seconds)
+
+    def gauge(self, name, fn):
+        """Report ``fn()`` as gauge ``name`` whenever a snapshot is taken."""
+        with self._lock:
+            self._gauge_fns[name] = fn
+
+    @contextmanager
+    def timed(self, name):
+        if self.profile_names is not None and self._should_profile(name):
+            with self._profiled(name):
+                start = time.perf_counter()
+                try:
+                    yield
+                finally:
+                    self.observe(name, time.perf_counter() - start)
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timer(self, name):
+        """Decorator form of ``timed``."""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timed(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def snapshot(self):
+        with self._lock:
+            histograms = dict(self._histograms)
+            gauge_fns = dict(self._gauge_fns)
+        gauges = {}
+        for name, fn in gauge_fns.items():
+            try:
+                gauges[name] = {"value": fn()}
+            except Exception:
+                logging.debug(f"Gauge {name} failed", exc_info=True)
+        return {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "uptime_s": time.time() - self._started,
+            "histograms": {name: hist.snapshot() for name, hist in sorted(histograms.items())},
+            "gauges": gauges,
+        }
+
+    def dump(self, path):
+        """Write a snapshot as JSON, replacing ``path`` atomically."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def start_dumper(self, path, interval=60.0):
+        """Dump to ``path`` every ``interval`` seconds on a daemon thread."""
+        self.stop_dumper()
+        self._dumper_stop = threading.Event()
+        stop = self._dumper_stop
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.dump(path)
+                except OSError as e:
+                    logging.warning(f"Could not write metrics to {path}: {e}")
+
+        self._dumper = threading.Thread(target=run, name="metrics", daemon=True)
+        self._dumper.start()
+        self._dump_path = path
+
+    def stop_dumper(self, final_dump=False):
+        """Stop periodic dumping, optionally writing one last snapshot (e.g. at exit)."""
+        if self._dumper is None:
+            return
+        self._dumper_stop.set()
+        self._dumper = None
+        if final_dump:
+            try:
+                self.dump(self._dump_path)
+            except OSError as e:
+                logging.warning(f"Could not write metrics to {self._dump_path}: {e}")
+
+    def enable_profiling(self, names=(), directory=None, trace_memory=True):
+        """
+        Profile the operations whose names start with one of ``names`` (all of
+        them if empty). Each run writes ``<name>-<n>.prof`` (cProfile stats) and,
+        with ``trace_memory``, ``<name>-<n>.mem.txt`` (top allocation growth).
+        """
+        self.profile_names = set(names)
+        if directory is not None:
+            self.profile_dir = directory
+        os.makedirs(self.profile_dir, exist_ok=True)
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        logging.info(f"Profiling {', '.join(sorted(names)) or 'all operations'} into {self.profile_dir}")
+
+    def _should_profile(self, name):
+        if self.profile_names and not any(name.startswith(prefix) for prefix in self.profile_names):
+            return False
+        return self._profile_counts.get(name, 0) < self.profile_limit
+
+    @contextmanager
+    def _profiled(self, name):
+        # Only one profiler can be active per process; overlapping operations
+        # on other threads are just timed.
+        if not self._profile_lock.acquire(blocking=False):
+            yield
+            return
+        try:
+            with self._lock:
+                run = self._profile_counts.get(name, 0) + 1
+                self._profile_counts[name] = run
+            before = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                self._write_profile(name, run, profiler, before)
+        finally:
+            self._profile_lock.release()
+
+    def _write_profile(self, name, run, profiler, before):
+        base = os.path.join(self.profile_dir, f"{name}-{run}")
+        try:
+            profiler.dump_stats(base + ".prof")
+            if before is not None:
+                diff = tracemalloc.take_snapshot().compare_to(before, "lineno")
+                with open(base + ".mem.txt", 'w', encoding='utf-8') as f:
+                    f.writelines(f"{stat}\n" for stat in diff[:25])
+        except OSError as e:
+            logging.warning(f"Could not write profile {base}: {e}")
+            return
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(8)
+        logging.info(f"Profile {name} #{run} written to {base}.prof\n{out.getvalue()}")
+
+
+# Shared by every module; the frontends configure dumping and profiling at startup.
+metrics = Metrics()
+
+
+def configure_from_env(argv=None):
+    """
+    Apply the metrics settings from the environment and command line. Both
+    are off unless asked for:
+
+    * The periodic dump, with ``ACROPAD_METRICS_FILE`` or ``--metrics=PATH``
+      (``--metrics`` alone writes ``metrics.json`` in the cache directory), every
+      ``ACROPAD_METRICS_INTERVAL`` seconds (default 60).
+    * ``ACROPAD_PROFILE=all`` or ``ACROPAD_PROFILE=render,save`` (name prefixes),
+      or ``--profile`` / ``--profile=render,save`` on the command line.
+
+    Returns the metrics file path, or ``None`` if dumping is disabled.
+    """
+    argv = sys.argv if argv is None else argv
+    spec = os.environ.get("ACROPAD_PROFILE", "")
+    path = os.environ.get("ACROPAD_METRICS_FILE")
+    for arg in argv[1:]:
+        if arg == "--profile":
+            spec = spec or "all"
+        elif arg.startswith("--profile="):
+            spec = arg.split("=", 1)[1] or "all"
+        elif arg == "--metrics":
+            path = path or os.path.join(cache_root(), "metrics.json")
+        elif arg.startswith("--metrics="):
+            path = arg.split("=", 1)[1] or os.path.join(cache_root(), "metrics.json")
+    if spec and spec.lower() not in ("0", "off", "false"):
+        names = () if spec.lower() in ("1", "all", "true") else [n.strip() for n in spec.split(",") if n.strip()]
+        metrics.enable_profiling(names)
+
+    interval = float(os.environ.get("ACROPAD_METRICS_INTERVAL", "60"))
+    if not path or interval <= 0:
+        return None
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    metrics.start_dumper(path, interval)
+    return path
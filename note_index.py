@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import logging
+import threading
+
+from metrics import metrics
+from paths import vault_cache_dir
+from storage import read_text
+from vault_scan import iter_vault_files
+
+# Rows are committed in batches so queries can interleave with a long rebuild.
+_BATCH = 200
+
+
+def refresh_index(root, known, apply, should_cancel=None, batch_size=_BATCH):
+    """
+    Walk ``root`` and bring a per-note index in line with it.
+
+    ``known`` maps the vault-relative paths the index holds to their
+    ``(mtime_ns, size)``. Notes that are new or changed are read as the
+    editor reads them (``storage.read_text``) and handed to
+    ``apply(updates, removed)`` in batches of ``(rel, content, mtime_ns, size)``;
+    the last call lists the notes that are gone in ``removed``.
+
+    Returns ``(updated, removed)`` counts, or ``None`` if ``should_cancel``
+    returned true.
+    """
+    seen = set()
+    pending = []
+    updated = 0
+    for entry in iter_vault_files(root):
+        if should_cancel is not None and should_cancel():
+            return None
+        rel = os.path.relpath(entry.path, root)
+        seen.add(rel)
+        try:
+            st = entry.stat()
+            if known.get(rel) == (st.st_mtime_ns, st.st_size):
+                continue
+            content = read_text(entry.path).text
+        except OSError:
+            continue
+        pending.append((rel, content, st.st_mtime_ns, st.st_size))
+        updated += 1
+        if len(pending) >= batch_size:
+            apply(pending, [])
+            pending = []
+    removed = [rel for rel in known if rel not in seen]
+    apply(pending, removed)
+    return updated, len(removed)
+
+
+class NoteIndex:
+    """
+    Base for the per-vault SQLite indexes (``SearchIndex``, ``LinkIndex``).
+
+    Keeps the connection, the ``files`` table of indexed notes with the
+    ``(mtime_ns, size)`` they were indexed at, and the ways of bringing it
+    up to date: ``refresh()`` re-reads only notes whose size or mtime
+    changed, and ``update_file()`` / ``remove_file()`` follow single notes as
+    they are saved or deleted. All methods are safe to call from worker
+    threads.
+
+    Subclasses set ``NAME`` (metrics and log prefix), ``DB_NAME`` and
+    ``SCHEMA``, and implement ``_index(rel, content, mtime_ns, size)`` and
+    ``_unindex(rel)``, which run with the lock held inside a transaction.
+    """
+
+    NAME = None
+    DB_NAME = None
+    SCHEMA = None
+
+    def __init__(self, vault_path, db_path=None):
+        self.vault_path = os.path.abspath(vault_path)
+        if db_path is None:
+            db_path = os.path.join(vault_cache_dir(self.vault_path), self.DB_NAME)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _relpath(self, path):
+        return os.path.relpath(os.path.abspath(path), self.vault_path)
+
+    def _index(self, rel, content, mtime_ns, size):
+        raise NotImplementedError
+
+    def _unindex(self, rel):
+        raise NotImplementedError
+
+    def update_file(self, path, content=None):
+        """Index (or re-index) one note. ``content`` saves a re-read when the caller has it."""
+        try:
+            st = os.stat(path)
+            if content is None:
+                content = read_text(path).text
+        except OSError:
+            self.remove_file(path)
+            return
+        with self._lock, self._conn:
+            self._index(self._relpath(path), content, st.st_mtime_ns, st.st_size)
+
+    def remove_file(self, path):
+        with self._lock, self._conn:
+            self._unindex(self._relpath(path))
+
+    def refresh(self, should_cancel=None):
+        """
+        Bring the index in line with the vault on disk.
+
+        Returns ``(updated, removed)`` counts, or ``None`` if cancelled.
+        """
+        with metrics.timed(f"{self.NAME}.refresh"):
+            with self._lock:
+                known = {p: (m, s) for p, m, s in
+                         self._conn.execute("SELECT path, mtime_ns, size FROM files")}
+            counts = refresh_index(self.vault_path, known, self._apply, should_cancel)
+        if counts is not None:
+            logging.info(f"{type(self).__name__} refreshed: {counts[0]} updated, {counts[1]} removed")
+        return counts
+
+    def _apply(self, updates, removed):
+        with self._lock, self._conn:
+            for rel, content, mtime_ns, size in updates:
+                self._index(rel, content, mtime_ns, size)
+            for rel in removed:
+                self._unindex(rel)
@@ -0,0 +1,23 @@
+import os
+import sys
+import hashlib
+
+
+def cache_root():
+    """Per-user cache directory for Acropad (indexes, thumbnails, journals)."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "acropad")
+
+
+def vault_cache_dir(vault_path):
+    """Cache directory private to one vault, created on demand."""
+    vault_path = os.path.abspath(vault_path)
+    digest = hashlib.sha1(vault_path.encode("utf-8")).hexdigest()[:16]
+    path = os.path.join(cache_root(), "vaults", digest)
+    os.makedirs(path, exist_ok=True)
+    return path
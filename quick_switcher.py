@@ -0,0 +1,228 @@
+import os
+import re
+import heapq
+import threading
+from array import array
+from collections import Counter
+from operator import itemgetter
+
+from metrics import metrics
+
+_WORD_RE = re.compile(r'[^\W_]+')
+_EMPTY = array('I')
+
+# Broad queries stop collecting candidates after this many matches; postings
+# are ordered by name length, so these are the tightest matches.
+_MAX_CANDIDATES = 300
+# Posting lists up to this size are intersected as sets; longer ones are scanned in order.
+_SET_LIMIT = 2000
+# The typo-tolerant fallback counts trigram hits over at most this many
+# postings entries and ranks at most _FUZZY_CANDIDATES of the paths it finds.
+_FUZZY_BUDGET = 12000
+_FUZZY_CANDIDATES = 100
+_RECENT = 50
+
+
+def _index_grams(text):
+    """Trigrams of each word padded with a space, so word starts and ends are grams too."""
+    grams = set()
+    for word in _WORD_RE.findall(text):
+        word = f" {word} "
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+def _query_grams(word):
+    """Grams a path must contain to have ``word`` as a substring (or word prefix, for 2 letters)."""
+    if len(word) >= 3:
+        return {word[i:i + 3] for i in range(len(word) - 2)}
+    if len(word) == 2:
+        return {f" {word}"}
+    return set()
+
+
+def _split(path):
+    lower = os.path.splitext(path.lower())[0].replace(os.sep, "/")
+    slash = lower.rfind("/")
+    return lower, lower[slash + 1:]
+
+
+class QuickSwitcherIndex:
+    """
+    Fuzzy file-name index for the quick switcher (Ctrl+P).
+
+    Every vault-relative path is broken into words and indexed by word
+    trigrams. A query matches paths containing each of its words; if none
+    do, paths sharing most of the query's trigrams are used instead, which
+    tolerates typos. Candidates are ranked with matches in the file name
+    above matches in the folders, word starts above mid-word hits, shorter
+    names first, and recently opened files boosted.
+
+    ``build()`` is meant for a worker thread; ``add()``, ``remove()``,
+    ``touch()`` and ``search()`` are cheap and thread-safe.
+    """
+
+    def __init__(self, paths=()):
+        self._lock = threading.Lock()
+        self._recent = {}
+        self._clock = 0
+        self.build(paths)
+
+    def build(self, paths):
+        """Replace the contents with ``paths`` (vault-relative)."""
+        # Ids follow name length so every posting list is ordered shortest name first.
+        paths = sorted(set(paths), key=lambda p: (len(os.path.basename(p)), p))
+        postings = {}
+        lowers = []
+        for i, path in enumerate(paths):
+            lower, _ = _split(path)
+            lowers.append(lower)
+            for gram in _index_grams(lower):
+                posting = postings.get(gram)
+                if posting is None:
+                    postings[gram] = posting = array('I')
+                posting.append(i)
+        with self._lock:
+            self._paths = paths
+            self._lowers = lowers
+            self._ids = {path: i for i, path in enumerate(paths)}
+            self._postings = postings
+            self._alive = len(paths)
+            self._added = []  # Ids appended since build(); out of name-length order
+
+    def __len__(self):
+        return self._alive
+
+    def add(self, path):
+        with self._lock:
+            if path in self._ids:
+                return
+            i = len(self._paths)
+            lower, _ = _split(path)
+            self._paths.append(path)
+            self._lowers.append(lower)
+            self._ids[path] = i
+            for gram in _index_grams(lower):
+                posting = self._postings.get(gram)
+                if posting is None:
+                    self._postings[gram] = posting = array('I')
+                posting.append(i)
+            self._added.append(i)
+            self._alive += 1
+
+    def remove(self, path):
+        with self._lock:
+            i = self._ids.pop(path, None)
+            if i is None:
+                return
+            # Postings keep the id; a None path marks it dead.
+            self._paths[i] = None
+            self._recent.pop(path, None)
+            self._alive -= 1
+            rebuild = len(self._paths) > 1000 and self._alive < len(self._paths) // 2
+        if rebuild:
+            self.build([p for p in self._paths if p is not None])
+
+    def touch(self, path):
+        """Record that ``path`` was opened; recent files rank higher."""
+        with self._lock:
+            if path not in self._ids:
+                return
+            self._clock += 1
+            self._recent[path] = self._clock
+            if len(self._recent) > _RECENT:
+                oldest = min(self._recent, key=self._recent.get)
+                del self._recent[oldest]
+
+    def recent(self, limit=20):
+        with self._lock:
+            return sorted(self._recent, key=self._recent.get, reverse=True)[:limit]
+
+    @metrics.timer("switcher.query")
+    def search(self, query, limit=20):
+        """Best matches for ``query``, best first. An empty query lists recent files."""
+        words = _WORD_RE.findall(query.lower())
+        if not words:
+            return self.recent(limit)
+        with self._lock:
+            candidates = self._exact(words) or set(self._fuzzy(words))
+            recent = (self._ids.get(path) for path in self._recent)
+            candidates.update(i for i in recent if i is not None and self._matches(i, words))
+            terms = [(word, _index_grams(word)) for word in words]
+            ranked = heapq.nlargest(limit, candidates, key=lambda i: self._score(i, terms))
+            return [self._paths[i] for i in ranked]
+
+    def _matches(self, i, words):
+        lower = self._lowers[i]
+        return self._paths[i] is not None and all(word in lower for word in words)
+
+    def _exact(self, words):
+        grams = set()
+        for word in words:
+            grams |= _query_grams(word)
+        lists = sorted((self._postings.get(gram, _EMPTY) for gram in grams), key=len)
+        if not lists:
+            # Only one-letter words: scan names from the shortest.
+            lists = [range(len(self._paths))]
+
+        found = set()
+        if len(lists[0]) <= _SET_LIMIT:
+            candidates = set(lists[0])
+            for posting in lists[1:]:
+                if len(candidates) <= _MAX_CANDIDATES:
+                    break
+                candidates.intersection_update(posting)
+            found.update(i for i in candidates if self._matches(i, words))
+            return found
+
+        for i in lists[0]:
+            if self._matches(i, words):
+                found.add(i)
+                if len(found) >= _MAX_CANDIDATES:
+                    break
+        found.update(i for i in self._added if self._matches(i, words))
+        return found
+
+    def _fuzzy(self, words):
+        grams = set()
+        for word in words:
+            grams |= _index_grams(word)
+        lists = sorted((self._postings.get(gram, _EMPTY) for gram in grams), key=len)
+        counts = Counter()
+        used = scanned = 0
+        for posting in lists:
+            if scanned and scanned + len(posting) > _FUZZY_BUDGET:
+                break
+            counts.update(posting)
+            scanned += len(posting)
+            used += 1
+        need = max(1, (used + 1) // 2)
+        best = heapq.nlargest(_FUZZY_CANDIDATES, ((i, n) for i, n in counts.items() if n >= need),
+                              key=itemgetter(1))
+        return [i for i, _ in best if self._paths[i] is not None]
+
+    def _score(self, i, terms):
+        lower = self._lowers[i]
+        slash = lower.rfind("/")
+        name = lower[slash + 1:]
+        folders = lower[:slash + 1]
+        score = 0.0
+        name_grams = folder_grams = None
+        for word, word_grams in terms:
+            pos = name.find(word)
+            if pos >= 0:
+                score += 4.0 if pos == 0 or not name[pos - 1].isalnum() else 3.0
+            elif word in folders:
+                score += 1.0
+            elif word_grams:
+                # Misspelt: credit the share of the word's trigrams found.
+                if name_grams is None:
+                    name_grams = _index_grams(name)
+                    folder_grams = _index_grams(folders)
+                score += max(2.0 * len(word_grams & name_grams),
+                             len(word_grams & folder_grams)) / len(word_grams)
+        score -= 0.02 * len(name)
+        last_used = self._recent.get(self._paths[i])
+        if last_used is not None:
+            score += 2.0 / (1 + self._clock - last_used)
+        return score
@@ -0,0 +1,229 @@
+import os
+import re
+import sys
+import pathlib
+import hashlib
+
+from cache import LRUCache
+from metrics import metrics
+
+# Preview shell assets ship with the app (assets/preview); fonts and MathJax live
+# in assets/preview/vendor, populated by fetch_preview_assets.py.
+ASSETS_DIR = os.path.join(getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__))), "assets", "preview")
+MATHJAX_LOCAL = "vendor/mathjax/tex-mml-svg.js"
+MATHJAX_CDN = "https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-svg.js"
+
+MATHJAX_CONFIG = """MathJax={tex:{inlineMath:[['$','$'],['\\(','\\)']],displayMath:[['$$','$$'],['\\[','\\]']]},svg:{fontCache:'global'}};"""
+# The live preview typesets formulas itself, one at a time, and caches the
+# output (see math_cache), so each SVG must carry its own glyphs.
+PREVIEW_MATHJAX_CONFIG = """MathJax={svg:{fontCache:'local'},startup:{typeset:false,pageReady:function(){return MathJax.startup.defaultPageReady().then(function(){acropad.typeset([document.getElementById('content')]);});}}};"""
+
+HTML_TEMPLATE = """<!DOCTYPE html><html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"><link rel="stylesheet" href="%ASSETS%/preview.css"><script>""" + MATHJAX_CONFIG + """</script><script id="MathJax-script" async src="%MATHJAX%"></script>%HEAD%</head><body><div id="content">%CONTENT%</div></body></html>"""
+
+
+def assets_url():
+    return pathlib.Path(ASSETS_DIR).as_uri()
+
+
+def page_html(content, assets=None, head="", mathjax_config=MATHJAX_CONFIG):
+    """
+    Fill HTML_TEMPLATE. ``assets`` is the URL (absolute or relative to the page)
+    of a directory laid out like assets/preview; it defaults to the bundled copy.
+    MathJax falls back to the CDN only when the bundled copy is missing.
+    """
+    if assets is None:
+        assets = assets_url()
+    if os.path.exists(os.path.join(ASSETS_DIR, MATHJAX_LOCAL)):
+        mathjax = f"{assets}/{MATHJAX_LOCAL}"
+    else:
+        mathjax = MATHJAX_CDN
+    return (HTML_TEMPLATE.replace(MATHJAX_CONFIG, mathjax_config, 1)
+            .replace("%ASSETS%", assets).replace("%MATHJAX%", mathjax)
+            .replace("%HEAD%", head).replace("%CONTENT%", content))
+
+
+def preview_shell():
+    """The live preview page: empty content plus preview.js; blocks are injected afterwards."""
+    assets = assets_url()
+    return page_html("", assets, head=f'<script src="{assets}/preview.js"></script>',
+                     mathjax_config=PREVIEW_MATHJAX_CONFIG)
+
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'tables']
+
+_FENCE_RE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+_MATH_FENCE_RE = re.compile(r'^ {0,3}\$\$\s*$')
+_LINK_REF_RE = re.compile(r'^ {0,3}\[[^\]]+\]:\s*\S')
+
+
+# Rendered HTML keyed by the SHA-1 of the Markdown source. Whole documents and
+# individual blocks share the cache: identical source renders identically.
+# The budget is set with ACROPAD_RENDER_CACHE_MB.
+render_cache = LRUCache(int(os.environ.get("ACROPAD_RENDER_CACHE_MB", "32")) * 1024 * 1024)
+
+
+def _render_source(source, key=None):
+    if key is None:
+        key = block_key(source)
+    html = render_cache.get(key)
+    if html is None:
+        # Imported on first use: markdown and its extensions are a sizeable
+        # share of startup, and the window can be up before anything renders.
+        import markdown
+        html = markdown.markdown(source, extensions=MARKDOWN_EXTENSIONS)
+        render_cache.put(key, html)
+    return html
+
+
+def warm_up():
+    """Import markdown and its extensions ahead of the first real render (call off the UI thread)."""
+    import markdown
+    markdown.markdown("# warm-up\n\n| a |\n|---|\n| b |\n\n```\ncode\n```\n", extensions=MARKDOWN_EXTENSIONS)
+
+
+@metrics.timer("render.markdown")
+def render_markdown(text, assets=None, head=""):
+    """A full HTML page for ``text``; ``assets`` and ``head`` are as for ``page_html``."""
+    html_content = _render_source(text)
+    return page_html(html_content, assets, head)
+
+
+def split_blocks(text):
+    """
+    Split a Markdown document into top-level blocks.
+
+    Blocks are separated by blank lines, except inside fenced code or
+    ``$$`` math, and when the next paragraph is indented (a continuation of
+    a list item or an indented code block).
+    """
+    blocks = []
+    current = []
+    fence = None
+    pending_blank = False
+
+    for line in text.split('\n'):
+        if fence is None and not line.strip():
+            if current:
+                pending_blank = True
+            continue
+
+        if pending_blank:
+            if line[:1] in (' ', '\t'):
+                current.append('')
+            else:
+                blocks.append('\n'.join(current))
+                current = []
+            pending_blank = False
+
+        current.append(line)
+
+        if fence is None:
+            match = _FENCE_RE.match(line)
+            if match:
+                fence = match.group(1)
+            elif _MATH_FENCE_RE.match(line):
+                fence = '$$'
+        elif fence == '$$':
+            if _MATH_FENCE_RE.match(line):
+                fence = None
+        elif line.strip().startswith(fence[0] * len(fence)) and not line.strip().strip(fence[0]):
+            fence = None
+
+    if current:
+        blocks.append('\n'.join(current))
+    return blocks
+
+
+def block_key(block):
+    return hashlib.sha1(block.encode('utf-8')).hexdigest()
+
+
+def link_references(blocks):
+    """Collect reference-style link definitions so every block can resolve them."""
+    refs = [line for block in blocks for line in block.split('\n') if _LINK_REF_RE.match(line)]
+    return '\n'.join(refs)
+
+
+def block_source(block, references=''):
+    return block + '\n\n' + references if references else block
+
+
+def render_block(block, references=''):
+    return _render_source(block_source(block, references))
+
+
+@metrics.timer("render.blocks")
+def render_blocks(text, known=(), should_cancel=None):
+    """
+    Split ``text`` into blocks and render the ones whose key is not in ``known``.
+
+    Returns ``(keys, rendered)`` where ``keys`` lists the block keys in document
+    order and ``rendered`` maps each newly rendered key to its HTML. If
+    ``should_cancel`` returns true between blocks, rendering stops and ``None``
+    is returned.
+    """
+    blocks = split_blocks(text)
+    references = link_references(blocks)
+    keys = []
+    rendered = {}
+    for block in blocks:
+        source = block_source(block, references)
+        key = block_key(source)
+        keys.append(key)
+        if key not in known and key not in rendered:
+            if should_cancel is not None and should_cancel():
+                return None
+            rendered[key] = _render_source(source, key)
+    return keys, rendered
+
+
+class PreviewDocument:
+    """
+    Tracks the blocks currently shown in the live preview page and turns a new
+    block list into the smallest contiguous splice that brings the page up to date.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.html = {}
+
+    def reset(self):
+        self.keys = []
+        self.html = {}
+
+    def snapshot(self):
+        """The shown blocks as ``(keys, html)``, for ``restore`` after showing another note."""
+        return list(self.keys), dict(self.html)
+
+    def restore(self, snapshot):
+        keys, html = snapshot
+        self.keys = list(keys)
+        self.html = dict(html)
+
+    def apply(self, keys, rendered):
+        """
+        Adopt a new block list. Returns ``(start, remove_count, html_list)``,
+        or ``None`` when nothing changed.
+        """
+        self.html.update(rendered)
+        old = self.keys
+
+        prefix = 0
+        limit = min(len(old), len(keys))
+        while prefix < limit and old[prefix] == keys[prefix]:
+            prefix += 1
+
+        suffix = 0
+        limit -= prefix
+        while suffix < limit and old[-1 - suffix] == keys[-1 - suffix]:
+            suffix += 1
+
+        self.keys = list(keys)
+        live = set(self.keys)
+        for key in [k for k in self.html if k not in live]:
+            del self.html[key]
+
+        if prefix == len(old) == len(keys):
+            return None
+        inserted = [self.html[key] for key in keys[prefix:len(keys) - suffix]]
+        return prefix, len(old) - prefix - suffix, inserted
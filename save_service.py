@@ -0,0 +1,186 @@
+import os
+import sys
+import stat
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import metrics
+
+
+def encode_text(content, encoding='utf-8'):
+    """Encode ``content`` the way a text-mode ``open(path, 'w')`` would (platform newlines)."""
+    if os.linesep != '\n':
+        content = content.replace('\n', os.linesep)
+    return content.encode(encoding)
+
+
+def atomic_write(path, data):
+    """
+    Replace ``path`` with ``data`` so readers only ever see the old or the new file.
+
+    The bytes go to a temp file in the same directory, are fsync'ed, and are then
+    renamed over the target. The target's permission bits are preserved.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    if sys.platform != "win32":
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+
+class SaveService:
+    """
+    Serialized, coalescing, atomic file saves shared by both frontends.
+
+    Each path has at most one write in flight. Content submitted while a write
+    is running replaces any content still waiting, so a burst of autosaves
+    becomes at most one extra write. A write is skipped when the file on disk
+    already holds identical bytes.
+
+    ``on_done(path, content)`` / ``on_error(path, (exctype, value, traceback))``
+    run on the save thread; only the callbacks of the newest submission for a
+    path are kept. ``encoding`` overrides the service's default for one save,
+    so a file is written back in the encoding it was read in.
+    """
+
+    def __init__(self, max_workers=2, encoding='utf-8'):
+        self.encoding = encoding
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="save")
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = {}
+        self._active = set()
+        self._disk = {}  # path -> (size, mtime_ns, sha1 digest) of what we last saw on disk
+        self._stats = {
+            "submitted": 0, "writes": 0, "skipped": 0, "coalesced": 0, "errors": 0,
+            "bytes_submitted": 0, "bytes_written": 0,
+            "latency_total": 0.0, "latency_max": 0.0,
+        }
+
+    def submit(self, path, content, on_done=None, on_error=None, encoding=None):
+        job = (content, encoding or self.encoding, on_done, on_error, time.perf_counter())
+        with self._lock:
+            self._stats["submitted"] += 1
+            if path in self._active:
+                if path in self._pending:
+                    self._stats["coalesced"] += 1
+                self._pending[path] = job
+                return
+            self._active.add(path)
+        self._executor.submit(self._drain, path, job)
+
+    def remember(self, path, content, encoding=None):
+        """Record that ``path`` currently holds ``content`` (e.g. right after loading it)."""
+        data = encode_text(content, encoding or self.encoding)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        with self._lock:
+            self._disk[path] = (st.st_size, st.st_mtime_ns, hashlib.sha1(data).digest())
+
+    def _unchanged_on_disk(self, path, data, digest):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if st.st_size != len(data):
+            return False
+        with self._lock:
+            known = self._disk.get(path)
+        if known is not None and known[:2] == (st.st_size, st.st_mtime_ns):
+            return known[2] == digest
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).digest() == digest
+
+    def _drain(self, path, job):
+        while job is not None:
+            content, encoding, on_done, on_error, submitted_at = job
+            try:
+                data = encode_text(content, encoding)
+                digest = hashlib.sha1(data).digest()
+                if self._unchanged_on_disk(path, data, digest):
+                    written = 0
+                else:
+                    with metrics.timed("save.write"):
+                        atomic_write(path, data)
+                    written = len(data)
+                st = os.stat(path)
+                latency = time.perf_counter() - submitted_at
+                with self._lock:
+                    self._disk[path] = (st.st_size, st.st_mtime_ns, digest)
+                    s = self._stats
+                    s["writes" if written else "skipped"] += 1
+                    s["bytes_submitted"] += len(data)
+                    s["bytes_written"] += written
+                    s["latency_total"] += latency
+                    s["latency_max"] = max(s["latency_max"], latency)
+                metrics.observe("save.latency", latency)
+                if on_done is not None:
+                    on_done(path, content)
+            except Exception:
+                logging.error(f"Save failed for {path}", exc_info=True)
+                with self._lock:
+                    self._stats["errors"] += 1
+                if on_error is not None:
+                    exctype, value = sys.exc_info()[:2]
+                    on_error(path, (exctype, value, traceback.format_exc()))
+
+            with self._lock:
+                job = self._pending.pop(path, None)
+                if job is None:
+                    self._active.discard(path)
+                    self._idle.notify_all()
+
+    def flush(self, timeout=None):
+        """Block until every submitted save has finished. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while self._active:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def shutdown(self, timeout=None):
+        """Wait (up to ``timeout``) for pending saves, then stop. Returns False on timeout."""
+        flushed = self.flush(timeout)
+        self._executor.shutdown(wait=False)
+        return flushed
+
+    def stats(self):
+        """Counters plus derived save latency and write amplification (bytes written per byte submitted)."""
+        with self._lock:
+            s = dict(self._stats)
+        done = s["writes"] + s["skipped"]
+        s["latency_avg"] = s["latency_total"] / done if done else 0.0
+        s["write_amplification"] = s["bytes_written"] / s["bytes_submitted"] if s["bytes_submitted"] else 0.0
+        return s
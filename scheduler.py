@@ -0,0 +1,228 @@
+import sys
+import time
+import logging
+import threading
+import traceback
+from collections import deque
+
+from PyQt6.QtCore import QThreadPool
+
+from worker import Worker
+from metrics import metrics
+
+# Priority classes, most urgent first.
+INTERACTIVE = 0  # Opening a note, preview, search-as-you-type
+SAVE = 1         # Work the user is waiting on to be durable
+INDEXING = 2     # Keeping indexes in step with edits and vault changes
+BACKGROUND = 3   # Bulk work nobody is waiting for
+PRIORITY_NAMES = ("interactive", "save", "indexing", "background")
+
+# Queued tasks allowed per class before submit() starts rejecting (None: unbounded).
+DEFAULT_LIMITS = (None, None, 256, 64)
+
+
+class CancelToken:
+    """
+    Cooperative cancellation flag. Calling the token returns whether it was
+    cancelled, so it can be passed wherever the code takes ``should_cancel``.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def __call__(self):
+        return self._event.is_set()
+
+
+class Task(Worker):
+    """
+    A ``Worker`` run by ``TaskScheduler``: it carries a priority, an optional
+    coalescing key and a ``CancelToken``, and its result is dropped if the
+    token is cancelled before the result is delivered.
+    """
+
+    def __init__(self, scheduler, fn, args, kwargs, priority, key, name):
+        super(Task, self).__init__(fn, *args, **kwargs)
+        self.scheduler = scheduler
+        self.priority = priority
+        self.key = key
+        self.name = name
+        self.token = CancelToken()
+        self.submitted_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+
+    def cancel(self):
+        self.token.cancel()
+
+    def run(self):
+        self.started_at = time.perf_counter()
+        metrics.observe(f"scheduler.wait.{PRIORITY_NAMES[self.priority]}", self.started_at - self.submitted_at)
+        try:
+            if not self.token.cancelled:
+                result = self.fn(*self.args, **self.kwargs)
+                if not self.token.cancelled:
+                    self.signals.result.emit(result)
+        except Exception:
+            logging.error(f"Task {self.name} failed", exc_info=True)
+            exctype, value = sys.exc_info()[:2]
+            self.signals.error.emit((exctype, value, traceback.format_exc()))
+        finally:
+            self.finished_at = time.perf_counter()
+            metrics.observe(f"task.{self.name}", self.finished_at - self.started_at)
+            self.scheduler._finished(self)
+            self.signals.finished.emit()
+
+
+class TaskScheduler:
+    """
+    Priority queues in front of a ``QThreadPool``.
+
+    Tasks wait in per-priority queues and are handed to the pool only when a
+    thread is free, most urgent class first. One thread is kept back for
+    ``INTERACTIVE`` work, so indexing can never occupy every thread while a
+    note is waiting to open.
+
+    Submitting a task with the same ``key`` as a queued one replaces it; a
+    running one with that key is cancelled (cooperatively: long tasks take
+    ``should_cancel``, see ``submit``). Bounded classes reject new tasks when
+    full and ``submit`` returns ``None`` so the caller can fall back.
+    """
+
+    def __init__(self, pool=None, reserved_threads=1, limits=DEFAULT_LIMITS):
+        self.pool = pool if pool is not None else QThreadPool.globalInstance()
+        self.reserved_threads = reserved_threads
+        if self.pool.maxThreadCount() <= reserved_threads:
+            self.pool.setMaxThreadCount(reserved_threads + 1)
+        self.limits = limits
+        self._lock = threading.Lock()
+        self._queues = [deque() for _ in PRIORITY_NAMES]
+        self._queued = {}   # key -> queued task
+        self._latest = {}   # key -> newest task submitted with it
+        self._active = set()
+        self._stats = {"submitted": 0, "coalesced": 0, "cancelled": 0, "rejected": 0, "completed": 0}
+        metrics.gauge("scheduler.queued", self.queued_count)
+        metrics.gauge("scheduler.running", lambda: len(self._active))
+
+    def submit(self, fn, *args, priority=BACKGROUND, key=None, name=None,
+               on_result=None, on_error=None, cancellable=False, **kwargs):
+        """
+        Queue ``fn(*args, **kwargs)``. With ``cancellable`` the task's token is
+        passed as ``should_cancel=``. ``on_result`` / ``on_error`` run on the
+        thread that called ``submit`` (the GUI thread) unless the task was
+        cancelled first. Returns the ``Task``, or ``None`` if its queue is full.
+        """
+        task = Task(self, fn, args, kwargs, priority, key, name or key or getattr(fn, "__name__", "task"))
+        if cancellable:
+            task.kwargs["should_cancel"] = task.token
+        if on_result is not None:
+            task.signals.result.connect(lambda result: task.token.cancelled or on_result(result))
+        if on_error is not None:
+            task.signals.error.connect(lambda err: task.token.cancelled or on_error(err))
+
+        with self._lock:
+            self._stats["submitted"] += 1
+            if key is not None:
+                self._drop_key(key)
+            limit = self.limits[priority]
+            if limit is not None and len(self._queues[priority]) >= limit:
+                self._stats["rejected"] += 1
+                logging.warning(f"Task queue '{PRIORITY_NAMES[priority]}' full; rejected {task.name}")
+                return None
+            self._queues[priority].append(task)
+            if key is not None:
+                self._queued[key] = task
+                self._latest[key] = task
+        self._dispatch()
+        return task
+
+    def _drop_key(self, key):
+        queued = self._queued.pop(key, None)
+        if queued is not None:
+            self._queues[queued.priority].remove(queued)
+            self._stats["coalesced"] += 1
+        # Also covers a task that already finished but whose result is still
+        # on its way to the GUI thread.
+        latest = self._latest.pop(key, None)
+        if latest is not None:
+            self._cancel_task(latest)
+
+    def _cancel_task(self, task):
+        # Called with the lock held. Counts each task once, and only if it had not finished.
+        if task.token.cancelled:
+            return
+        task.cancel()
+        if task.finished_at is None:
+            self._stats["cancelled"] += 1
+
+    def cancel(self, key):
+        """Cancel the newest task with ``key``, whether queued, running or awaiting delivery."""
+        with self._lock:
+            self._drop_key(key)
+
+    def cancel_all(self):
+        with self._lock:
+            for queue in self._queues:
+                for task in queue:
+                    self._cancel_task(task)
+                queue.clear()
+            self._queued.clear()
+            for task in self._latest.values():
+                self._cancel_task(task)
+            self._latest.clear()
+            for task in self._active:
+                self._cancel_task(task)
+
+    def queued_count(self):
+        with self._lock:
+            return sum(len(queue) for queue in self._queues)
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s["running"] = len(self._active)
+            for name, queue in zip(PRIORITY_NAMES, self._queues):
+                s[f"queued_{name}"] = len(queue)
+        return s
+
+    def _next_task(self):
+        capacity = self.pool.maxThreadCount() - len(self._active)
+        for priority, queue in enumerate(self._queues):
+            if not queue:
+                continue
+            if priority != INTERACTIVE and capacity <= self.reserved_threads:
+                return None
+            if capacity <= 0:
+                return None
+            return queue.popleft()
+        return None
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                task = self._next_task()
+                if task is None:
+                    return
+                if task.key is not None and self._queued.get(task.key) is task:
+                    del self._queued[task.key]
+                self._active.add(task)
+            self.pool.start(task)
+
+    def _finished(self, task):
+        # Runs on the task's thread.
+        with self._lock:
+            self._active.discard(task)
+            self._stats["completed"] += 1
+        self._dispatch()
+
+    def shutdown(self, timeout_ms=5000):
+        """Cancel everything and wait (up to ``timeout_ms``) for running tasks to return."""
+        self.cancel_all()
+        return self.pool.waitForDone(timeout_ms)
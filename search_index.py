@@ -0,0 +1,114 @@
+import os
+import re
+import sqlite3
+import logging
+from collections import namedtuple
+
+from metrics import metrics
+from note_index import NoteIndex
+
+SearchResult = namedtuple("SearchResult", "path title snippet score")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes USING fts5(
+    title, body, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+_TOKEN_RE = re.compile(r'"([^"]*)"?|(\S+)')
+_HEADING_RE = re.compile(r'^#{1,6}\s+(.+?)\s*#*\s*$', re.MULTILINE)
+
+
+def note_title(path, content):
+    match = _HEADING_RE.search(content[:4096])
+    if match:
+        return match.group(1)
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def build_match_query(text):
+    """
+    Turn search-box input into an FTS5 MATCH expression.
+
+    ``"quoted words"`` become phrase queries, other words are ANDed together,
+    and the last word is a prefix match while the user is still typing it.
+    """
+    parts = []
+    matches = list(_TOKEN_RE.finditer(text))
+    for i, match in enumerate(matches):
+        phrase, word = match.group(1), match.group(2)
+        terms = (phrase if phrase is not None else word).split()
+        terms = [t.replace('"', '') for t in terms]
+        terms = [t for t in terms if any(c.isalnum() for c in t)]
+        if not terms:
+            continue
+        quoted = '"' + ' '.join(terms) + '"'
+        is_last = i == len(matches) - 1
+        # Very short prefixes match most of the vault and make ranking the
+        # slowest part of the query; treat them as whole words instead.
+        if phrase is None and is_last and not text[-1:].isspace() and len(terms[-1]) >= 3:
+            quoted += '*'
+        parts.append(quoted)
+    return ' '.join(parts)
+
+
+class SearchIndex(NoteIndex):
+    """
+    Persistent full-text index over the notes in a vault, backed by SQLite FTS5.
+
+    The index lives in the vault's cache directory and is kept up to date as
+    described in ``NoteIndex``.
+    """
+
+    NAME = "search"
+    DB_NAME = "search.db"
+    SCHEMA = _SCHEMA
+
+    def _index(self, rel, content, mtime_ns, size):
+        cur = self._conn.execute("SELECT id FROM files WHERE path = ?", (rel,))
+        row = cur.fetchone()
+        if row is None:
+            cur = self._conn.execute(
+                "INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)", (rel, mtime_ns, size))
+            rowid = cur.lastrowid
+        else:
+            rowid = row[0]
+            self._conn.execute(
+                "UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?", (mtime_ns, size, rowid))
+            self._conn.execute("DELETE FROM notes WHERE rowid = ?", (rowid,))
+        self._conn.execute(
+            "INSERT INTO notes (rowid, title, body) VALUES (?, ?, ?)",
+            (rowid, note_title(rel, content), content))
+
+    def _unindex(self, rel):
+        row = self._conn.execute("SELECT id FROM files WHERE path = ?", (rel,)).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM notes WHERE rowid = ?", (row[0],))
+            self._conn.execute("DELETE FROM files WHERE id = ?", (row[0],))
+
+    @metrics.timer("search.query")
+    def search(self, text, limit=50):
+        """Ranked results for search-box input, best match first."""
+        query = build_match_query(text)
+        if not query:
+            return []
+        sql = (
+            "SELECT files.path, notes.title, "
+            "snippet(notes, 1, '', '', '…', 12), bm25(notes, 5.0, 1.0) AS score "
+            "FROM notes JOIN files ON files.id = notes.rowid "
+            "WHERE notes MATCH ? ORDER BY score LIMIT ?"
+        )
+        with self._lock:
+            try:
+                rows = self._conn.execute(sql, (query, limit)).fetchall()
+            except sqlite3.OperationalError as e:
+                logging.warning(f"Search query {query!r} failed: {e}")
+                return []
+        return [SearchResult(os.path.join(self.vault_path, rel), title, snippet, score)
+                for rel, title, snippet, score in rows]
@@ -0,0 +1,140 @@
+import sys
+import time
+import logging
+import importlib.abc
+from contextlib import contextmanager
+
+from metrics import metrics
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps a module's loader so ``ImportTimer`` sees how long loading it takes."""
+
+    def __init__(self, loader, timer):
+        self.loader = loader
+        self.timer = timer
+
+    def create_module(self, spec):
+        # Extension modules do their real work (loading the shared library) here.
+        with self.timer._timing(spec.name):
+            return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        with self.timer._timing(module.__spec__.name):
+            self.loader.exec_module(module)
+
+    def __getattr__(self, name):
+        # get_data, get_filename, is_package, ... for importlib.resources and friends
+        return getattr(self.loader, name)
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """
+    Records how long each module takes to import while installed on
+    ``sys.meta_path``, like ``python -X importtime``: ``self`` excludes the
+    modules it imported in turn, ``cumulative`` includes them.
+    """
+
+    def __init__(self):
+        self.times = {}  # name -> (self seconds, cumulative seconds)
+        self._children = []
+        self._finding = set()
+
+    def install(self):
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname in self._finding:
+            return None
+        self._finding.add(fullname)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding.discard(fullname)
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    @contextmanager
+    def _timing(self, name):
+        self._children.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+            own, total = self.times.get(name, (0.0, 0.0))
+            self.times[name] = (own + elapsed - children, total + elapsed)
+
+    def slowest(self, limit=15):
+        """``(name, self, cumulative)`` for the modules with the highest self time."""
+        ranked = sorted(self.times.items(), key=lambda item: item[1][0], reverse=True)
+        return [(name, own, total) for name, (own, total) in ranked[:limit]]
+
+
+class StartupTimer:
+    """
+    Timeline of application startup: named phases (``phase``), milestones
+    measured from process start (``mark``) and, with ``track_imports``,
+    per-module import times. ``report`` logs it all once the first window
+    is up; milestones are also recorded as ``startup.<name>`` metrics.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self.marks = []
+        self.imports = None
+
+    def track_imports(self):
+        self.imports = ImportTimer()
+        self.imports.install()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def mark(self, name):
+        elapsed = time.perf_counter() - self.started
+        self.marks.append((name, elapsed))
+        metrics.observe(f"startup.{name}", elapsed)
+        return elapsed
+
+    def report(self, limit=15):
+        """Log the timeline (and return it as text); stops tracking imports."""
+        lines = ["Startup timing:"]
+        lines.extend(f"  {name:32s} {elapsed * 1000:8.1f} ms" for name, elapsed in self.phases)
+        lines.extend(f"  {'@ ' + name:32s} {elapsed * 1000:8.1f} ms since start" for name, elapsed in self.marks)
+        if self.imports is not None:
+            self.imports.uninstall()
+            total = sum(own for own, _ in self.imports.times.values())
+            lines.append(f"  {len(self.imports.times)} modules imported in {total * 1000:.1f} ms; slowest (self / cumulative):")
+            lines.extend(f"    {name:30s} {own * 1000:8.1f} ms {cumulative * 1000:8.1f} ms"
+                         for name, own, cumulative in self.imports.slowest(limit))
+        text = "\n".join(lines)
+        logging.info(text)
+        return text
+
+
+# Created when the entry point first imports this module, which is as close to
+# process start as Python code gets.
+startup = StartupTimer()
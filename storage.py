@@ -0,0 +1,270 @@
+import os
+import codecs
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from cache import LRUCache
+from metrics import metrics
+from save_service import SaveService, encode_text
+from vault_scan import iter_vault_files
+
+ReadResult = namedtuple("ReadResult", "path text encoding size mtime_ns")
+FileInfo = namedtuple("FileInfo", "path size mtime_ns")
+
+# Notes read ahead of being opened; checked against the file's stat before use.
+READ_AHEAD_BYTES = int(os.environ.get("ACROPAD_READ_AHEAD_MB", "8")) * 1024 * 1024
+# Paths per task in batched operations.
+_BATCH = 32
+# Read-aheads in flight beyond this are dropped rather than queued behind real work.
+_MAX_PREFETCH = 16
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def decode_text(data):
+    """
+    Decode file bytes as a text-mode ``open()`` would, detecting the encoding.
+    Returns ``(text, encoding)``; ``encoding`` round-trips through ``encode_text``.
+    """
+    text, encoding = decode_bytes(data)
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text, encoding
+
+
+def decode_bytes(data):
+    """
+    Like ``decode_text`` but leaving line endings as they are, so that
+    ``text.encode(encoding)`` gives back ``data``.
+
+    A BOM decides first, then UTF-8; anything else is taken as Windows-1252,
+    or Latin-1 (which decodes any byte) if that fails.
+    """
+    encoding = None
+    for bom, name in _BOMS:
+        if data.startswith(bom):
+            encoding = name
+            break
+    if encoding is None:
+        for name in ("utf-8", "cp1252"):
+            try:
+                text = data.decode(name)
+                encoding = name
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            text, encoding = data.decode("latin-1"), "latin-1"
+    else:
+        text = data.decode(encoding)
+    return text, encoding
+
+
+def read_text(path):
+    """Read and decode one file. Returns a ``ReadResult``."""
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        data = f.read()
+    text, encoding = decode_text(data)
+    return ReadResult(path, text, encoding, st.st_size, st.st_mtime_ns)
+
+
+def stat_file(path):
+    """``FileInfo`` for ``path``, or ``None`` if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return FileInfo(path, st.st_size, st.st_mtime_ns)
+
+
+class Storage:
+    """
+    File access for both frontends, usable without Tk or Qt.
+
+    Every operation has a blocking form (``read``, ``stat``, ``list_notes``,
+    ``create``) for code already running on a worker, e.g. a Qt scheduler
+    task, and a form returning a ``concurrent.futures.Future`` that runs on
+    the storage thread pool (``read_async``, ``read_many``, ``stat_many``,
+    ``list_async``, ``create_async``); a Tk caller hands the result back to
+    the main loop from ``add_done_callback``. Batched operations split their
+    paths into chunks, one task per chunk.
+
+    Reads detect the encoding and remember it, so ``write`` (through the
+    shared ``SaveService``) stores the file the way it was found. Notes the
+    user is likely to open next can be ``prefetch``ed into a small
+    read-ahead cache; an entry is only used while the file's size and mtime
+    still match.
+    """
+
+    def __init__(self, max_workers=4, read_ahead_bytes=READ_AHEAD_BYTES, save_service=None):
+        self.save_service = save_service or SaveService()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage")
+        self._read_ahead = LRUCache(read_ahead_bytes, sizeof=lambda result: len(result.text))
+        self._lock = threading.Lock()
+        self._encodings = {}    # path -> encoding it was read in, when not UTF-8
+        self._prefetching = set()
+        self._stats = {"reads": 0, "read_ahead_hits": 0, "prefetched": 0, "bytes_read": 0}
+
+    # Blocking operations
+
+    def read(self, path):
+        """Read ``path`` (from the read-ahead cache if still current). Returns a ``ReadResult``."""
+        result = self._read_ahead.pop(path)
+        if result is not None:
+            info = stat_file(path)
+            if info is None or (info.size, info.mtime_ns) != (result.size, result.mtime_ns):
+                result = None
+        if result is None:
+            with metrics.timed("storage.read"):
+                result = read_text(path)
+            with self._lock:
+                self._stats["bytes_read"] += result.size
+        else:
+            with self._lock:
+                self._stats["read_ahead_hits"] += 1
+        with self._lock:
+            self._stats["reads"] += 1
+            if result.encoding == "utf-8":
+                self._encodings.pop(path, None)
+            else:
+                self._encodings[path] = result.encoding
+        self.save_service.remember(path, result.text, result.encoding)
+        return result
+
+    def stat(self, path):
+        return stat_file(path)
+
+    def list_notes(self, root):
+        """``FileInfo`` for every note under ``root``."""
+        infos = []
+        for entry in iter_vault_files(root):
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            infos.append(FileInfo(entry.path, st.st_size, st.st_mtime_ns))
+        return infos
+
+    def create(self, path, content=""):
+        """Create a new note; raises ``FileExistsError`` rather than replacing one."""
+        with open(path, 'xb') as f:
+            f.write(encode_text(content))
+        return self.stat(path)
+
+    def write(self, path, content, on_done=None, on_error=None):
+        """Save ``content`` (see ``SaveService.submit``) in the encoding ``path`` was read in."""
+        with self._lock:
+            encoding = self._encodings.get(path)
+        self.save_service.submit(path, content, on_done=on_done, on_error=on_error, encoding=encoding)
+
+    # Futures
+
+    def submit(self, fn, *args, **kwargs):
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def read_async(self, path):
+        return self._executor.submit(self.read, path)
+
+    def stat_many(self, paths):
+        """Future of ``{path: FileInfo or None}``."""
+        return self._batch(paths, stat_file)
+
+    def read_many(self, paths):
+        """
+        Future of ``{path: ReadResult or OSError}``. Unlike ``read`` this neither
+        consults nor fills the read-ahead cache: it is meant for bulk work
+        (indexing, export) that would only flush it.
+        """
+        def read_or_error(path):
+            try:
+                return read_text(path)
+            except OSError as e:
+                return e
+        return self._batch(paths, read_or_error)
+
+    def list_async(self, root):
+        return self._executor.submit(self.list_notes, root)
+
+    def create_async(self, path, content=""):
+        return self._executor.submit(self.create, path, content)
+
+    def prefetch(self, paths):
+        """Read notes into the read-ahead cache in the background, if there is room to."""
+        for path in paths:
+            if path in self._read_ahead:
+                continue
+            with self._lock:
+                if path in self._prefetching or len(self._prefetching) >= _MAX_PREFETCH:
+                    continue
+                self._prefetching.add(path)
+            self._executor.submit(self._prefetch, path)
+
+    def _prefetch(self, path):
+        try:
+            result = read_text(path)
+        except OSError:
+            return
+        finally:
+            with self._lock:
+                self._prefetching.discard(path)
+        self._read_ahead.put(path, result)
+        with self._lock:
+            self._stats["prefetched"] += 1
+
+    def _batch(self, paths, fn):
+        paths = list(paths)
+        combined = Future()
+        results = {}
+        chunks = [paths[i:i + _BATCH] for i in range(0, len(paths), _BATCH)]
+        remaining = [len(chunks)]
+        if not chunks:
+            combined.set_result(results)
+            return combined
+
+        def run(chunk):
+            return {path: fn(path) for path in chunk}
+
+        def done(future):
+            with self._lock:
+                if combined.done():
+                    return
+                error = future.exception()
+                if error is not None:
+                    combined.set_exception(error)
+                    return
+                results.update(future.result())
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            combined.set_result(results)
+
+        for chunk in chunks:
+            self._executor.submit(run, chunk).add_done_callback(done)
+        return combined
+
+    # Lifecycle
+
+    def flush(self, timeout=None):
+        """Wait for pending saves. Returns False on timeout."""
+        return self.save_service.flush(timeout)
+
+    def shutdown(self, timeout=None):
+        """Stop, waiting up to ``timeout`` for pending saves. Returns False on timeout."""
+        flushed = self.save_service.shutdown(timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        return flushed
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["read_ahead"] = self._read_ahead.stats()
+        stats["save"] = self.save_service.stats()
+        return stats
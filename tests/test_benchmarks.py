@@ -0,0 +1,35 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+from vault_gen import generate_vault
+from run import compare
+
+class TestVaultGenerator(unittest.TestCase):
+    def test_deterministic(self):
+        with tempfile.TemporaryDirectory() as a, tempfile.TemporaryDirectory() as b:
+            paths = generate_vault(a, notes=30, seed=7)
+            self.assertEqual(paths, generate_vault(b, notes=30, seed=7))
+            self.assertEqual(len(set(paths)), 30)
+            for rel in paths:
+                with open(os.path.join(a, rel), 'rb') as fa, open(os.path.join(b, rel), 'rb') as fb:
+                    self.assertEqual(fa.read(), fb.read())
+
+class TestCompare(unittest.TestCase):
+    def test_flags_only_regressions_over_threshold(self):
+        baseline = {"fast": {"min": 1.0}, "slow": {"min": 1.0}, "gone": {"min": 1.0}}
+        results = {"fast": {"min": 1.1}, "slow": {"min": 1.5}, "new": {"min": 9.0}}
+        self.assertEqual([r[0] for r in compare(results, baseline, 0.2)], ["slow"])
+
+    def test_ignores_tiny_absolute_differences(self):
+        baseline = {"tiny": {"min": 0.0001}, "real": {"min": 0.010}}
+        results = {"tiny": {"min": 0.0005}, "real": {"min": 0.020}}
+        self.assertEqual([r[0] for r in compare(results, baseline, 0.15, min_delta=0.001)], ["real"])
+
+if __name__ == '__main__':
+    unittest.main()
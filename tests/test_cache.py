@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cache import LRUCache
+from renderer import render_markdown, render_cache
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_bytes=6)
+        cache.put("a", "aa")
+        cache.put("b", "bb")
+        cache.get("a")
+        cache.put("c", "cccc")
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["bytes"], 6)
+
+    def test_pop_and_peek_leave_stats_and_order_alone(self):
+        cache = LRUCache(max_bytes=4)
+        cache.put("a", "aa")
+        cache.put("b", "bb")
+        self.assertEqual(cache.peek("a"), "aa")
+        cache.put("c", "cc")
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.pop("b"), "bb")
+        self.assertIsNone(cache.pop("b"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["bytes"]), (0, 0, 2))
+
+    def test_counts_hits_and_misses(self):
+        cache = LRUCache(max_bytes=100)
+        self.assertIsNone(cache.get("x"))
+        cache.put("x", "1")
+        self.assertEqual(cache.get("x"), "1")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_oversized_value_is_not_cached(self):
+        cache = LRUCache(max_bytes=2)
+        cache.put("x", "too big")
+        self.assertEqual(len(cache), 0)
+
+class TestRenderCache(unittest.TestCase):
+    def test_repeated_render_hits_cache(self):
+        text = "# Cached render test\n\nsome *unique* text 81723"
+        render_markdown(text)
+        hits = render_cache.hits
+        self.assertEqual(render_markdown(text), render_markdown(text))
+        self.assertEqual(render_cache.hits, hits + 2)
+
+if __name__ == '__main__':
+    unittest.main()
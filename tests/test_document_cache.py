@@ -0,0 +1,98 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt6.QtGui import QGuiApplication, QTextDocument, QTextCursor
+from PyQt6.QtCore import QCoreApplication
+from document_cache import DocumentCache, OpenDocument
+
+if QCoreApplication.instance() is None:
+    app = QGuiApplication(sys.argv)
+
+class TestDocumentCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache = DocumentCache(max_bytes=1024 * 1024)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def entry(self, name, content="# Note\n"):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        document = QTextDocument()
+        document.setPlainText(content)
+        document.setModified(False)
+        return OpenDocument(path, document)
+
+    def test_take_returns_the_same_document_with_its_undo_history(self):
+        entry = self.entry("a.md")
+        QTextCursor(entry.document).insertText("typed ")
+        entry.cursor = (3, 6)
+        self.cache.put(entry)
+        taken = self.cache.take(entry.path)
+        self.assertIs(taken.document, entry.document)
+        self.assertTrue(taken.document.isUndoAvailable())
+        self.assertEqual(taken.cursor, (3, 6))
+        # Taken out: the editor owns it until it is put back.
+        self.assertNotIn(entry.path, self.cache)
+        self.assertIsNone(self.cache.take(entry.path))
+
+    def test_changed_file_invalidates_the_entry(self):
+        entry = self.entry("a.md")
+        self.cache.put(entry)
+        with open(entry.path, 'a', encoding='utf-8') as f:
+            f.write("edited elsewhere\n")
+        self.assertIsNone(self.cache.take(entry.path))
+        self.assertEqual(self.cache.stats()["stale"], 1)
+
+    def test_own_save_keeps_the_entry_valid(self):
+        entry = self.entry("a.md")
+        self.cache.put(entry)
+        with open(entry.path, 'w', encoding='utf-8') as f:
+            f.write("# Note saved by us, longer than before\n")
+        self.cache.saved(entry.path)
+        self.assertIs(self.cache.take(entry.path), entry)
+
+    def test_saved_while_open_then_switched_away_and_back(self):
+        entry = self.entry("a.md")
+        # Autosave while the note is shown: it is not in the cache yet
+        with open(entry.path, 'w', encoding='utf-8') as f:
+            f.write("# Note autosaved while open\n")
+        self.cache.saved(entry.path)
+        entry.saved()
+        self.cache.put(entry)
+        self.assertIs(self.cache.take(entry.path), entry)
+        self.assertEqual(self.cache.stats()["stale"], 0)
+
+    def test_stat_from_the_read(self):
+        entry = self.entry("a.md")
+        read_stat = (entry.stat[0], entry.stat[1] - 1)
+        # The file changed between the read and building the document
+        stale = OpenDocument(entry.path, entry.document, stat=read_stat)
+        self.assertFalse(stale.is_current())
+
+    def test_evicts_least_recently_used_over_budget(self):
+        entries = [self.entry(f"{i}.md", "x" * 1000) for i in range(3)]
+        self.cache.resize(entries[0].memory_estimate() * 2)
+        for entry in entries:
+            self.cache.put(entry)
+        self.assertNotIn(entries[0].path, self.cache)
+        self.assertIn(entries[1].path, self.cache)
+        self.assertIn(entries[2].path, self.cache)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_memory_estimate_counts_preview(self):
+        entry = self.entry("a.md")
+        before = entry.memory_estimate()
+        entry.preview = (["k"], {"k": "<p>" + "y" * 500 + "</p>"})
+        self.assertEqual(entry.memory_estimate(), before + 507)
+
+if __name__ == '__main__':
+    unittest.main()
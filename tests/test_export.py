@@ -0,0 +1,91 @@
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from export import Exporter, export_page, output_path, ASSETS_NAME
+
+class TestExportPage(unittest.TestCase):
+    def test_links_and_assets(self):
+        page = export_page("[b](../b.md#top) [c](c.txt) [w](https://e.com/x.md)", os.path.join("sub", "a.md"))
+        self.assertIn('href="../b.html#top"', page)
+        self.assertIn('href="c.html"', page)
+        self.assertIn('href="https://e.com/x.md"', page)
+        self.assertIn(f'href="../{ASSETS_NAME}/preview.css"', page)
+        self.assertIn("<title>a</title>", page)
+
+    def test_output_path(self):
+        self.assertEqual(output_path(os.path.join("x", "note.md")), os.path.join("x", "note.html"))
+
+class TestExporter(unittest.TestCase):
+    def setUp(self):
+        self.vault = tempfile.mkdtemp()
+        self.out = tempfile.mkdtemp()
+        self.write("alpha.md", "# Alpha")
+        self.write(os.path.join("sub", "beta.md"), "# Beta")
+
+    def tearDown(self):
+        shutil.rmtree(self.vault)
+        shutil.rmtree(self.out)
+
+    def write(self, rel, content):
+        path = os.path.join(self.vault, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def export(self, **kwargs):
+        return Exporter(self.vault, self.out, jobs=1, **kwargs).run()
+
+    def read(self, rel):
+        with open(os.path.join(self.out, rel), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def test_incremental(self):
+        stats = self.export()
+        self.assertEqual((stats["rendered"], stats["unchanged"]), (2, 0))
+        self.assertIn("<h1>Beta</h1>", self.read(os.path.join("sub", "beta.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.out, ASSETS_NAME, "preview.css")))
+
+        self.assertEqual(self.export()["rendered"], 0)
+
+        self.write("alpha.md", "# Alpha 2")
+        stats = self.export()
+        self.assertEqual((stats["rendered"], stats["unchanged"]), (1, 1))
+        self.assertIn("Alpha 2", self.read("alpha.html"))
+
+    def test_touched_but_unchanged_is_not_rendered(self):
+        self.export()
+        path = os.path.join(self.vault, "alpha.md")
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        stats = self.export()
+        self.assertEqual((stats["rendered"], stats["unchanged"]), (0, 2))
+
+    def test_removed_notes_and_missing_pages(self):
+        self.export()
+        os.unlink(os.path.join(self.vault, "alpha.md"))
+        os.unlink(os.path.join(self.out, "sub", "beta.html"))
+        stats = self.export()
+        self.assertEqual((stats["rendered"], stats["removed"]), (1, 1))
+        self.assertFalse(os.path.exists(os.path.join(self.out, "alpha.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.out, "sub", "beta.html")))
+
+    def test_full(self):
+        self.export()
+        self.assertEqual(self.export(full=True)["rendered"], 2)
+
+    def test_process_pool(self):
+        for i in range(250):
+            self.write(os.path.join("many", f"note-{i}.md"), f"Note {i}")
+        stats = Exporter(self.vault, self.out, jobs=2).run()
+        self.assertEqual(stats["rendered"], 252)
+        self.assertIn("Note 249", self.read(os.path.join("many", "note-249.html")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import tkinter
+import sys
+import os
+from types import SimpleNamespace
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import customtkinter as ctk
+from acropad import VirtualFileList
+
+try:
+    root = ctk.CTk()
+    root.withdraw()
+except tkinter.TclError:
+    root = None
+
+ITEMS = [f"note{i:05}.md" for i in range(10000)]
+
+@unittest.skipIf(root is None, "needs a display")
+class TestVirtualFileList(unittest.TestCase):
+    def setUp(self):
+        self.selected = []
+        self.list = VirtualFileList(root, on_select=self.selected.append)
+        self.list.set_items(list(ITEMS))
+        self.resize(10)
+
+    def tearDown(self):
+        self.list.destroy()
+
+    def resize(self, rows):
+        self.list._on_resize(SimpleNamespace(height=rows * VirtualFileList.ROW_HEIGHT))
+
+    def labels(self):
+        return [btn.cget("text") for btn in self.list.rows]
+
+    def test_widgets_only_for_visible_rows(self):
+        self.assertEqual(len(self.list.rows), 10)
+        self.assertEqual(len(self.list.rows_frame.winfo_children()), 10)
+        self.assertEqual(self.labels(), ITEMS[:10])
+        self.assertEqual(self.list.lbl_header.cget("text"), "FILES (10000)")
+
+    def test_scrolling_relabels_the_same_widgets(self):
+        rows = list(self.list.rows)
+        self.list.scroll_to(5000)
+        self.assertEqual([id(btn) for btn in self.list.rows], [id(btn) for btn in rows])
+        self.assertEqual(self.labels(), ITEMS[5000:5010])
+        self.list._on_row_click(2)
+        self.assertEqual(self.selected, [ITEMS[5002]])
+
+    def test_scrolling_is_clamped(self):
+        self.list.scroll_to(len(ITEMS))
+        self.assertEqual(self.list.offset, len(ITEMS) - 10)
+        self.list._on_wheel(SimpleNamespace(delta=120))
+        self.assertEqual(self.list.offset, len(ITEMS) - 13)
+        self.list.scroll_to(-5)
+        self.assertEqual(self.list.offset, 0)
+
+    def test_resizing_grows_and_shrinks_the_pool(self):
+        self.resize(3)
+        self.assertEqual(len(self.list.rows_frame.winfo_children()), 3)
+        self.resize(20)
+        self.assertEqual(self.labels(), ITEMS[:20])
+
+    def test_short_list_leaves_rows_blank(self):
+        self.list.set_items(["a.md"])
+        self.assertEqual(self.labels(), ["a.md"] + [""] * 9)
+        self.list._on_row_click(3)
+        self.assertEqual(self.selected, [])
+
+if __name__ == '__main__':
+    unittest.main()
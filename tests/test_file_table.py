@@ -0,0 +1,86 @@
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from file_table import FileTable, ROOT
+
+def j(*parts):
+    return os.path.join(*parts)
+
+class TestFileTable(unittest.TestCase):
+    def setUp(self):
+        self.table = FileTable()
+        self.table.extend([
+            (j("b", "two.md"), 2, 20),
+            ("Zeta.md", 1, 10),
+            (j("a", "x", "deep.md"), 3, 30),
+            ("alpha.md", 4, 40),
+            (j("b", "One.md"), 5, 50),
+        ])
+
+    def names(self, dir_id):
+        return ([self.table.dir_name(d) for d in self.table.subdirs(dir_id)],
+                [self.table.name(f) for f in self.table.files(dir_id)])
+
+    def test_children_sorted_case_insensitively(self):
+        self.assertEqual(self.names(ROOT), (["a", "b"], ["alpha.md", "Zeta.md"]))
+        self.assertEqual(self.names(self.table.find_dir("b")), ([], ["One.md", "two.md"]))
+
+    def test_lookup_and_columns(self):
+        file_id = self.table.find(j("a", "x", "deep.md"))
+        self.assertEqual(self.table.path(file_id), j("a", "x", "deep.md"))
+        self.assertEqual((self.table.size(file_id), self.table.mtime_ns(file_id)), (3, 30))
+        self.assertIsNone(self.table.find(j("a", "nope.md")))
+        self.assertEqual(len(self.table), 5)
+
+    def test_add_keeps_order_and_updates(self):
+        self.table.add(j("b", "middle.md"))
+        self.assertEqual(self.names(self.table.find_dir("b"))[1], ["middle.md", "One.md", "two.md"])
+        self.assertEqual(self.table.file_row(self.table.find(j("b", "two.md"))), 2)
+        self.table.add("alpha.md", 9, 90)
+        self.assertEqual(self.table.size(self.table.find("alpha.md")), 9)
+        self.assertEqual(len(self.table), 6)
+
+    def test_remove_prunes_empty_directories(self):
+        self.assertTrue(self.table.remove(j("a", "x", "deep.md")))
+        self.assertFalse(self.table.remove(j("a", "x", "deep.md")))
+        self.assertIsNone(self.table.find_dir(j("a", "x")))
+        self.assertIsNone(self.table.find_dir("a"))
+        self.assertEqual(self.names(ROOT)[0], ["b"])
+        self.assertEqual(len(self.table), 4)
+
+    def test_compact(self):
+        self.table.remove("alpha.md")
+        self.table.compact()
+        self.assertEqual(sorted(self.table.paths()), sorted([j("b", "two.md"), "Zeta.md", j("a", "x", "deep.md"), j("b", "One.md")]))
+
+    def test_unicode_names(self):
+        self.table.add(j("ü", "naïve café.md"))
+        self.assertEqual(self.table.path(self.table.find(j("ü", "naïve café.md"))), j("ü", "naïve café.md"))
+
+    def test_memory_is_compact(self):
+        table = FileTable()
+        table.extend((j(f"dir-{i % 100}", f"note number {i}.md"), i, i) for i in range(20000))
+        self.assertLess(table.memory_usage() / len(table), 80)
+
+    def test_scan(self):
+        root = tempfile.mkdtemp()
+        try:
+            os.makedirs(j(root, "sub"))
+            os.makedirs(j(root, ".hidden"))
+            for rel in ("a.md", j("sub", "b.txt"), j(".hidden", "c.md"), "image.png"):
+                with open(j(root, rel), 'w') as f:
+                    f.write("x")
+            table = FileTable.scan(root)
+            self.assertEqual(sorted(table.paths()), ["a.md", j("sub", "b.txt")])
+            self.assertIsNone(FileTable.scan(root, should_cancel=lambda: True))
+        finally:
+            shutil.rmtree(root)
+
+if __name__ == '__main__':
+    unittest.main()
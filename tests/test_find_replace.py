@@ -0,0 +1,160 @@
+import unittest
+import errno
+from unittest import mock
+import tempfile
+import shutil
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import find_replace
+from find_replace import FindReplace, Query, ReplaceError, Transaction, recover
+
+def qt_loaded():
+    return "PyQt6" in sys.modules
+
+class FindReplaceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.vault = tempfile.mkdtemp()
+        self.cache = tempfile.mkdtemp()
+        env = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": self.cache})
+        env.start()
+        self.addCleanup(env.stop)
+        self.engine = FindReplace(self.vault, jobs=2)
+
+    def tearDown(self):
+        self.engine.close()
+        shutil.rmtree(self.vault)
+        shutil.rmtree(self.cache)
+
+    def write(self, rel, content, encoding="utf-8"):
+        path = os.path.join(self.vault, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content.encode(encoding))
+        return path
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def scan(self, query):
+        batches = []
+        stats = self.engine.scan(query, on_batch=batches.append)
+        return {m.path: m for batch in batches for m in batch}, stats
+
+class TestQuery(unittest.TestCase):
+    def test_literal_replacement_is_not_a_template(self):
+        self.assertEqual(Query("a.b", r"\1").replace("a.b axb"), (r"\1 axb", 1))
+
+    def test_regex_groups_case_and_words(self):
+        self.assertEqual(Query(r"(\w+)@old", r"\1@new", regex=True).replace("me@old"), ("me@new", 1))
+        self.assertEqual(Query("cat", "dog", case_sensitive=False, whole_word=True).replace("Cat cats cat"),
+                         ("dog cats dog", 2))
+
+    def test_invalid_regex(self):
+        with self.assertRaises(Exception):
+            Query("(", regex=True)
+
+class TestScan(FindReplaceTestCase):
+    def test_matches_with_lines(self):
+        a = self.write("a.md", "one term\ntwo\nterm and term\r\n")
+        self.write(os.path.join("sub", "b.md"), "nothing")
+        self.write(os.path.join(".hidden", "c.md"), "term")
+        matches, stats = self.scan(Query("term"))
+        self.assertEqual(list(matches), [a])
+        self.assertEqual(matches[a].count, 3)
+        self.assertEqual(matches[a].lines, [(1, "one term"), (3, "term and term")])
+        self.assertEqual((stats["files"], stats["matched_files"], stats["matches"]), (2, 1, 3))
+
+    def test_long_lines_are_cut_around_the_match(self):
+        path = self.write("a.md", "x" * 1000 + "needle" + "y" * 1000)
+        line = self.scan(Query("needle"))[0][path].lines[0][1]
+        self.assertIn("needle", line)
+        self.assertLess(len(line), 200)
+
+    def test_process_pool(self):
+        paths = [self.write(f"n{i}.md", "hit" if i % 2 else "miss") for i in range(10)]
+        with mock.patch.object(find_replace, "_POOL_MIN", 0), mock.patch.object(find_replace, "_CHUNK", 3):
+            matches, stats = self.scan(Query("hit"))
+        self.assertIsNotNone(self.engine._pool)
+        self.assertEqual(sorted(matches), sorted(paths[1::2]))
+        self.assertEqual(stats["files"], 10)
+
+    def test_workers_do_not_load_qt(self):
+        self.assertFalse(self.engine._get_pool().submit(qt_loaded).result(timeout=60))
+
+    def test_cancel(self):
+        self.write("a.md", "term")
+        stats = self.engine.scan(Query("term"), should_cancel=lambda: True)
+        self.assertTrue(stats["cancelled"])
+        self.assertEqual(stats["files"], 0)
+
+class TestApply(FindReplaceTestCase):
+    def test_diff_and_apply(self):
+        a = self.write("a.md", "see [[Old Name]]\n")
+        b = self.write("b.md", "Old Name here\r\nand there\r\n", encoding="cp1252")
+        self.write("c.md", "unrelated café")
+        query = Query("Old Name", "Nouveau Nom")
+        self.assertIn("-see [[Old Name]]\n+see [[Nouveau Nom]]", self.engine.diff(query, a))
+        changed = self.engine.apply(query, [a, b])
+        self.assertEqual(changed, {a: 1, b: 1})
+        self.assertEqual(self.read(a), b"see [[Nouveau Nom]]\n")
+        # Encoding and line endings are kept
+        self.assertEqual(self.read(b), b"Nouveau Nom here\r\nand there\r\n")
+        self.assertEqual(sorted(os.listdir(self.vault)), ["a.md", "b.md", "c.md"])
+
+    def test_failure_rolls_everything_back(self):
+        a = self.write("a.md", "term")
+        b = self.write("b.md", "term")
+        original = Transaction.commit
+
+        def commit_then_fail(transaction):
+            # The first note is replaced, then the second one changes underneath.
+            with open(b, 'a') as f:
+                f.write(" edited elsewhere")
+            os.utime(b, ns=(0, 0))
+            original(transaction)
+
+        with mock.patch.object(Transaction, "commit", commit_then_fail):
+            with self.assertRaises(ReplaceError) as ctx:
+                self.engine.apply(Query("term", "word"), [a, b])
+        self.assertEqual(ctx.exception.path, b)
+        self.assertEqual(self.read(a), b"term")
+        self.assertEqual(self.read(b), b"term edited elsewhere")
+        self.assertEqual(sorted(os.listdir(self.vault)), ["a.md", "b.md"])
+
+    def test_unencodable_replacement_aborts(self):
+        a = self.write("a.md", "term")
+        b = self.write("b.md", "term café", encoding="cp1252")
+        with self.assertRaises(ReplaceError):
+            self.engine.apply(Query("term", "ω"), [a, b])
+        self.assertEqual(self.read(a), b"term")
+
+    def test_recover_interrupted_commit(self):
+        a = self.write("a.md", "term")
+        b = self.write("b.md", "term")
+        transaction = Transaction(self.vault)
+        for path in (a, b):
+            transaction.stage(path, b"word", os.stat(path))
+        transaction._log.close()
+        transaction._set_state(find_replace._COMMITTING)
+        # Backups sit beside the notes, so restoring them is a rename on the same filesystem.
+        self.assertEqual({os.path.dirname(entry[2]) for entry in transaction.entries}, {self.vault})
+        # Crash after the first rename
+        os.replace(transaction.entries[0][1], a)
+        self.assertEqual(self.read(a), b"word")
+        with mock.patch("os.replace", side_effect=OSError(errno.EXDEV, "Invalid cross-device link")):
+            with self.assertRaises(ReplaceError):
+                recover(self.vault)
+        # Nothing was lost: the next start tries again.
+        self.assertEqual(self.read(a), b"word")
+        self.assertEqual(sorted(recover(self.vault)), [a, b])
+        self.assertEqual((self.read(a), self.read(b)), (b"term", b"term"))
+        self.assertEqual(sorted(os.listdir(self.vault)), ["a.md", "b.md"])
+        self.assertEqual(recover(self.vault), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt6.QtGui import QGuiApplication, QTextDocument, QTextCursor
+from PyQt6.QtCore import QCoreApplication
+from highlighter import MarkdownHighlighter, highlight_line, NORMAL, FRONT_MATTER, MATH, FENCE
+
+if QCoreApplication.instance() is None:
+    app = QGuiApplication(sys.argv)
+
+def styles(text, state=NORMAL, first=False):
+    return [(text[start:start + length], style) for start, length, style in highlight_line(text, state, first)[1]]
+
+class TestHighlightLine(unittest.TestCase):
+    def test_block_level(self):
+        self.assertEqual(styles("## Title"), [("## Title", "heading")])
+        self.assertEqual(styles("---"), [("---", "rule")])
+        self.assertEqual(styles("> quoted")[0], ("> quoted", "quote"))
+        self.assertEqual(styles("- item")[0], ("-", "list"))
+        self.assertEqual(styles("#hashtag"), [])
+
+    def test_inline(self):
+        found = styles("a **b** *c* `d *e*` [l](u) [[w]] $x$")
+        self.assertIn(("**b**", "strong"), found)
+        self.assertIn(("*c*", "emphasis"), found)
+        self.assertIn(("`d *e*`", "code"), found)
+        self.assertIn(("[l](u)", "link"), found)
+        self.assertIn(("[[w]]", "link"), found)
+        self.assertIn(("$x$", "math"), found)
+        # The code span comes last so its format wins over the emphasis inside it.
+        self.assertEqual(found[-1], ("`d *e*`", "code"))
+
+    def test_fences_need_a_matching_close(self):
+        state, _ = highlight_line("````python", NORMAL)
+        self.assertTrue(state & FENCE)
+        self.assertEqual(highlight_line("# not a heading", state), (state, [(0, 15, "code_block")]))
+        self.assertEqual(highlight_line("```", state)[0], state)
+        self.assertEqual(highlight_line("~~~~", state)[0], state)
+        self.assertEqual(highlight_line("`````", state)[0], NORMAL)
+
+    def test_front_matter_only_at_start(self):
+        self.assertEqual(highlight_line("---", NORMAL, first=True)[0], FRONT_MATTER)
+        self.assertEqual(highlight_line("title: x", FRONT_MATTER)[0], FRONT_MATTER)
+        self.assertEqual(highlight_line("---", FRONT_MATTER)[0], NORMAL)
+        self.assertEqual(highlight_line("---", NORMAL)[0], NORMAL)
+
+    def test_math_block(self):
+        self.assertEqual(highlight_line("$$", NORMAL)[0], MATH)
+        self.assertEqual(highlight_line("x^2", MATH), (MATH, [(0, 3, "math")]))
+        self.assertEqual(highlight_line("$$", MATH)[0], NORMAL)
+
+@unittest.skipUnless(isinstance(QCoreApplication.instance(), QGuiApplication), "needs a GUI application")
+class TestMarkdownHighlighter(unittest.TestCase):
+    def setUp(self):
+        self.doc = QTextDocument()
+        self.doc.setPlainText("\n".join(["# Head", "text"] + ["line *%d*" % i for i in range(2000)]))
+        self.highlighter = MarkdownHighlighter(self.doc, budget_ms=0.5)
+
+    def state(self, number):
+        return self.doc.findBlockByNumber(number).userState()
+
+    def styled(self, number):
+        return [(r.start, r.length) for r in self.doc.findBlockByNumber(number).layout().formats()]
+
+    def insert(self, number, text):
+        cursor = QTextCursor(self.doc.findBlockByNumber(number))
+        cursor.insertText(text)
+
+    def test_large_document_is_highlighted_in_slices(self):
+        self.assertTrue(self.highlighter.pending)
+        self.highlighter.finish()
+        self.assertFalse(self.highlighter.pending)
+        self.assertEqual(self.styled(0), [(0, 6)])
+        self.assertEqual(self.styled(2001), [(5, 6)])
+
+    def test_opening_a_fence_restyles_following_blocks(self):
+        self.highlighter.finish()
+        self.insert(1, "```\n")
+        self.highlighter.finish()
+        self.assertTrue(self.state(1) & FENCE)
+        self.assertTrue(self.state(2001) & FENCE)
+        self.assertEqual(self.styled(500), [(0, len("line *498*"))])
+        cursor = QTextCursor(self.doc.findBlockByNumber(1))
+        cursor.select(QTextCursor.SelectionType.BlockUnderCursor)
+        cursor.removeSelectedText()
+        self.highlighter.finish()
+        self.assertEqual(self.state(2000), NORMAL)
+
+    def test_edit_inside_a_block_stops_when_state_is_stable(self):
+        self.highlighter.finish()
+        self.insert(10, "**bold** ")
+        self.assertFalse(self.highlighter.pending)
+        self.assertIn((0, 8), self.styled(10))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,224 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import journal
+from journal import EditJournal, text_delta, apply_delta, read_records, RESTORED, CONFLICT, LOST
+
+class TestTextDelta(unittest.TestCase):
+    def test_delta_covers_only_the_edit(self):
+        old = "a" * 10000 + "middle" + "b" * 10000
+        new = "a" * 10000 + "MIDDLE!" + "b" * 10000
+        at, removed, inserted = text_delta(old, new)
+        self.assertEqual((at, removed, inserted), (10000, 6, "MIDDLE!"))
+        self.assertEqual(apply_delta(old, at, removed, inserted), new)
+
+    def test_repeated_characters(self):
+        for old, new in [("aaa", "aaaa"), ("aaaa", "aa"), ("", "x"), ("x", ""), ("abab", "ab")]:
+            self.assertEqual(apply_delta(old, *text_delta(old, new)), new)
+        self.assertIsNone(text_delta("same", "same"))
+
+class TestEditJournal(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.vault = os.path.join(self.dir, "vault")
+        os.makedirs(self.vault)
+        self.journal_path = os.path.join(self.dir, "journal.bin")
+        self.note = os.path.join(self.vault, "note.md")
+        self.write(self.note, "# Note\n\n" + "body line\n" * 1000)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, path, text):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def open_journal(self):
+        j = EditJournal(self.vault, journal_path=self.journal_path, sync=False)
+        return j, j.recover()
+
+    def crash(self, j):
+        # Everything appended so far reaches the file; nothing else is cleaned up.
+        j.flush()
+        j.close()
+
+    def test_appends_are_proportional_to_the_edit(self):
+        j, _ = self.open_journal()
+        text = self.read(self.note)
+        j.opened(self.note, text)
+        for i in range(20):
+            text = text.replace("# Note", f"# Note {i}", 1) if i == 0 else text.replace(f"# Note {i - 1}", f"# Note {i}", 1)
+            j.record(self.note, text)
+        j.flush()
+        self.assertLess(os.path.getsize(self.journal_path), 2000)
+        self.assertLess(os.path.getsize(self.journal_path), len(text))
+        j.close()
+
+    def test_recovers_unsaved_edits(self):
+        j, _ = self.open_journal()
+        text = self.read(self.note)
+        j.opened(self.note, text)
+        j.record(self.note, text + "typed before the crash\n")
+        j.record(self.note, "Title\n" + text + "typed before the crash\n")
+        self.crash(j)
+
+        j, recovered = self.open_journal()
+        self.assertEqual(recovered, [(self.note, RESTORED)])
+        self.assertEqual(self.read(self.note), "Title\n" + text + "typed before the crash\n")
+        self.assertEqual(read_records(self.journal_path), [])
+        j.close()
+
+    def test_saved_edits_are_not_replayed(self):
+        j, _ = self.open_journal()
+        text = self.read(self.note)
+        j.opened(self.note, text)
+        j.record(self.note, text + "x")
+        j.checkpoint(self.note, text + "xy")
+        self.write(self.note, text + "xy")
+        j.saved(self.note, text + "xy")
+        self.crash(j)
+
+        j, recovered = self.open_journal()
+        self.assertEqual(recovered, [])
+        self.assertEqual(self.read(self.note), text + "xy")
+        j.close()
+
+    def test_crash_during_save(self):
+        j, _ = self.open_journal()
+        text = self.read(self.note)
+        j.opened(self.note, text)
+        j.checkpoint(self.note, text + "saving")
+        j.record(self.note, text + "saving, then more")
+        self.crash(j)
+
+        j, recovered = self.open_journal()
+        self.assertEqual(recovered, [(self.note, RESTORED)])
+        self.assertEqual(self.read(self.note), text + "saving, then more")
+        j.close()
+
+    def test_external_change_is_never_overwritten(self):
+        j, _ = self.open_journal()
+        text = self.read(self.note)
+        j.opened(self.note, text)
+        j.record(self.note, text + "ours")
+        self.crash(j)
+        self.write(self.note, "theirs")
+
+        # The edits were relative to content that is gone: report them lost.
+        j, recovered = self.open_journal()
+        self.assertEqual(recovered, [(self.note, LOST)])
+        self.assertEqual(self.read(self.note), "theirs")
+        j.close()
+
+    def test_torn_tail_is_ignored(self):
+        j, _ = self.open_journal()
+        text = self.read(self.note)
+        j.opened(self.note, text)
+        j.record(self.note, text + "kept")
+        self.crash(j)
+        with open(self.journal_path, 'ab') as f:
+            f.write(b"\x40\x00\x00\x00\x00\x00\x00\x00{\"op\":\"ed")
+
+        j, recovered = self.open_journal()
+        self.assertEqual(recovered, [(self.note, RESTORED)])
+        self.assertEqual(self.read(self.note), text + "kept")
+        j.close()
+
+    def test_rotation_keeps_unsaved_text(self):
+        rotate_bytes = journal._ROTATE_BYTES
+        journal._ROTATE_BYTES = 100
+        try:
+            j, _ = self.open_journal()
+            text = self.read(self.note)
+            j.opened(self.note, text)
+            j.checkpoint(self.note, text + "saved")
+            self.write(self.note, text + "saved")
+            j.record(self.note, text + "saved, and edited after")
+            j.saved(self.note, text + "saved")
+            self.crash(j)
+            self.assertEqual([r["op"] for r in read_records(self.journal_path)], ["base", "text"])
+            self.assertEqual(j.stats()["rotations"], 1)
+        finally:
+            journal._ROTATE_BYTES = rotate_bytes
+
+        j, recovered = self.open_journal()
+        self.assertEqual(recovered, [(self.note, RESTORED)])
+        self.assertEqual(self.read(self.note), text + "saved, and edited after")
+        j.close()
+
+    def test_snapshot_of_externally_changed_file_goes_to_a_copy(self):
+        rotate_bytes = journal._ROTATE_BYTES
+        journal._ROTATE_BYTES = 100
+        try:
+            j, _ = self.open_journal()
+            text = self.read(self.note)
+            j.opened(self.note, text)
+            j.checkpoint(self.note, text + "saved")
+            j.record(self.note, text + "saved, and edited after")
+            j.saved(self.note, text + "saved")
+            self.crash(j)
+        finally:
+            journal._ROTATE_BYTES = rotate_bytes
+        self.write(self.note, "theirs")
+
+        j, recovered = self.open_journal()
+        copy = os.path.join(self.vault, "note (recovered).md")
+        self.assertEqual(recovered, [(copy, CONFLICT)])
+        self.assertEqual(self.read(self.note), "theirs")
+        self.assertEqual(self.read(copy), text + "saved, and edited after")
+        j.close()
+
+    def test_deleted_note_goes_to_a_copy(self):
+        rotate_bytes = journal._ROTATE_BYTES
+        journal._ROTATE_BYTES = 100
+        try:
+            j, _ = self.open_journal()
+            text = self.read(self.note)
+            j.opened(self.note, text)
+            j.checkpoint(self.note, text + "saved")
+            self.write(self.note, text + "saved")
+            j.record(self.note, text + "saved, and edited after")
+            j.saved(self.note, text + "saved")
+            self.crash(j)
+        finally:
+            journal._ROTATE_BYTES = rotate_bytes
+        os.remove(self.note)
+
+        j, recovered = self.open_journal()
+        copy = os.path.join(self.vault, "note (recovered).md")
+        self.assertEqual(recovered, [(copy, CONFLICT)])
+        self.assertFalse(os.path.exists(self.note))
+        self.assertEqual(self.read(copy), text + "saved, and edited after")
+        j.close()
+
+    def test_recovery_keeps_the_encoding(self):
+        for name, encoding, data in [("bom.md", "utf-8-sig", b"\xef\xbb\xbfcaf\xc3\xa9\n"),
+                                     ("ansi.md", "cp1252", b"caf\xe9 \x80\n")]:
+            with self.subTest(encoding=encoding):
+                path = os.path.join(self.vault, name)
+                with open(path, 'wb') as f:
+                    f.write(data)
+                text = data.decode(encoding)
+                j, _ = self.open_journal()
+                j.opened(path, text)
+                j.record(path, text + "ours\n")
+                self.crash(j)
+
+                j, recovered = self.open_journal()
+                self.assertEqual(recovered, [(path, RESTORED)])
+                with open(path, 'rb') as f:
+                    self.assertEqual(f.read(), (text + "ours\n").encode(encoding))
+                j.close()
+
+if __name__ == '__main__':
+    unittest.main()
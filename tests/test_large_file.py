@@ -0,0 +1,62 @@
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import large_file
+from large_file import LargeFile
+
+class TestLargeFile(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def open(self, data):
+        path = os.path.join(self.dir, "big.log")
+        with open(path, "wb") as f:
+            f.write(data)
+        lf = LargeFile(path)
+        self.addCleanup(lf.close)
+        return lf
+
+    def test_index_matches_split(self):
+        text = "".join(f"line {i} {'x' * (i % 50)}\n" for i in range(20000)) + "tail é"
+        old_chunk = large_file._CHUNK
+        large_file._CHUNK = 1000
+        try:
+            lf = self.open(text.encode("utf-8"))
+            lf.build_index()
+        finally:
+            large_file._CHUNK = old_chunk
+        expected = text.split("\n")
+        self.assertEqual(lf.line_count, len(expected))
+        self.assertEqual(lf.lines(0, 3), expected[:3])
+        self.assertEqual(lf.lines(19998, 10), expected[19998:])
+
+    def test_long_line_and_trailing_newline(self):
+        old_chunk = large_file._CHUNK
+        large_file._CHUNK = 16
+        try:
+            lf = self.open(b"a" * 100 + b"\r\nshort\n")
+            lf.build_index()
+        finally:
+            large_file._CHUNK = old_chunk
+        self.assertEqual(lf.line_count, 3)
+        self.assertEqual(lf.lines(0, 5), ["a" * 100, "short", ""])
+
+    def test_lines_before_indexing_and_after_close(self):
+        lf = self.open(b"one\ntwo\n")
+        self.assertEqual(lf.lines(0, 10), [])
+        lf.build_index()
+        self.assertEqual(lf.lines(1, 1), ["two"])
+        lf.close()
+        self.assertEqual(lf.lines(0, 1), [])
+
+if __name__ == '__main__':
+    unittest.main()
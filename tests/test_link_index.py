@@ -0,0 +1,74 @@
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from link_index import LinkIndex, extract_links, note_keys
+
+class TestLinkParsing(unittest.TestCase):
+    def test_wikilink_forms(self):
+        links = extract_links("a.md", "[[Beta]] [[beta#Intro]] [[Gamma|g]] ![[img/Delta.md]] [[]]")
+        self.assertEqual(links, {"beta": 2, "gamma": 1, "img/delta": 1})
+
+    def test_markdown_links_resolve_relative_to_note(self):
+        links = extract_links(os.path.join("x", "a.md"), "[b](../b.md) [c](sub/c%20d.md#h) [w](https://e.com/x.md)")
+        self.assertEqual(links, {"b": 1, "x/sub/c d": 1})
+
+    def test_code_is_ignored(self):
+        self.assertEqual(extract_links("a.md", "```\n[[Nope]]\n```\n`[[no]]` [[Yes]]"), {"yes": 1})
+
+    def test_note_keys(self):
+        self.assertEqual(note_keys(os.path.join("A", "B", "Note.md")), ["a/b/note", "b/note", "note"])
+
+class TestLinkIndex(unittest.TestCase):
+    def setUp(self):
+        self.vault = tempfile.mkdtemp()
+        self.alpha = self.write("alpha.md", "See [[Beta]] and [[Beta]] and [[Missing]].")
+        self.beta = self.write("sub/beta.md", "Back to [alpha](../alpha.md), also [[nowhere]].")
+        self.write("gamma.md", "[[sub/beta]] and [[Missing]]")
+        self.index = LinkIndex(self.vault, db_path=os.path.join(self.vault, ".links.db"))
+        self.index.refresh()
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.vault)
+
+    def write(self, rel, content):
+        path = os.path.join(self.vault, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def names(self, backlinks):
+        return [(os.path.relpath(b.path, self.vault), b.count) for b in backlinks]
+
+    def test_backlinks(self):
+        self.assertEqual(self.names(self.index.backlinks(self.beta)), [("alpha.md", 2), ("gamma.md", 1)])
+        self.assertEqual(self.names(self.index.backlinks(self.alpha)), [(os.path.join("sub", "beta.md"), 1)])
+
+    def test_unresolved(self):
+        report = [(u.target, len(u.sources)) for u in self.index.unresolved()]
+        self.assertEqual(report, [("missing", 2), ("nowhere", 1)])
+
+    def test_incremental_updates(self):
+        self.write("missing.md", "now exists")
+        self.index.update_file(os.path.join(self.vault, "missing.md"))
+        self.assertEqual([u.target for u in self.index.unresolved()], ["nowhere"])
+
+        self.index.update_file(self.alpha, "no links any more")
+        self.assertEqual(self.names(self.index.backlinks(self.beta)), [("gamma.md", 1)])
+
+        os.remove(self.beta)
+        self.index.remove_file(self.beta)
+        self.assertEqual(self.index.backlinks(self.alpha), [])
+
+    def test_refresh_skips_untouched_notes(self):
+        self.assertEqual(self.index.refresh(), (0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
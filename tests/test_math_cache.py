@@ -0,0 +1,82 @@
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from math_cache import MathCache, find_math, formula_key
+
+class TestFindMath(unittest.TestCase):
+    def formulas(self, fragment):
+        return [(tex, display) for _, _, tex, display in find_math(fragment)]
+
+    def test_delimiters(self):
+        fragment = r"<p>$a$ and $$b$$ and \(c\) and \[d\]</p>"
+        self.assertEqual(self.formulas(fragment), [("a", False), ("b", True), ("c", False), ("d", True)])
+
+    def test_skips_code_and_tags(self):
+        fragment = "<p><code>$x$</code> <span title=\"$t$\">$y$</span></p><pre><code>$$z$$</code></pre>"
+        self.assertEqual(self.formulas(fragment), [("y", False)])
+
+    def test_never_across_tags_and_unescapes(self):
+        self.assertEqual(self.formulas("<p>$a <em>b</em> c$</p>"), [])
+        self.assertEqual(self.formulas("<p>$a &lt; b$ and \\$5</p>"), [("a < b", False)])
+
+    def test_multiline_display(self):
+        self.assertEqual(self.formulas("<p>$$\nx^2\n$$</p>"), [("\nx^2\n", True)])
+
+class TestMathCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.db = os.path.join(self.dir, "math.db")
+        self.cache = MathCache(self.db)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.dir)
+
+    def test_rewrite_marks_missing_then_uses_cache(self):
+        fragment = "<p>$x$ then $x$ and $$y$$</p>"
+        html, missing = self.cache.rewrite(fragment)
+        x, y = formula_key("x", False), formula_key("y", True)
+        self.assertEqual(missing, [x, y])
+        self.assertIn(f'<span class="acropad-math" data-key="{x}" data-tex="x" data-display="0">$x$</span>', html)
+        self.assertIn('data-display="1">$$y$$</span>', html)
+
+        self.cache.store([(x, "<svg>X</svg>")])
+        html, missing = self.cache.rewrite(fragment)
+        self.assertEqual(missing, [y])
+        self.assertTrue(html.startswith("<p><svg>X</svg> then <svg>X</svg> and <span"))
+
+    def test_plain_fragment_untouched(self):
+        self.assertEqual(self.cache.rewrite("<p>no math</p>"), ("<p>no math</p>", []))
+
+    def test_persists_across_sessions(self):
+        key = formula_key("e^{i\\pi}", False)
+        self.cache.store([(key, "<svg>E</svg>")])
+        self.cache.close()
+        self.cache = MathCache(self.db)
+        self.assertEqual(self.cache.rewrite("<p>$e^{i\\pi}$</p>"), ("<p><svg>E</svg></p>", []))
+        stats = self.cache.stats()
+        self.assertEqual((stats["disk_hits"], stats["misses"]), (1, 0))
+        self.cache.rewrite("<p>$e^{i\\pi}$ $new$</p>")
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["disk_hits"], stats["misses"]), (1, 1, 1))
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 3)
+
+    def test_trim_drops_least_recently_used(self):
+        self.cache.max_bytes = 25
+        self.cache.store([("old", "o" * 10)])
+        self.cache._conn.execute("UPDATE formulas SET used = 0 WHERE key = 'old'")
+        self.cache.store([("mid", "m" * 10), ("new", "n" * 10)])
+        self.cache.trim()
+        self.cache.close()
+        self.cache = MathCache(self.db, memory_bytes=1024)
+        self.assertEqual(set(self.cache.lookup(["old", "mid", "new"])), {"mid", "new"})
+        self.assertEqual(self.cache.stats()["evicted"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
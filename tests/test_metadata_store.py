@@ -0,0 +1,106 @@
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from metadata_store import VaultMetadataStore, ScanBatches
+
+class TestVaultMetadataStore(unittest.TestCase):
+    def setUp(self):
+        self.vault = tempfile.mkdtemp()
+        self.db = os.path.join(tempfile.mkdtemp(), "metadata.db")
+        self.write("a.md", "# Alpha title\n")
+        self.write("sub/b.md", "no heading")
+        self.write("sub/deep/c.txt", "")
+        self.write("image.png", "")
+
+    def tearDown(self):
+        shutil.rmtree(self.vault)
+        shutil.rmtree(os.path.dirname(self.db))
+
+    def write(self, rel, content):
+        path = os.path.join(self.vault, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+    def open_store(self):
+        store = VaultMetadataStore(self.vault, db_path=self.db)
+        self.addCleanup(store.close)
+        return store
+
+    def test_first_reconcile_populates_cache(self):
+        store = self.open_store()
+        self.assertEqual(store.load_paths(), [])
+        self.assertEqual(store.reconcile(), (3, 0))
+        expected = sorted(["a.md", os.path.join("sub", "b.md"), os.path.join("sub", "deep", "c.txt")])
+        self.assertEqual(self.open_store().load_paths(), expected)
+        st = os.stat(os.path.join(self.vault, "a.md"))
+        self.assertEqual(store.get("a.md"), (st.st_size, st.st_mtime_ns))
+
+    def test_reconcile_reports_only_changes(self):
+        self.open_store().reconcile()
+        store = self.open_store()
+        self.write("sub/new.md", "")
+        shutil.rmtree(os.path.join(self.vault, "sub", "deep"))
+        batches = []
+        self.assertEqual(store.reconcile(on_batch=lambda a, r: batches.append((a, r))), (1, 1))
+        self.assertEqual(batches, [([os.path.join("sub", "new.md")], [os.path.join("sub", "deep", "c.txt")])])
+        self.assertEqual(store.reconcile(), (0, 0))
+
+    def test_apply_changes(self):
+        store = self.open_store()
+        store.reconcile()
+        self.write("sub/new.md", "watched")
+        os.remove(os.path.join(self.vault, "a.md"))
+        store.apply_changes(updated=[os.path.join("sub", "new.md")], removed=["a.md"])
+        self.assertIn(os.path.join("sub", "new.md"), store.load_paths())
+        self.assertIsNone(store.get("a.md"))
+        # Already recorded: the reconcile finds nothing left to report
+        self.assertEqual(store.reconcile(), (0, 0))
+
+    def test_reconcile_streams_one_batch_per_changed_directory(self):
+        batches = []
+        self.open_store().reconcile(on_batch=lambda a, r: batches.append(a))
+        self.assertEqual(sorted(batches), [["a.md"], [os.path.join("sub", "b.md")],
+                                           [os.path.join("sub", "deep", "c.txt")]])
+
+    def test_cancelled_reconcile_stops_between_directories(self):
+        store = self.open_store()
+        batches = []
+        self.assertIsNone(store.reconcile(on_batch=lambda a, r: batches.append(a),
+                                          should_cancel=lambda: len(batches) >= 1))
+        self.assertEqual(len(batches), 1)
+        # The directories it didn't reach are picked up by the next reconcile
+        self.assertEqual(store.reconcile(), (2, 0))
+
+class TestScanBatches(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.emitted = []
+        self.batches = ScanBatches(lambda a, r: self.emitted.append((a, r)), max_items=3, interval=1.0,
+                                   clock=lambda: self.now)
+
+    def test_coalesces_until_full(self):
+        self.batches(["a"], [])
+        self.batches(["b"], [])
+        self.assertEqual(self.emitted, [])
+        self.batches(["c"], ["x"])
+        self.batches(["d"], [])
+        self.batches.flush()
+        self.assertEqual(self.emitted, [(["a", "b", "c"], ["x"]), (["d"], [])])
+
+    def test_emits_after_interval(self):
+        self.batches(["a"], [])
+        self.now = 1.5
+        self.batches(["b"], [])
+        self.assertEqual(self.emitted, [(["a", "b"], [])])
+        self.batches.flush()
+        self.assertEqual(len(self.emitted), 1)
+
+if __name__ == '__main__':
+    unittest.main()
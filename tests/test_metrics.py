@@ -0,0 +1,59 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+from unittest import mock
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from metrics import Histogram, Metrics, metrics, configure_from_env
+
+class TestHistogram(unittest.TestCase):
+    def test_percentiles_within_a_bucket(self):
+        hist = Histogram()
+        for ms in range(1, 101):
+            hist.observe(ms / 1000)
+        self.assertEqual(hist.count, 100)
+        self.assertAlmostEqual(hist.percentile(0.5), 0.050, delta=0.050 * 0.2)
+        self.assertAlmostEqual(hist.percentile(0.99), 0.099, delta=0.099 * 0.2)
+        self.assertEqual(hist.percentile(1.0), 0.1)
+
+class TestMetrics(unittest.TestCase):
+    def test_timed_gauges_and_dump(self):
+        m = Metrics()
+        with m.timed("op"):
+            pass
+        m.timer("op")(lambda: None)()
+        m.gauge("active", lambda: 3)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "metrics.json")
+            m.dump(path)
+            with open(path) as f:
+                snap = json.load(f)
+        self.assertEqual(snap["histograms"]["op"]["count"], 2)
+        self.assertEqual(snap["gauges"]["active"], {"value": 3})
+
+    def test_profiling_writes_stats_for_matching_names(self):
+        m = Metrics()
+        with tempfile.TemporaryDirectory() as tmp:
+            m.enable_profiling(["render"], directory=tmp, trace_memory=False)
+            with m.timed("render.blocks"):
+                sum(range(1000))
+            with m.timed("save.write"):
+                pass
+            self.assertEqual(sorted(os.listdir(tmp)), ["render.blocks-1.prof"])
+        self.assertEqual(m.histogram("save.write").count, 1)
+
+    def test_dump_is_opt_in(self):
+        with mock.patch.dict(os.environ, {}, clear=True):
+            self.assertIsNone(configure_from_env(["acropad"]))
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "out", "metrics.json")
+                self.assertEqual(configure_from_env(["acropad", f"--metrics={path}"]), path)
+                metrics.stop_dumper(final_dump=True)
+                self.assertTrue(os.path.exists(path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from note_index import refresh_index
+
+class TestRefreshIndex(unittest.TestCase):
+    def setUp(self):
+        self.vault = tempfile.mkdtemp()
+        for i in range(5):
+            self.write(f"n{i}.md", f"note {i}")
+
+    def tearDown(self):
+        shutil.rmtree(self.vault)
+
+    def write(self, rel, content):
+        with open(os.path.join(self.vault, rel), "w") as f:
+            f.write(content)
+
+    def test_batches_changes_and_reports_removed(self):
+        st = os.stat(os.path.join(self.vault, "n0.md"))
+        known = {"n0.md": (st.st_mtime_ns, st.st_size), "gone.md": (0, 0)}
+        calls = []
+        counts = refresh_index(self.vault, known, lambda updates, removed: calls.append((updates, removed)),
+                               batch_size=2)
+        self.assertEqual(counts, (4, 1))
+        self.assertEqual([len(updates) for updates, _ in calls], [2, 2, 0])
+        self.assertEqual(calls[-1][1], ["gone.md"])
+        updated = sorted(rel for updates, _ in calls for rel, _, _, _ in updates)
+        self.assertEqual(updated, ["n1.md", "n2.md", "n3.md", "n4.md"])
+
+    def test_notes_are_decoded_like_the_editor_reads_them(self):
+        with open(os.path.join(self.vault, "legacy.md"), "wb") as f:
+            f.write("café\r\n".encode("cp1252"))
+        calls = []
+        refresh_index(self.vault, {}, lambda updates, removed: calls.extend(updates))
+        self.assertIn(("legacy.md", "café\n"), [(rel, content) for rel, content, _, _ in calls])
+
+    def test_cancel(self):
+        calls = []
+        self.assertIsNone(refresh_index(self.vault, {}, lambda *args: calls.append(args), should_cancel=lambda: True))
+        self.assertEqual(calls, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from quick_switcher import QuickSwitcherIndex
+
+PATHS = [
+    os.path.join("projects", "acropad", "roadmap.md"),
+    os.path.join("projects", "road trip.md"),
+    os.path.join("daily", "2024-05-01.md"),
+    os.path.join("meetings", "weekly sync.md"),
+    os.path.join("archive", "meetings", "kickoff.md"),
+    "readme.md",
+    "acropad notes.md",
+]
+
+class TestQuickSwitcherIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = QuickSwitcherIndex(PATHS)
+
+    def test_name_match_beats_folder_match(self):
+        self.assertEqual(self.index.search("acropad"), ["acropad notes.md",
+                                                        os.path.join("projects", "acropad", "roadmap.md")])
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self.index.search("meetings sync"), [os.path.join("meetings", "weekly sync.md")])
+
+    def test_typo_falls_back_to_fuzzy(self):
+        self.assertEqual(self.index.search("roadmpa")[0], os.path.join("projects", "acropad", "roadmap.md"))
+
+    def test_two_letter_query_matches_word_starts(self):
+        self.assertIn(os.path.join("meetings", "weekly sync.md"), self.index.search("we"))
+
+    def test_single_letter_query(self):
+        self.assertEqual(self.index.search("k")[0], os.path.join("archive", "meetings", "kickoff.md"))
+
+    def test_no_match(self):
+        self.assertEqual(self.index.search("zzqx"), [])
+
+    def test_recent_files_boosted_and_listed_for_empty_query(self):
+        self.assertEqual(self.index.search(""), [])
+        sync = os.path.join("meetings", "weekly sync.md")
+        kickoff = os.path.join("archive", "meetings", "kickoff.md")
+        self.index.touch(kickoff)
+        self.index.touch(sync)
+        self.assertEqual(self.index.search(""), [sync, kickoff])
+        self.assertEqual(self.index.search("meetings")[0], sync)
+
+    def test_add_and_remove(self):
+        new = os.path.join("projects", "roadshow.md")
+        self.index.add(new)
+        self.assertIn(new, self.index.search("roadsh"))
+        self.assertEqual(len(self.index), len(PATHS) + 1)
+        self.index.remove(new)
+        self.index.remove(new)
+        self.assertNotIn(new, self.index.search("roadsh"))
+        self.assertEqual(len(self.index), len(PATHS))
+
+    def test_removed_files_leave_recent_list(self):
+        readme = "readme.md"
+        self.index.touch(readme)
+        self.index.remove(readme)
+        self.assertEqual(self.index.search(""), [])
+
+    def test_rebuild_after_many_removals(self):
+        index = QuickSwitcherIndex([f"note-{i}.md" for i in range(2000)])
+        for i in range(1500):
+            index.remove(f"note-{i}.md")
+        self.assertEqual(len(index), 500)
+        self.assertEqual(index.search("note 1999"), ["note-1999.md"])
+        self.assertNotIn("note-5.md", index.search("note 5"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from renderer import split_blocks, render_blocks, PreviewDocument, page_html, preview_shell, MATHJAX_CDN
+
+class TestBlockSplitting(unittest.TestCase):
+    def test_paragraphs(self):
+        self.assertEqual(split_blocks("# Title\n\nOne\ntwo\n\n\nThree"), ["# Title", "One\ntwo", "Three"])
+
+    def test_fenced_code_keeps_blank_lines(self):
+        md = "```\na\n\nb\n```\n\nafter"
+        self.assertEqual(split_blocks(md), ["```\na\n\nb\n```", "after"])
+
+    def test_indented_continuation(self):
+        md = "- item\n\n    more of item\n\nnext"
+        self.assertEqual(split_blocks(md), ["- item\n\n    more of item", "next"])
+
+    def test_reference_links_resolve_per_block(self):
+        keys, rendered = render_blocks("See [docs][d].\n\n[d]: http://example.com")
+        self.assertIn('href="http://example.com"', rendered[keys[0]])
+
+    def test_cancelled_render_returns_none(self):
+        self.assertIsNone(render_blocks("A\n\nB", should_cancel=lambda: True))
+        keys, rendered = render_blocks("A\n\nB", should_cancel=lambda: False)
+        self.assertEqual(len(rendered), 2)
+
+class TestPreviewDocument(unittest.TestCase):
+    def test_patch_only_changed_block(self):
+        doc = PreviewDocument()
+        doc.apply(*render_blocks("# A\n\nB\n\nC"))
+        patch = doc.apply(*render_blocks("# A\n\nB changed\n\nC", doc.html))
+        self.assertEqual(patch, (1, 1, ["<p>B changed</p>"]))
+
+    def test_insert_and_noop(self):
+        doc = PreviewDocument()
+        doc.apply(*render_blocks("A\n\nC"))
+        self.assertEqual(doc.apply(*render_blocks("A\n\nB\n\nC", doc.html)), (1, 0, ["<p>B</p>"]))
+        self.assertIsNone(doc.apply(*render_blocks("A\n\nB\n\nC", doc.html)))
+
+class TestPreviewPage(unittest.TestCase):
+    def test_page_uses_local_assets(self):
+        html = page_html("<p>x</p>", "file:///app/assets/preview")
+        self.assertIn('href="file:///app/assets/preview/preview.css"', html)
+        self.assertIn('<div id="content"><p>x</p></div>', html)
+        self.assertNotIn("fonts.googleapis.com", html)
+
+    def test_shell_loads_preview_script(self):
+        html = preview_shell()
+        self.assertIn('preview.js"></script>', html)
+        self.assertIn('<div id="content"></div>', html)
+        self.assertTrue("vendor/mathjax/tex-mml-svg.js" in html or MATHJAX_CDN in html)
+        # Formulas are typeset one by one (and cached), not by a page-wide pass.
+        self.assertIn("typeset:false", html)
+        self.assertIn("fontCache:'local'", html)
+        self.assertNotIn("typeset:false", page_html("<p>x</p>"))
+
+if __name__ == '__main__':
+    unittest.main()
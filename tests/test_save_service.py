@@ -0,0 +1,85 @@
+import unittest
+import tempfile
+import shutil
+import threading
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import save_service
+from save_service import SaveService, atomic_write
+
+class TestAtomicWrite(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_replaces_file_and_leaves_no_temp(self):
+        path = os.path.join(self.dir, "note.md")
+        atomic_write(path, b"one")
+        atomic_write(path, b"two")
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), b"two")
+        self.assertEqual(os.listdir(self.dir), ["note.md"])
+
+class TestSaveService(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "note.md")
+        self.service = SaveService()
+
+    def tearDown(self):
+        self.service.shutdown()
+        shutil.rmtree(self.dir)
+
+    def read(self):
+        with open(self.path, encoding="utf-8") as f:
+            return f.read()
+
+    def test_coalesces_to_latest_content(self):
+        release = threading.Event()
+        real_write = save_service.atomic_write
+        writes = []
+
+        def slow_write(path, data):
+            release.wait(5)
+            writes.append(data)
+            real_write(path, data)
+
+        save_service.atomic_write = slow_write
+        try:
+            for i in range(5):
+                self.service.submit(self.path, f"v{i}")
+            release.set()
+            self.assertTrue(self.service.flush(timeout=5))
+        finally:
+            save_service.atomic_write = real_write
+        self.assertEqual(self.read(), "v4")
+        self.assertEqual(writes, [b"v0", b"v4"])
+        stats = self.service.stats()
+        self.assertEqual((stats["writes"], stats["coalesced"]), (2, 3))
+
+    def test_skips_unchanged_content_and_reports(self):
+        done = []
+        self.service.submit(self.path, "same", on_done=lambda p, c: done.append(c))
+        self.service.flush()
+        self.service.submit(self.path, "same", on_done=lambda p, c: done.append(c))
+        self.service.flush()
+        stats = self.service.stats()
+        self.assertEqual((stats["writes"], stats["skipped"]), (1, 1))
+        self.assertEqual(done, ["same", "same"])
+        self.assertEqual(stats["write_amplification"], 0.5)
+
+    def test_error_callback(self):
+        errors = []
+        bad = os.path.join(self.dir, "missing", "note.md")
+        self.service.submit(bad, "x", on_error=lambda p, err: errors.append(err[0]))
+        self.service.flush()
+        self.assertEqual(errors, [FileNotFoundError])
+
+if __name__ == '__main__':
+    unittest.main()
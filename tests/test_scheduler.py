@@ -0,0 +1,101 @@
+import unittest
+import sys
+import os
+import threading
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt6.QtCore import QCoreApplication, QThreadPool
+from scheduler import TaskScheduler, INTERACTIVE, INDEXING, BACKGROUND
+
+app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+class TestTaskScheduler(unittest.TestCase):
+    def setUp(self):
+        self.pool = QThreadPool()
+        self.gate = threading.Event()
+        self.ran = []
+
+    def tearDown(self):
+        self.gate.set()
+        self.pool.waitForDone(5000)
+
+    def blocker(self):
+        self.gate.wait(5)
+        self.ran.append("blocker")
+
+    def record(self, name):
+        self.ran.append(name)
+        return name
+
+    def test_runs_most_urgent_first(self):
+        self.pool.setMaxThreadCount(1)
+        scheduler = TaskScheduler(self.pool, reserved_threads=0)
+        scheduler.submit(self.blocker)
+        scheduler.submit(self.record, "background", priority=BACKGROUND)
+        scheduler.submit(self.record, "indexing", priority=INDEXING)
+        scheduler.submit(self.record, "interactive", priority=INTERACTIVE)
+        self.gate.set()
+        self.pool.waitForDone(5000)
+        self.assertEqual(self.ran, ["blocker", "interactive", "indexing", "background"])
+
+    def test_same_key_replaces_queued_task(self):
+        self.pool.setMaxThreadCount(1)
+        scheduler = TaskScheduler(self.pool, reserved_threads=0)
+        scheduler.submit(self.blocker)
+        for name in ("a", "b", "c"):
+            scheduler.submit(self.record, name, key="open")
+        scheduler.submit(self.record, "d", key="other")
+        scheduler.cancel("other")
+        self.gate.set()
+        self.pool.waitForDone(5000)
+        self.assertEqual(self.ran, ["blocker", "c"])
+        self.assertEqual(scheduler.stats()["coalesced"], 3)
+        # Superseded and explicitly cancelled tasks both count; finished ones don't
+        scheduler.cancel("open")
+        self.assertEqual(scheduler.stats()["cancelled"], 3)
+
+    def test_thread_reserved_for_interactive_work(self):
+        self.pool.setMaxThreadCount(2)
+        scheduler = TaskScheduler(self.pool, reserved_threads=1)
+        scheduler.submit(self.blocker, priority=BACKGROUND)
+        scheduler.submit(self.record, "indexing", priority=INDEXING)
+        done = threading.Event()
+        scheduler.submit(lambda: done.set(), priority=INTERACTIVE)
+        self.assertTrue(done.wait(5))
+        self.assertEqual(self.ran, [])
+        self.gate.set()
+        self.pool.waitForDone(5000)
+        self.assertEqual(self.ran, ["blocker", "indexing"])
+
+    def test_full_queue_rejects(self):
+        self.pool.setMaxThreadCount(1)
+        scheduler = TaskScheduler(self.pool, reserved_threads=0, limits=(None, None, 1, 1))
+        scheduler.submit(self.blocker)
+        self.assertIsNotNone(scheduler.submit(self.record, "first", priority=INDEXING))
+        self.assertIsNone(scheduler.submit(self.record, "second", priority=INDEXING))
+        self.assertEqual(scheduler.stats()["rejected"], 1)
+
+    def test_cancelled_result_is_not_delivered(self):
+        scheduler = TaskScheduler(self.pool)
+        results = []
+        scheduler.submit(self.record, "x", key="render", on_result=results.append)
+        self.pool.waitForDone(5000)
+        scheduler.cancel("render")  # Finished, but the result has not been delivered yet
+        app.processEvents()
+        self.assertEqual(results, [])
+        scheduler.submit(self.record, "y", key="render", on_result=results.append)
+        self.pool.waitForDone(5000)
+        app.processEvents()
+        self.assertEqual(results, ["y"])
+
+    def test_cancellable_task_gets_token(self):
+        scheduler = TaskScheduler(self.pool)
+        seen = []
+        scheduler.submit(lambda should_cancel: seen.append(should_cancel()), cancellable=True)
+        self.pool.waitForDone(5000)
+        self.assertEqual(seen, [False])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from search_index import SearchIndex, build_match_query
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.vault = tempfile.mkdtemp()
+        self.write("alpha.md", "# Alpha\n\nThe quick brown fox jumps.")
+        self.write("sub/beta.md", "# Beta\n\nbrown bears and a quick fox")
+        self.write(".git/ignored.md", "quick brown fox")
+        self.index = SearchIndex(self.vault, db_path=os.path.join(self.vault, ".git", "index.db"))
+        self.index.refresh()
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.vault)
+
+    def write(self, rel, content):
+        path = os.path.join(self.vault, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def titles(self, query):
+        return [hit.title for hit in self.index.search(query)]
+
+    def test_term_and_phrase_queries(self):
+        self.assertEqual(sorted(self.titles("brown fox")), ["Alpha", "Beta"])
+        self.assertEqual(self.titles('"quick brown"'), ["Alpha"])
+
+    def test_prefix_while_typing(self):
+        self.assertEqual(sorted(self.titles("bea")), ["Beta"])
+        self.assertEqual(build_match_query("bea "), '"bea"')
+
+    def test_incremental_update_and_refresh(self):
+        path = self.write("alpha.md", "# Alpha\n\nnow about zebras")
+        self.index.update_file(path)
+        self.assertEqual(self.titles("zebras"), ["Alpha"])
+        self.assertEqual(self.titles('"quick brown"'), [])
+        os.remove(os.path.join(self.vault, "sub", "beta.md"))
+        self.assertEqual(self.index.refresh(), (0, 1))
+        self.assertEqual(self.titles("bears"), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from startup import StartupTimer, ImportTimer
+
+class TestImportTimer(unittest.TestCase):
+    def test_times_nested_imports(self):
+        with tempfile.TemporaryDirectory() as root:
+            with open(os.path.join(root, "acropad_outer_mod.py"), 'w') as f:
+                f.write("import time\nimport acropad_inner_mod\ntime.sleep(0.02)\n")
+            with open(os.path.join(root, "acropad_inner_mod.py"), 'w') as f:
+                f.write("import time\ntime.sleep(0.03)\nVALUE = 1\n")
+            sys.path.insert(0, root)
+            timer = ImportTimer()
+            timer.install()
+            try:
+                import acropad_outer_mod
+            finally:
+                timer.uninstall()
+                sys.path.remove(root)
+                sys.modules.pop("acropad_outer_mod", None)
+                sys.modules.pop("acropad_inner_mod", None)
+        self.assertNotIn(timer, sys.meta_path)
+        outer_self, outer_total = timer.times["acropad_outer_mod"]
+        inner_self, inner_total = timer.times["acropad_inner_mod"]
+        self.assertGreaterEqual(inner_self, 0.03)
+        self.assertGreaterEqual(outer_total, outer_self + inner_total - 0.001)
+        self.assertLess(outer_self, 0.03)
+        self.assertEqual(timer.slowest(1)[0][0], "acropad_inner_mod")
+
+class TestStartupTimer(unittest.TestCase):
+    def test_report(self):
+        timer = StartupTimer()
+        with timer.phase("import things"):
+            pass
+        self.assertGreater(timer.mark("first_window"), 0)
+        report = timer.report()
+        self.assertIn("import things", report)
+        self.assertIn("@ first_window", report)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+from unittest import mock
+import tempfile
+import shutil
+import codecs
+import time
+import threading
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import storage
+import save_service
+from storage import Storage, decode_text
+
+class TestDecodeText(unittest.TestCase):
+    def test_utf8(self):
+        self.assertEqual(decode_text("café".encode("utf-8")), ("café", "utf-8"))
+
+    def test_bom_decides(self):
+        self.assertEqual(decode_text(codecs.BOM_UTF8 + b"hi"), ("hi", "utf-8-sig"))
+        self.assertEqual(decode_text("hé".encode("utf-16")), ("hé", "utf-16"))
+
+    def test_legacy_fallbacks(self):
+        self.assertEqual(decode_text("café – ok".encode("cp1252")), ("café – ok", "cp1252"))
+        # 0x81 is undefined in Windows-1252
+        self.assertEqual(decode_text(b"a\x81"), ("a\x81", "latin-1"))
+
+    def test_newlines_normalized(self):
+        self.assertEqual(decode_text(b"a\r\nb\rc\n")[0], "a\nb\nc\n")
+
+class TestStorage(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.storage = Storage(max_workers=2)
+
+    def tearDown(self):
+        self.storage.shutdown()
+        shutil.rmtree(self.dir)
+
+    def path(self, name, data=None):
+        path = os.path.join(self.dir, name)
+        if data is not None:
+            with open(path, "wb") as f:
+                f.write(data)
+        return path
+
+    def wait_prefetched(self, count):
+        for _ in range(200):
+            if self.storage.stats()["prefetched"] >= count:
+                return
+            time.sleep(0.01)
+        self.fail("prefetch did not finish")
+
+    def test_read(self):
+        path = self.path("a.md", b"# A\n")
+        result = self.storage.read(path)
+        self.assertEqual((result.path, result.text, result.encoding, result.size), (path, "# A\n", "utf-8", 4))
+        self.assertEqual(self.storage.read_async(path).result(timeout=5).text, "# A\n")
+
+    def test_write_keeps_encoding(self):
+        path = self.path("legacy.md", "café".encode("cp1252"))
+        self.storage.read(path)
+        self.storage.write(path, "crème")
+        self.assertTrue(self.storage.flush(timeout=5))
+        with open(path, "rb") as f:
+            self.assertEqual(f.read(), "crème".encode("cp1252"))
+
+    def test_prefetch_hit(self):
+        path = self.path("a.md", b"one")
+        self.storage.prefetch([path])
+        self.wait_prefetched(1)
+        self.assertEqual(self.storage.read(path).text, "one")
+        self.assertEqual(self.storage.stats()["read_ahead_hits"], 1)
+        # Taken out of the cache by the read
+        self.assertEqual(self.storage.stats()["read_ahead"]["entries"], 0)
+
+    def test_prefetched_entry_ignored_once_file_changes(self):
+        path = self.path("a.md", b"one")
+        self.storage.prefetch([path])
+        self.wait_prefetched(1)
+        self.path("a.md", b"changed")
+        os.utime(path, ns=(0, 0))
+        self.assertEqual(self.storage.read(path).text, "changed")
+        self.assertEqual(self.storage.stats()["read_ahead_hits"], 0)
+
+    def test_batched_operations(self):
+        paths = [self.path(f"n{i}.md", f"note {i}".encode()) for i in range(storage._BATCH * 2 + 3)]
+        missing = os.path.join(self.dir, "missing.md")
+        infos = self.storage.stat_many(paths + [missing]).result(timeout=5)
+        self.assertIsNone(infos[missing])
+        self.assertEqual(infos[paths[-1]].size, len(f"note {len(paths) - 1}"))
+        results = self.storage.read_many(paths + [missing]).result(timeout=5)
+        self.assertEqual(results[paths[5]].text, "note 5")
+        self.assertIsInstance(results[missing], OSError)
+        self.assertEqual(self.storage.stat_many([]).result(timeout=5), {})
+
+    def test_list_notes(self):
+        self.path("a.md", b"a")
+        os.mkdir(os.path.join(self.dir, "sub"))
+        self.path(os.path.join("sub", "b.md"), b"bb")
+        infos = self.storage.list_async(self.dir).result(timeout=5)
+        self.assertEqual(sorted(os.path.relpath(i.path, self.dir) for i in infos),
+                         ["a.md", os.path.join("sub", "b.md")])
+
+    def test_create_never_replaces(self):
+        path = self.path("new.md")
+        info = self.storage.create_async(path, "# New").result(timeout=5)
+        self.assertEqual(info.path, path)
+        with self.assertRaises(FileExistsError):
+            self.storage.create(path, "other")
+        self.assertEqual(self.storage.read(path).text, "# New")
+
+    def test_shutdown_gives_up_on_a_stuck_save(self):
+        release = threading.Event()
+        with mock.patch.object(save_service, "atomic_write", lambda path, data: release.wait(5)):
+            self.storage.write(self.path("a.md"), "stuck")
+            started = time.monotonic()
+            self.assertFalse(self.storage.shutdown(timeout=0.1))
+            self.assertLess(time.monotonic() - started, 2)
+            release.set()
+
+if __name__ == '__main__':
+    unittest.main()
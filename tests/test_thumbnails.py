@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt6.QtGui import QGuiApplication, QImage, QColor
+from PyQt6.QtCore import QCoreApplication
+from thumbnails import ThumbnailCache, file_url, local_image_path
+
+if QCoreApplication.instance() is None:
+    app = QGuiApplication(sys.argv)
+
+class TestThumbnailCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.dir, "cache")
+        self.cache = ThumbnailCache(self.cache_dir, max_size=100)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def image(self, name, width, height, color="#336699"):
+        img = QImage(width, height, QImage.Format.Format_RGB32)
+        img.fill(QColor(color))
+        path = os.path.join(self.dir, name)
+        img.save(path)
+        return path
+
+    def test_large_images_are_downscaled(self):
+        path = self.image("scan.png", 800, 400)
+        self.assertIsNone(self.cache.lookup(path))
+        _, thumb = self.cache.generate(path)
+        self.assertEqual(QImage(thumb).size().width(), 100)
+        self.assertEqual(QImage(thumb).size().height(), 50)
+        self.assertEqual(self.cache.lookup(path), thumb)
+
+    def test_small_images_are_used_as_they_are(self):
+        path = self.image("icon.png", 32, 32)
+        self.assertEqual(self.cache.generate(path), (path, path))
+        self.assertEqual(self.cache.lookup(path), path)
+
+    def test_identical_content_shares_a_thumbnail(self):
+        path = self.image("a.png", 800, 400)
+        copy = os.path.join(self.dir, "b.png")
+        shutil.copy(path, copy)
+        _, thumb = self.cache.generate(path)
+        self.assertEqual(self.cache.generate(copy), (copy, thumb))
+        self.assertEqual(self.cache.stats()["reused"], 1)
+
+    def test_changed_image_needs_a_new_thumbnail(self):
+        path = self.image("a.png", 800, 400)
+        self.cache.generate(path)
+        self.image("a.png", 900, 400, color="#aa0000")
+        self.assertIsNone(self.cache.lookup(path))
+
+    def test_rewrite(self):
+        done = self.image("done.png", 800, 400)
+        _, thumb = self.cache.generate(done)
+        pending = self.image("pending.png", 800, 400, color="#aa0000")
+        html = '<p><img alt="a" src="done.png" /> <img src="pending.png"> <img src="https://example.com/x.png"></p>'
+        rewritten, missing = self.cache.rewrite(html, self.dir)
+        self.assertEqual(missing, [pending])
+        self.assertIn(f'src="{file_url(thumb)}" data-full="{file_url(done)}"', rewritten)
+        self.assertIn('class="acropad-pending"', rewritten)
+        self.assertIn('<img src="https://example.com/x.png">', rewritten)
+
+    def test_local_image_path(self):
+        self.assertEqual(local_image_path("img/a%20b.png", "/vault"), os.path.normpath("/vault/img/a b.png"))
+        self.assertEqual(local_image_path("file:///tmp/x.png", "/vault"), "/tmp/x.png")
+        self.assertIsNone(local_image_path("data:image/png;base64,AAAA", "/vault"))
+        self.assertIsNone(local_image_path("//cdn.example.com/x.png", "/vault"))
+
+    def test_evicts_least_recently_used_over_budget(self):
+        first = self.image("1.png", 800, 400, color="#110000")
+        _, first_thumb = self.cache.generate(first)
+        self.cache.max_bytes = os.path.getsize(first_thumb) * 2 - 1
+        os.utime(first_thumb, (1, 1))
+        self.cache.generate(self.image("2.png", 800, 400, color="#220000"))
+        self.assertFalse(os.path.exists(first_thumb))
+        self.assertIsNone(self.cache.lookup(first))
+        self.assertEqual(self.cache.stats()["evicted"], 1)
+
+    def test_index_survives_restart(self):
+        path = self.image("a.png", 800, 400)
+        _, thumb = self.cache.generate(path)
+        self.cache.save()
+        self.assertEqual(ThumbnailCache(self.cache_dir, max_size=100).lookup(path), thumb)
+
+if __name__ == '__main__':
+    unittest.main()
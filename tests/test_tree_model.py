@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PyQt6.QtCore import QCoreApplication, QModelIndex, Qt
+from file_table import FileTable
+from tree_model import VaultTreeModel
+
+app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+BASE = os.path.abspath("vault")
+
+class TestVaultTreeModel(unittest.TestCase):
+    def setUp(self):
+        self.model = VaultTreeModel(BASE)
+        table = FileTable()
+        table.extend([("b.md", 0, 0), (os.path.join("docs", "guide.md"), 0, 0), ("a.md", 0, 0)])
+        self.model.set_table(table)
+        self.events = []
+        self.model.rowsInserted.connect(lambda parent, first, last: self.events.append(("+", self.name(parent), first)))
+        self.model.rowsRemoved.connect(lambda parent, first, last: self.events.append(("-", self.name(parent), first)))
+
+    def name(self, index):
+        return self.model.data(index) if index.isValid() else None
+
+    def children(self, parent=QModelIndex()):
+        return [self.model.data(self.model.index(row, 0, parent)) for row in range(self.model.rowCount(parent))]
+
+    def test_structure(self):
+        self.assertEqual(self.children(), ["docs", "a.md", "b.md"])
+        docs = self.model.index(0, 0)
+        self.assertEqual(self.children(docs), ["guide.md"])
+        guide = self.model.index(0, 0, docs)
+        self.assertEqual(guide.parent(), docs)
+        self.assertFalse(docs.parent().isValid())
+        self.assertEqual(self.model.rowCount(guide), 0)
+        self.assertTrue(self.model.hasChildren(docs))
+        self.assertFalse(self.model.hasChildren(guide))
+        self.assertEqual(self.model.file_path(guide), os.path.join(BASE, "docs", "guide.md"))
+        self.assertEqual(self.model.data(guide, Qt.ItemDataRole.ToolTipRole), os.path.join("docs", "guide.md"))
+        self.assertFalse(self.model.index(5, 0).isValid())
+
+    def test_index_for_path(self):
+        index = self.model.index_for_path(os.path.join(BASE, "b.md"))
+        self.assertEqual((index.row(), self.name(index)), (2, "b.md"))
+        self.assertFalse(self.model.index_for_path(os.path.join(BASE, "zzz.md")).isValid())
+
+    def test_add_file_announces_rows(self):
+        self.model.add_file("aa.md")
+        self.model.add_file(os.path.join("docs", "api.md"))
+        self.model.add_file(os.path.join("new", "deep", "x.md"))
+        self.model.add_file("aa.md", 5, 5)  # Update only
+        self.assertEqual(self.events, [("+", None, 2), ("+", "docs", 0), ("+", None, 1)])
+        self.assertEqual(self.children(), ["docs", "new", "a.md", "aa.md", "b.md"])
+
+    def test_remove_file_announces_rows(self):
+        self.model.add_file(os.path.join("docs", "api.md"))
+        self.events.clear()
+        self.model.remove_file(os.path.join("docs", "guide.md"))
+        self.model.remove_file(os.path.join("docs", "api.md"))
+        self.model.remove_file("missing.md")
+        self.assertEqual(self.events, [("-", "docs", 1), ("-", None, 0)])
+        self.assertEqual(self.children(), ["a.md", "b.md"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import tempfile
+import shutil
+import time
+import sys
+import os
+
+# Ensure we can import from root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from watcher import (ChangeCoalescer, VaultWatcher, Change, diff_snapshots,
+                     ADDED, REMOVED, MODIFIED, MOVED)
+
+class TestCoalescer(unittest.TestCase):
+    def test_net_effect_per_path(self):
+        c = ChangeCoalescer()
+        c.add(ADDED, "a")
+        c.add(MODIFIED, "a")
+        c.add(ADDED, "b")
+        c.add(REMOVED, "b")
+        c.add(REMOVED, "c")
+        c.add(ADDED, "c")
+        self.assertEqual(sorted(c.drain()), [Change(ADDED, "a", None), Change(MODIFIED, "c", None)])
+
+    def test_chained_moves_collapse(self):
+        c = ChangeCoalescer()
+        c.add(MOVED, "b", "a")
+        c.add(MOVED, "c", "b")
+        self.assertEqual(c.drain(), [Change(MOVED, "c", "a")])
+
+class TestSnapshotDiff(unittest.TestCase):
+    def test_rename_pairs_by_inode(self):
+        before = {"a.md": (1, 10, 7), "b.md": (1, 5, 8)}
+        after = {"c.md": (1, 10, 7), "b.md": (2, 6, 8), "d.md": (3, 1, 9)}
+        self.assertEqual(sorted(diff_snapshots(before, after)), [
+            Change(ADDED, "d.md", None), Change(MODIFIED, "b.md", None), Change(MOVED, "c.md", "a.md")])
+
+class TestVaultWatcher(unittest.TestCase):
+    def setUp(self):
+        self.vault = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.vault, "sub"))
+        self.touch("sub/old.md")
+        self.batches = []
+
+    def tearDown(self):
+        shutil.rmtree(self.vault)
+
+    def touch(self, rel, content="x"):
+        with open(os.path.join(self.vault, rel), "w") as f:
+            f.write(content)
+
+    def wait_for(self, watcher, count):
+        deadline = time.time() + 5
+        while time.time() < deadline and sum(len(b) for b in self.batches) < count:
+            time.sleep(0.05)
+        watcher.stop()
+        return {c for batch in self.batches for c in batch}
+
+    def check_backend(self, **kwargs):
+        watcher = VaultWatcher(self.vault, self.batches.append, debounce=0.1, poll_interval=0.2, **kwargs)
+        watcher.start()
+        time.sleep(0.3)
+        self.touch("new.md")
+        self.touch("ignored.png")
+        os.rename(os.path.join(self.vault, "sub"), os.path.join(self.vault, "moved"))
+        changes = self.wait_for(watcher, 2)
+        path = lambda rel: os.path.join(self.vault, rel)
+        self.assertEqual(changes, {Change(ADDED, path("new.md"), None),
+                                   Change(MOVED, path("moved/old.md"), path("sub/old.md"))})
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+    def test_inotify_backend(self):
+        self.check_backend()
+
+    def test_polling_backend(self):
+        self.check_backend(use_inotify=False)
+
+if __name__ == '__main__':
+    unittest.main()
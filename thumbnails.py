@@ -0,0 +1,262 @@
+import os
+import re
+import html
+import json
+import hashlib
+import logging
+import pathlib
+import threading
+from urllib.parse import unquote, urlparse
+
+from PyQt6.QtCore import Qt, QBuffer, QByteArray, QIODevice, QSize
+from PyQt6.QtGui import QImageReader
+
+from metrics import metrics
+from paths import cache_root
+from save_service import atomic_write
+
+# Longest side of a thumbnail: the preview is at most 900 CSS px wide, so this
+# still looks sharp at 2x while decoding a fraction of a big screenshot or scan.
+THUMBNAIL_SIZE = 1600
+THUMBNAIL_CACHE_BYTES = int(os.environ.get("ACROPAD_THUMBNAIL_CACHE_MB", "256")) * 1024 * 1024
+_INDEX_NAME = "index.json"
+_JPEG_QUALITY = 88
+
+_IMG_RE = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+_SRC_RE = re.compile(r'\ssrc="([^"]*)"', re.IGNORECASE)
+# Shown until the thumbnail exists; preview.js swaps in the real one.
+_PLACEHOLDER = "data:image/gif;base64,R0lGODlhAQABAAAAACH5BAEKAAEALAAAAAABAAEAAAICTAEAOw=="
+# Index value for images small enough to be shown as they are.
+_ORIGINAL = ""
+
+
+def local_image_path(src, base_dir):
+    """Filesystem path an ``<img src>`` refers to, or ``None`` for remote / data URLs."""
+    src = html.unescape(src)
+    url = urlparse(src)
+    if url.scheme == "file":
+        return os.path.normpath(unquote(url.path))
+    if url.scheme or src.startswith("//") or not url.path:
+        return None
+    return os.path.normpath(os.path.join(base_dir, unquote(url.path)))
+
+
+def file_url(path):
+    return pathlib.Path(path).as_uri()
+
+
+class ThumbnailCache:
+    """
+    Downscaled copies of images embedded in notes, so the preview doesn't
+    decode full-resolution screenshots and scans on every refresh.
+
+    Thumbnails are named by the SHA-1 of the image's bytes, so renamed or
+    duplicated images share one. An index maps each image path to its
+    ``(size, mtime_ns, digest)``; while those match, finding the thumbnail is
+    a ``stat``. ``generate`` (meant for a worker thread) reads, hashes and
+    downscales one image. The directory is kept under ``max_bytes`` by
+    deleting the least recently used thumbnails.
+
+    ``rewrite`` turns ``<img>`` tags of rendered HTML into thumbnails, keeping
+    the original in ``data-full`` for preview.js to load on demand.
+    """
+
+    def __init__(self, directory=None, max_bytes=THUMBNAIL_CACHE_BYTES, max_size=THUMBNAIL_SIZE):
+        self.directory = directory or os.path.join(cache_root(), "thumbnails")
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._index = {}   # image path -> [size, mtime_ns, digest or _ORIGINAL]
+        self._dirty = False
+        self._load_index()
+        self._files = {}   # thumbnail name -> size on disk
+        self._bytes = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name != _INDEX_NAME and not entry.name.endswith(".tmp"):
+                size = entry.stat().st_size
+                self._files[entry.name] = size
+                self._bytes += size
+        self._touched = set()
+        self._stats = {"generated": 0, "reused": 0, "original": 0, "evicted": 0, "errors": 0}
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, _INDEX_NAME), 'r', encoding='utf-8') as f:
+                self._index = json.load(f)
+        except (OSError, ValueError):
+            self._index = {}
+
+    def save(self):
+        """Persist the path index (thumbnails themselves are written as they are made)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self._index, separators=(",", ":")).encode("utf-8")
+            self._dirty = False
+        atomic_write(os.path.join(self.directory, _INDEX_NAME), data)
+
+    def _name(self, digest):
+        return f"{digest}-{self.max_size}"
+
+    def lookup(self, path):
+        """
+        Thumbnail for the image at ``path``: its path, ``path`` itself if the
+        image needs none, or ``None`` if it has yet to be generated.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return path  # Missing: nothing to shrink, let the page show it broken
+        with self._lock:
+            known = self._index.get(path)
+            if known is None or known[0] != st.st_size or known[1] != st.st_mtime_ns:
+                return None
+            if known[2] == _ORIGINAL:
+                return path
+            name = self._find(known[2])
+            if name is None:
+                return None
+            first_use = name not in self._touched
+            self._touched.add(name)
+        if first_use:
+            self._touch(name)
+        return os.path.join(self.directory, name)
+
+    def _find(self, digest):
+        prefix = self._name(digest)
+        for ext in (".jpg", ".png"):
+            if prefix + ext in self._files:
+                return prefix + ext
+        return None
+
+    @metrics.timer("thumbnail.generate")
+    def generate(self, path):
+        """Create (or find) the thumbnail for ``path``. Returns ``(path, lookup result)``."""
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            data = f.read()
+        digest = hashlib.sha1(data).hexdigest()
+        with self._lock:
+            name = self._find(digest)
+        if name is not None:
+            self._remember(path, st, digest)
+            self._touch(name)
+            with self._lock:
+                self._stats["reused"] += 1
+            return path, os.path.join(self.directory, name)
+
+        buffer = QBuffer()
+        buffer.setData(QByteArray(data))
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        reader = QImageReader(buffer)
+        size = reader.size()
+        if not size.isValid() or reader.supportsAnimation() and reader.imageCount() > 1 \
+                or max(size.width(), size.height()) <= self.max_size:
+            # Small, animated or unreadable: the original is what the page should load.
+            self._remember(path, st, _ORIGINAL)
+            with self._lock:
+                self._stats["original"] += 1
+            return path, path
+        # Decoding at the target size lets JPEG skip most of the work.
+        reader.setScaledSize(size.scaled(QSize(self.max_size, self.max_size), Qt.AspectRatioMode.KeepAspectRatio))
+        image = reader.read()
+        if image.isNull():
+            with self._lock:
+                self._stats["errors"] += 1
+            logging.warning(f"Could not read image {path}: {reader.errorString()}")
+            self._remember(path, st, _ORIGINAL)
+            return path, path
+
+        ext = ".png" if image.hasAlphaChannel() else ".jpg"
+        out = QBuffer()
+        out.open(QIODevice.OpenModeFlag.WriteOnly)
+        image.save(out, "PNG" if ext == ".png" else "JPEG", -1 if ext == ".png" else _JPEG_QUALITY)
+        thumb = bytes(out.data())
+        name = self._name(digest) + ext
+        tmp_path = os.path.join(self.directory, name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(thumb)
+        os.replace(tmp_path, os.path.join(self.directory, name))
+        with self._lock:
+            old = self._files.get(name, 0)
+            self._files[name] = len(thumb)
+            self._bytes += len(thumb) - old
+            self._stats["generated"] += 1
+        self._remember(path, st, digest)
+        self._evict(keep=name)
+        return path, os.path.join(self.directory, name)
+
+    def _remember(self, path, st, digest):
+        with self._lock:
+            self._index[path] = [st.st_size, st.st_mtime_ns, digest]
+            self._dirty = True
+
+    def _touch(self, name):
+        # Thumbnail mtimes are their last use, which is what eviction goes by.
+        try:
+            os.utime(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def _evict(self, keep=None):
+        with self._lock:
+            if self._bytes <= self.max_bytes:
+                return
+            names = [name for name in self._files if name != keep]
+        used = []
+        for name in names:
+            try:
+                used.append((os.stat(os.path.join(self.directory, name)).st_mtime, name))
+            except OSError:
+                used.append((0, name))
+        used.sort()
+        for _, name in used:
+            with self._lock:
+                if self._bytes <= self.max_bytes:
+                    break
+                self._bytes -= self._files.pop(name, 0)
+                self._stats["evicted"] += 1
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def rewrite(self, fragment, base_dir):
+        """
+        Point the ``<img>`` tags of an HTML fragment at thumbnails. Returns
+        ``(html, missing)``: images without a thumbnail yet get a placeholder
+        and their paths are listed in ``missing`` for ``generate``.
+        """
+        if "<img" not in fragment and "<IMG" not in fragment:
+            return fragment, []
+        missing = []
+
+        def replace(match):
+            tag = match.group(0)
+            src = _SRC_RE.search(tag)
+            if src is None or "data-full=" in tag:
+                return tag
+            path = local_image_path(src.group(1), base_dir)
+            if path is None:
+                return tag
+            thumb = self.lookup(path)
+            if thumb == path:
+                return tag
+            if thumb is None:
+                missing.append(path)
+                new_src = _PLACEHOLDER
+            else:
+                new_src = file_url(thumb)
+            full = html.escape(file_url(path))
+            return (tag[:src.start()] + f' src="{new_src}" data-full="{full}"'
+                    + (' class="acropad-pending"' if thumb is None else '') + tag[src.end():])
+
+        return _IMG_RE.sub(replace, fragment), missing
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(files=len(self._files), bytes=self._bytes, max_bytes=self.max_bytes, images=len(self._index))
+        return stats
+
@@ -0,0 +1,167 @@
+import os
+
+from PyQt6.QtCore import Qt, QAbstractItemModel, QModelIndex
+from PyQt6.QtWidgets import QApplication, QStyle
+
+from file_table import FileTable, ROOT
+
+# Item ids pack the node kind into the low bit: directories are even, files odd.
+_FILE_BIT = 1
+
+
+def _dir_item(dir_id):
+    return dir_id << 1
+
+
+def _file_item(file_id):
+    return (file_id << 1) | _FILE_BIT
+
+
+class VaultTreeModel(QAbstractItemModel):
+    """
+    Single-column tree of the vault served from a ``FileTable``.
+
+    Nothing is materialized per node: an index carries a directory or file id
+    and rows are looked up in the table's sorted child lists when the view
+    asks, so only expanded directories cost anything. Within a directory,
+    subdirectories come first, then files, each sorted by name.
+
+    ``set_table`` swaps in a freshly scanned table; ``add_file`` /
+    ``remove_file`` apply watcher events as row inserts and removals.
+    """
+
+    def __init__(self, base_dir, parent=None):
+        super().__init__(parent)
+        self.base_dir = os.path.abspath(base_dir)
+        self.table = FileTable()
+        self._icons = None
+
+    def set_table(self, table):
+        self.beginResetModel()
+        self.table = table
+        self.endResetModel()
+
+    # Paths
+
+    def file_path(self, index):
+        """Absolute path of the file or directory at ``index``."""
+        if not index.isValid():
+            return self.base_dir
+        item = index.internalId()
+        if item & _FILE_BIT:
+            rel = self.table.path(item >> 1)
+        else:
+            rel = self.table.dir_path(item >> 1)
+        return os.path.join(self.base_dir, rel)
+
+    def is_dir(self, index):
+        return not index.isValid() or not index.internalId() & _FILE_BIT
+
+    def index_for_path(self, path):
+        """Index of the file at absolute ``path``; invalid if it isn't in the table."""
+        file_id = self.table.find(os.path.relpath(os.path.abspath(path), self.base_dir))
+        if file_id is None:
+            return QModelIndex()
+        return self._file_index(file_id)
+
+    def _file_index(self, file_id):
+        dir_id = self.table.file_dir(file_id)
+        row = len(self.table.subdirs(dir_id)) + self.table.file_row(file_id)
+        return self.createIndex(row, 0, _file_item(file_id))
+
+    def _dir_index(self, dir_id):
+        if dir_id == ROOT:
+            return QModelIndex()
+        return self.createIndex(self.table.dir_row(dir_id), 0, _dir_item(dir_id))
+
+    # Updates
+
+    def add_file(self, rel, size=0, mtime_ns=0):
+        if rel in self.table:
+            self.table.add(rel, size, mtime_ns)
+            return
+        # The row that appears is the file itself, or the topmost of the
+        # directories that have to be created for it.
+        directory = os.path.dirname(rel)
+        child = None
+        while directory and self.table.find_dir(directory) is None:
+            child = directory
+            directory = os.path.dirname(directory)
+        dir_id = self.table.find_dir(directory)
+        if child is None:
+            row = len(self.table.subdirs(dir_id)) + self.table.file_insert_row(dir_id, os.path.basename(rel))
+        else:
+            row = self.table.dir_insert_row(dir_id, os.path.basename(child))
+        self.beginInsertRows(self._dir_index(dir_id), row, row)
+        self.table.add(rel, size, mtime_ns)
+        self.endInsertRows()
+
+    def remove_file(self, rel):
+        file_id = self.table.find(rel)
+        if file_id is None:
+            return
+        # Removing a note can empty (and so remove) its directory and its ancestors;
+        # the topmost directory that goes away is the row that disappears.
+        dir_id = self.table.file_dir(file_id)
+        top_dir = None
+        while dir_id != ROOT and len(self.table.files(dir_id)) + len(self.table.subdirs(dir_id)) == 1:
+            top_dir = dir_id
+            dir_id = self.table.dir_parent(dir_id)
+        if top_dir is None:
+            index = self._file_index(file_id)
+        else:
+            index = self._dir_index(top_dir)
+        self.beginRemoveRows(index.parent(), index.row(), index.row())
+        self.table.remove(rel)
+        self.endRemoveRows()
+
+    # QAbstractItemModel
+
+    def index(self, row, column, parent=QModelIndex()):
+        if column != 0 or row < 0 or not self.is_dir(parent):
+            return QModelIndex()
+        dir_id = parent.internalId() >> 1 if parent.isValid() else ROOT
+        subdirs = self.table.subdirs(dir_id)
+        if row < len(subdirs):
+            return self.createIndex(row, 0, _dir_item(subdirs[row]))
+        files = self.table.files(dir_id)
+        if row - len(subdirs) < len(files):
+            return self.createIndex(row, 0, _file_item(files[row - len(subdirs)]))
+        return QModelIndex()
+
+    def parent(self, index=QModelIndex()):
+        if not index.isValid():
+            return QModelIndex()
+        item = index.internalId()
+        if item & _FILE_BIT:
+            return self._dir_index(self.table.file_dir(item >> 1))
+        return self._dir_index(self.table.dir_parent(item >> 1))
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0 or not self.is_dir(parent):
+            return 0
+        dir_id = parent.internalId() >> 1 if parent.isValid() else ROOT
+        return len(self.table.subdirs(dir_id)) + len(self.table.files(dir_id))
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        return self.is_dir(parent)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        item = index.internalId()
+        is_file = item & _FILE_BIT
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.table.name(item >> 1) if is_file else self.table.dir_name(item >> 1)
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return self.table.path(item >> 1) if is_file else self.table.dir_path(item >> 1)
+        if role == Qt.ItemDataRole.DecorationRole:
+            if self._icons is None:
+                style = QApplication.style()
+                self._icons = (style.standardIcon(QStyle.StandardPixmap.SP_DirIcon),
+                               style.standardIcon(QStyle.StandardPixmap.SP_FileIcon))
+            return self._icons[1 if is_file else 0]
+        return None
@@ -1,37 +1,374 @@
 import os
+import re
 import sys
+import copy
+import json
+import time
 import logging
-import markdown
 import traceback
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSplitter, 
     QPlainTextEdit, QTreeView, QFileDialog, 
-    QMessageBox, QLabel, QLineEdit, QPushButton, QStatusBar
+    QMessageBox, QLabel, QLineEdit, QPushButton, QStatusBar, QListWidget, QListWidgetItem,
+    QAbstractScrollArea, QStackedWidget, QDialog, QPlainTextDocumentLayout, QCheckBox
 )
 from PyQt6.QtCore import Qt, QDir, QTimer, QUrl, QThreadPool
-from PyQt6.QtGui import QAction, QIcon, QFont, QColor, QPalette, QFileSystemModel
-from PyQt6.QtWebEngineWidgets import QWebEngineView
+from PyQt6.QtGui import (
+    QAction, QIcon, QFont, QColor, QPalette, QPainter, QFontMetrics, QShortcut, QKeySequence,
+    QTextDocument, QTextCursor
+)
 
-from worker import Worker
+from worker import WorkerSignals
+from scheduler import TaskScheduler, INTERACTIVE, SAVE, INDEXING, BACKGROUND
+from metrics import metrics
+from startup import startup
+from watcher import VaultWatcher, REMOVED, MOVED
+from search_index import SearchIndex
+from link_index import LinkIndex
+from quick_switcher import QuickSwitcherIndex
+from file_table import FileTable
+from tree_model import VaultTreeModel
+from highlighter import MarkdownHighlighter
+from document_cache import DocumentCache, OpenDocument
+from journal import EditJournal
+from storage import Storage, read_text
+from thumbnails import ThumbnailCache, file_url
+from math_cache import MathCache
+import find_replace
+from find_replace import FindReplace, Query, ReplaceError
+from large_file import LargeFile, is_large_file
+from renderer import render_markdown, render_blocks, render_cache, preview_shell, warm_up, PreviewDocument
 
-# --- Renderer Logic (Merged) ---
 
-HTML_TEMPLATE = """<!DOCTYPE html><html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1.0"><link rel="preconnect" href="https://fonts.googleapis.com"><link rel="preconnect" href="https://fonts.gstatic.com" crossorigin><link href="https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&family=JetBrains+Mono:wght@400;700&display=swap" rel="stylesheet"><style>:root{--bg-color:#171717;--text-color:#E5E5E5;--code-bg:#262626;--border-color:#404040;--accent-color:#3B82F6}body{font-family:'Inter',sans-serif;line-height:1.6;padding:30px;color:var(--text-color);background-color:var(--bg-color);max-width:900px;margin:0 auto}h1,h2,h3,h4,h5,h6{font-weight:600;color:#fff;margin-top:1.5em}pre{background-color:var(--code-bg);padding:15px;border-radius:8px;overflow-x:auto;border:1px solid var(--border-color)}code{font-family:'JetBrains Mono',monospace;background-color:var(--code-bg);padding:2px 5px;border-radius:4px;font-size:0.9em}blockquote{border-left:4px solid var(--accent-color);margin:1.5em 0;padding-left:15px;color:#A3A3A3;background:rgba(59,130,246,0.1);padding:10px 15px;border-radius:0 4px 4px 0}img{max-width:100%;border-radius:8px;margin:10px 0;box-shadow:0 4px 6px -1px rgba(0,0,0,0.1)}table{border-collapse:collapse;width:100%;margin:1.5rem 0}th,td{border:1px solid var(--border-color);padding:10px;text-align:left}th{background-color:var(--code-bg);font-weight:600}a{color:var(--accent-color);text-decoration:none}a:hover{text-decoration:underline}.MathJax_Display{overflow-x:auto;overflow-y:hidden;margin:1em 0}</style><script>MathJax={tex:{inlineMath:[['$','$'],['\\(','\\)']],displayMath:[['$$','$$'],['\\[','\\]']]},svg:{fontCache:'global'}};</script><script id="MathJax-script" async src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js"></script></head><body><div id="content">%CONTENT%</div></body></html>"""
+class Editor(QPlainTextEdit):
+    def __init__(self):
+        super().__init__()
+        font = QFont("Monospace")
+        font.setStyleHint(QFont.StyleHint.Monospace)
+        font.setPointSize(11)
+        self.setFont(font)
+        self.setStyleSheet("QPlainTextEdit { background-color: #171717; color: #E5E5E5; border: none; padding: 10px; }")
 
-def render_markdown(text):
-    html_content = markdown.markdown(text, extensions=['fenced_code', 'tables'])
-    return HTML_TEMPLATE.replace("%CONTENT%", html_content)
+class LargeFileView(QAbstractScrollArea):
+    """Read-only viewer that paints only the visible lines of a memory-mapped LargeFile."""
 
-# --- End Renderer Logic ---
+    MAX_COLUMNS = 2000
 
-class Editor(QPlainTextEdit):
     def __init__(self):
         super().__init__()
         font = QFont("Monospace")
         font.setStyleHint(QFont.StyleHint.Monospace)
         font.setPointSize(11)
         self.setFont(font)
-        self.setStyleSheet("QPlainTextEdit { background-color: #171717; color: #E5E5E5; border: none; padding: 10px; }")
+        self.setStyleSheet("QAbstractScrollArea { background-color: #171717; border: none; }")
+        self.large_file = None
+        self.content_width = 0
+
+    def set_file(self, large_file):
+        self.large_file = large_file
+        self.content_width = 0
+        self.verticalScrollBar().setValue(0)
+        self.horizontalScrollBar().setValue(0)
+        self.update_scrollbars()
+        self.viewport().update()
+
+    def visible_lines(self):
+        return max(1, self.viewport().height() // QFontMetrics(self.font()).lineSpacing())
+
+    def update_scrollbars(self):
+        lines = self.large_file.line_count if self.large_file else 0
+        visible = self.visible_lines()
+        self.verticalScrollBar().setRange(0, max(0, lines - visible))
+        self.verticalScrollBar().setPageStep(visible)
+        width = self.viewport().width()
+        self.horizontalScrollBar().setRange(0, max(0, self.content_width - width + 20))
+        self.horizontalScrollBar().setPageStep(width)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(self.viewport().rect(), QColor("#171717"))
+        if self.large_file is None:
+            return
+        painter.setPen(QColor("#E5E5E5"))
+        metrics = QFontMetrics(self.font())
+        line_height = metrics.lineSpacing()
+        x = 10 - self.horizontalScrollBar().value()
+        y = metrics.ascent()
+        widest = self.content_width
+        for line in self.large_file.lines(self.verticalScrollBar().value(), self.visible_lines() + 1):
+            text = line[:self.MAX_COLUMNS].expandtabs(4)
+            painter.drawText(x, y, text)
+            widest = max(widest, metrics.horizontalAdvance(text))
+            y += line_height
+        if widest > self.content_width:
+            self.content_width = widest
+            self.update_scrollbars()
+
+# How long after the window is constructed to start loading WebEngine, so the
+# first frame is painted before the GUI thread is tied up.
+PREVIEW_WARM_UP_DELAY_MS = 250
+# Edits are journaled this long after typing pauses; the note itself is
+# rewritten in full only every AUTOSAVE_INTERVAL_MS (and on switching notes).
+JOURNAL_DELAY_MS = 300
+AUTOSAVE_INTERVAL_MS = 30000
+# Recently shown notes kept in memory (documents, undo history, preview) for instant switching back.
+DOCUMENT_CACHE_BYTES = int(os.environ.get("ACROPAD_DOCUMENT_CACHE_MB", "64")) * 1024 * 1024
+# While the preview typesets formulas missing from the math cache, their
+# output is collected this often, giving up after MATH_POLL_LIMIT empty polls.
+MATH_POLL_MS = 250
+MATH_POLL_LIMIT = 20
+# Notes read ahead once listed, as the likeliest to be opened next.
+SEARCH_PREFETCH = 5
+BACKLINKS_PREFETCH = 8
+
+
+class QuickSwitcher(QDialog):
+    """Ctrl+P: type part of a file name, Enter opens the best match."""
+
+    def __init__(self, parent, index, on_open):
+        super().__init__(parent)
+        self.index = index
+        self.on_open = on_open
+        self.setWindowFlags(Qt.WindowType.Dialog | Qt.WindowType.FramelessWindowHint)
+        self.setStyleSheet("QDialog { background-color: #171717; border: 1px solid #404040; border-radius: 8px; }")
+        self.resize(600, 420)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 8, 8, 8)
+        self.input = QLineEdit()
+        self.input.setPlaceholderText("Go to file...")
+        self.input.setStyleSheet("padding: 8px; background: #262626; color: white; border: none; font-size: 14px;")
+        self.input.textChanged.connect(self.update_results)
+        self.input.returnPressed.connect(self.accept_current)
+        layout.addWidget(self.input)
+
+        self.results = QListWidget()
+        self.results.setStyleSheet("QListWidget { background-color: #171717; color: #a3a3a3; border: none; } QListWidget::item:selected { background-color: #2563EB; color: white; }")
+        self.results.itemActivated.connect(lambda item: self.accept_current())
+        self.results.itemClicked.connect(lambda item: self.accept_current())
+        layout.addWidget(self.results)
+
+    def popup(self):
+        parent = self.parentWidget()
+        self.move(parent.geometry().center().x() - self.width() // 2, parent.geometry().top() + 80)
+        self.input.clear()
+        self.update_results("")
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        self.input.setFocus()
+
+    def update_results(self, text):
+        self.results.clear()
+        for rel in self.index.search(text):
+            item = QListWidgetItem(f"{os.path.splitext(os.path.basename(rel))[0]}\n{os.path.dirname(rel)}")
+            item.setData(Qt.ItemDataRole.UserRole, rel)
+            self.results.addItem(item)
+        if self.results.count():
+            self.results.setCurrentRow(0)
+
+    def keyPressEvent(self, event):
+        # Up/Down move through the results while typing continues in the input.
+        if event.key() in (Qt.Key.Key_Up, Qt.Key.Key_Down) and self.results.count():
+            step = -1 if event.key() == Qt.Key.Key_Up else 1
+            self.results.setCurrentRow((self.results.currentRow() + step) % self.results.count())
+            return
+        super().keyPressEvent(event)
+
+    def accept_current(self):
+        item = self.results.currentItem()
+        self.hide()
+        if item is not None:
+            self.on_open(item.data(Qt.ItemDataRole.UserRole))
+
+
+class FindReplaceDialog(QDialog):
+    """Ctrl+Shift+F: find, and optionally replace, across the vault. Matches stream in while the scan runs."""
+
+    def __init__(self, main):
+        super().__init__(main)
+        self.main = main
+        self.engine = FindReplace(main.base_dir)
+        self.query = None   # Query of the results shown
+        self.batch_signals = WorkerSignals()
+        self.batch_signals.result.connect(self.add_matches)
+        self.setWindowTitle("Find in Vault")
+        self.setStyleSheet("QDialog { background-color: #171717; } QLabel, QCheckBox { color: #a3a3a3; }")
+        self.resize(900, 560)
+        input_style = "padding: 6px; background: #262626; color: white; border: none;"
+        button_style = "QPushButton { background-color: #262626; color: #E5E5E5; border: none; border-radius: 6px; padding: 6px 12px; } QPushButton:hover { background-color: #404040; } QPushButton:disabled { color: #525252; }"
+
+        layout = QVBoxLayout(self)
+        self.find_input = QLineEdit()
+        self.find_input.setPlaceholderText("Find")
+        self.find_input.setStyleSheet(input_style)
+        self.find_input.returnPressed.connect(self.run_scan)
+        self.find_input.textChanged.connect(self.invalidate)
+        layout.addWidget(self.find_input)
+        self.replace_input = QLineEdit()
+        self.replace_input.setPlaceholderText("Replace with")
+        self.replace_input.setStyleSheet(input_style)
+        self.replace_input.returnPressed.connect(self.run_scan)
+        self.replace_input.textChanged.connect(self.on_replacement_changed)
+        layout.addWidget(self.replace_input)
+
+        options = QHBoxLayout()
+        self.regex_box = QCheckBox("Regex")
+        self.case_box = QCheckBox("Match case")
+        self.case_box.setChecked(True)
+        self.word_box = QCheckBox("Whole word")
+        for box in (self.regex_box, self.case_box, self.word_box):
+            box.toggled.connect(self.invalidate)
+            options.addWidget(box)
+        options.addStretch()
+        self.find_btn = QPushButton("Find")
+        self.find_btn.setStyleSheet(button_style)
+        self.find_btn.clicked.connect(self.run_scan)
+        options.addWidget(self.find_btn)
+        layout.addLayout(options)
+
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        self.results = QListWidget()
+        self.results.setStyleSheet("QListWidget { background-color: #0a0a0a; color: #a3a3a3; border: none; } QListWidget::item:selected { background-color: #2563EB; color: white; }")
+        self.results.currentItemChanged.connect(lambda item, _previous: self.show_diff(item))
+        self.results.itemDoubleClicked.connect(lambda item: main.open_file(item.data(Qt.ItemDataRole.UserRole)))
+        splitter.addWidget(self.results)
+        self.diff_view = QPlainTextEdit()
+        self.diff_view.setReadOnly(True)
+        self.diff_view.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.diff_view.setFont(QFont("Consolas, 'Courier New', monospace", 10))
+        self.diff_view.setStyleSheet("QPlainTextEdit { background-color: #0a0a0a; color: #D4D4D4; border: none; }")
+        splitter.addWidget(self.diff_view)
+        splitter.setStretchFactor(1, 1)
+        layout.addWidget(splitter)
+
+        footer = QHBoxLayout()
+        self.summary = QLabel("")
+        footer.addWidget(self.summary)
+        footer.addStretch()
+        self.replace_btn = QPushButton("Replace in checked notes")
+        self.replace_btn.setStyleSheet(button_style)
+        self.replace_btn.setEnabled(False)
+        self.replace_btn.clicked.connect(self.apply_replace)
+        footer.addWidget(self.replace_btn)
+        layout.addLayout(footer)
+
+    def popup(self):
+        text = self.main.editor.textCursor().selectedText()
+        if text and "\u2029" not in text:
+            self.find_input.setText(text)
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        self.find_input.setFocus()
+        self.find_input.selectAll()
+
+    def build_query(self):
+        return Query(self.find_input.text(), self.replace_input.text(), regex=self.regex_box.isChecked(),
+                     case_sensitive=self.case_box.isChecked(), whole_word=self.word_box.isChecked())
+
+    def run_scan(self):
+        if not self.find_input.text():
+            return
+        try:
+            query = self.build_query()
+        except re.error as e:
+            self.summary.setText(f"Invalid expression: {e}")
+            return
+        self.query = query
+        self.results.clear()
+        self.diff_view.clear()
+        self.replace_btn.setEnabled(False)
+        self.summary.setText("Searching...")
+        # Batches are tagged with their query: those of a superseded scan may still be on their way.
+        self.main.scheduler.submit(self.engine.scan, query, lambda matches: self.batch_signals.result.emit((query, matches)),
+                                   priority=INDEXING, key="find-replace", cancellable=True,
+                                   on_result=lambda stats: self.on_scan_done(query, stats),
+                                   on_error=lambda err: self.summary.setText(f"Search failed: {err[1]}"))
+
+    def add_matches(self, batch):
+        query, matches = batch
+        if query is not self.query:
+            return
+        for match in matches:
+            item = QListWidgetItem(f"{os.path.relpath(match.path, self.main.base_dir)}  ({match.count})")
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked)
+            item.setToolTip("\n".join(f"{number}: {line}" for number, line in match.lines))
+            item.setData(Qt.ItemDataRole.UserRole, match.path)
+            item.setData(Qt.ItemDataRole.UserRole + 1, match.count)
+            self.results.addItem(item)
+        if self.results.currentItem() is None and self.results.count():
+            self.results.setCurrentRow(0)
+
+    def on_scan_done(self, query, stats):
+        if query is not self.query:
+            return
+        self.summary.setText(f"{stats['matches']} matches in {stats['matched_files']} of {stats['files']} notes")
+        self.replace_btn.setEnabled(stats["matches"] > 0)
+
+    def invalidate(self):
+        # What to find changed: the results no longer say what a replace would touch.
+        if self.query is not None:
+            self.main.scheduler.cancel("find-replace")
+            self.query = None
+            self.replace_btn.setEnabled(False)
+            self.summary.setText("Press Enter to search again")
+
+    def on_replacement_changed(self, text):
+        if self.query is not None:
+            self.query.replacement = text
+            self.show_diff(self.results.currentItem())
+
+    def show_diff(self, item):
+        if item is None or self.query is None:
+            return
+        path = item.data(Qt.ItemDataRole.UserRole)
+        query = copy.copy(self.query)
+        self.main.scheduler.submit(self.engine.diff, query, path, priority=INTERACTIVE, key="find-replace-diff",
+                                   on_result=lambda diff: self.diff_view.setPlainText(diff or "(no change)"),
+                                   on_error=lambda err: self.diff_view.setPlainText(f"Cannot preview: {err[1]}"))
+
+    def checked_items(self):
+        items = (self.results.item(row) for row in range(self.results.count()))
+        return [item for item in items if item.checkState() == Qt.CheckState.Checked]
+
+    def apply_replace(self):
+        items = self.checked_items()
+        if not items or self.query is None:
+            return
+        count = sum(item.data(Qt.ItemDataRole.UserRole + 1) for item in items)
+        answer = QMessageBox.question(self, "Replace in Vault",
+                                      f"Replace {count} matches in {len(items)} notes? This can't be undone from the editor.")
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+        self.replace_btn.setEnabled(False)
+        self.summary.setText("Replacing...")
+        self.main.begin_replace()
+        self.main.scheduler.submit(self.engine.apply, copy.copy(self.query),
+                                   [item.data(Qt.ItemDataRole.UserRole) for item in items],
+                                   priority=SAVE, on_result=self.on_replaced, on_error=self.on_replace_error)
+
+    def on_replaced(self, changed):
+        self.main.end_replace(changed)
+        self.summary.setText(f"Replaced {sum(changed.values())} matches in {len(changed)} notes")
+        self.query = None
+        self.results.clear()
+        self.diff_view.clear()
+
+    def on_replace_error(self, err):
+        self.main.end_replace({})
+        logging.error(f"Replace failed: {err}")
+        self.summary.setText(f"Nothing replaced: {err[1]}")
+        self.replace_btn.setEnabled(True)
+
 
 class AcropadWindow(QMainWindow):
     def __init__(self, base_dir):
@@ -42,9 +379,18 @@ class AcropadWindow(QMainWindow):
 
         self.setWindowTitle("Acropad")
         self.resize(1200, 800)
+        # Undo a vault-wide replace a crash cut short, before anything reads the notes.
+        recover_error = None
+        try:
+            rolled_back = find_replace.recover(self.base_dir)
+        except Exception as e:
+            logging.error(f"Could not undo an interrupted replace: {e}", exc_info=True)
+            rolled_back, recover_error = [], e
         
         self.threadpool = QThreadPool()
         logging.info(f"Multithreading with maximum {self.threadpool.maxThreadCount()} threads")
+        metrics.gauge("threadpool.active", self.threadpool.activeThreadCount)
+        self.scheduler = TaskScheduler(self.threadpool)
 
         self.setup_theme()
 
@@ -74,23 +420,44 @@ class AcropadWindow(QMainWindow):
         self.search_bar = QLineEdit()
         self.search_bar.setPlaceholderText("Search files...")
         self.search_bar.setStyleSheet("padding: 5px; background: #262626; color: white; border: none;")
+        self.search_bar.textChanged.connect(self.on_search_text_changed)
         sidebar_layout.addWidget(self.search_bar)
 
-        self.file_model = QFileSystemModel()
-        self.file_model.setRootPath(self.base_dir)
-        self.file_model.setNameFilters(["*.md", "*.txt"])
-        self.file_model.setNameFilterDisables(False)
-        
+        self.search_results = QListWidget()
+        self.search_results.setStyleSheet("QListWidget { background-color: #0a0a0a; color: #a3a3a3; border: none; } QListWidget::item:hover { background-color: #262626; } QListWidget::item:selected { background-color: #2563EB; color: white; }")
+        self.search_results.itemClicked.connect(self.on_search_result_clicked)
+        self.search_results.hide()
+        sidebar_layout.addWidget(self.search_results)
+
+        # Filled by scan_vault(); the watcher keeps it current from then on.
+        self.file_model = VaultTreeModel(self.base_dir)
+
         self.tree_view = QTreeView()
         self.tree_view.setModel(self.file_model)
-        self.tree_view.setRootIndex(self.file_model.index(self.base_dir))
-        self.tree_view.setColumnHidden(1, True) 
-        self.tree_view.setColumnHidden(2, True) 
-        self.tree_view.setColumnHidden(3, True) 
+        self.tree_view.setUniformRowHeights(True)
         self.tree_view.setHeaderHidden(True)
         self.tree_view.clicked.connect(self.on_file_clicked)
         self.tree_view.setStyleSheet("QTreeView { background-color: #0a0a0a; color: #a3a3a3; border: none; } QTreeView::item:hover { background-color: #262626; } QTreeView::item:selected { background-color: #2563EB; color: white; }")
         sidebar_layout.addWidget(self.tree_view)
+
+        links_header = QHBoxLayout()
+        self.backlinks_label = QLabel("BACKLINKS")
+        self.backlinks_label.setStyleSheet("color: #737373; font-weight: bold; font-size: 11px;")
+        links_header.addWidget(self.backlinks_label)
+        links_header.addStretch()
+        self.unresolved_btn = QPushButton("Unresolved")
+        self.unresolved_btn.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.unresolved_btn.setToolTip("Links that point to notes that don't exist")
+        self.unresolved_btn.clicked.connect(self.show_unresolved_links)
+        self.unresolved_btn.setStyleSheet("QPushButton { background: none; color: #737373; border: none; font-size: 11px; } QPushButton:hover { color: #E5E5E5; }")
+        links_header.addWidget(self.unresolved_btn)
+        sidebar_layout.addLayout(links_header)
+
+        self.backlinks_list = QListWidget()
+        self.backlinks_list.setMaximumHeight(200)
+        self.backlinks_list.setStyleSheet("QListWidget { background-color: #0a0a0a; color: #a3a3a3; border: none; } QListWidget::item:hover { background-color: #262626; } QListWidget::item:selected { background-color: #2563EB; color: white; }")
+        self.backlinks_list.itemClicked.connect(self.on_search_result_clicked)
+        sidebar_layout.addWidget(self.backlinks_list)
         
         splitter.addWidget(self.sidebar_widget)
 
@@ -105,12 +472,46 @@ class AcropadWindow(QMainWindow):
         content_splitter = QSplitter(Qt.Orientation.Horizontal)
         
         self.editor = Editor()
+        self.document_cache = DocumentCache(DOCUMENT_CACHE_BYTES)
+        self.open_document = None  # OpenDocument shown in the editor
+        # The editor doesn't own the documents it shows; this keeps the shown one
+        # alive even after its entry is stashed and evicted from the cache.
+        self.editor_document = None
         self.editor.textChanged.connect(self.on_text_changed)
-        content_splitter.addWidget(self.editor)
+        self.large_view = LargeFileView()
+        self.editor_stack = QStackedWidget()
+        self.editor_stack.addWidget(self.editor)
+        self.editor_stack.addWidget(self.large_view)
+        content_splitter.addWidget(self.editor_stack)
+        self.large_file = None
+        self.large_file_timer = QTimer()
+        self.large_file_timer.setInterval(250)
+        self.large_file_timer.timeout.connect(self.on_large_file_progress)
 
-        self.preview = QWebEngineView()
-        self.preview.setStyleSheet("background-color: #171717;")
-        content_splitter.addWidget(self.preview)
+        # The QWebEngineView is created by ensure_preview() once the window is
+        # up (or a note needs it); until then this empty pane holds its place.
+        self.preview = None
+        self.preview_pane = QWidget()
+        self.preview_pane.setStyleSheet("background-color: #171717;")
+        self.preview_layout = QVBoxLayout(self.preview_pane)
+        self.preview_layout.setContentsMargins(0, 0, 0, 0)
+        # ACROPAD_PREVIEW_MODE=full reloads the whole page on every render (for comparison).
+        self.incremental_preview = os.environ.get("ACROPAD_PREVIEW_MODE", "incremental") != "full"
+        self.preview_doc = PreviewDocument()
+        self.preview_state = None
+        self.preview_dirty = False
+        self.preview_reset = False
+        self.open_started = None
+        self.render_started = None
+        self.thumbnails = ThumbnailCache()
+        self.thumbnails_pending = set()
+        self.math_cache = MathCache()
+        self.math_waiting = set()   # Formula keys sent to the page untypeset
+        self.math_polls = 0
+        self.math_timer = QTimer()
+        self.math_timer.setSingleShot(True)
+        self.math_timer.timeout.connect(self.collect_typeset)
+        content_splitter.addWidget(self.preview_pane)
         
         content_splitter.setStretchFactor(0, 1)
         content_splitter.setStretchFactor(1, 1)
@@ -132,11 +533,59 @@ class AcropadWindow(QMainWindow):
         self.render_timer.setSingleShot(True)
         self.render_timer.timeout.connect(self.update_preview)
 
+        self.search_timer = QTimer()
+        self.search_timer.setSingleShot(True)
+        self.search_timer.timeout.connect(self.run_search)
+
+        self.search_index = SearchIndex(self.base_dir)
+        self.link_index = LinkIndex(self.base_dir)
+        self.refresh_indexes(INDEXING)
+
+        self.switcher_index = QuickSwitcherIndex()
+        self.scheduler.submit(self.scan_vault_task, priority=INTERACTIVE, key="vault-scan", cancellable=True,
+                              on_result=self.on_vault_scanned,
+                              on_error=lambda err: logging.error(f"Vault scan failed: {err}"))
+        self.quick_switcher = QuickSwitcher(self, self.switcher_index,
+                                            lambda rel: self.open_file(os.path.join(self.base_dir, rel)))
+        QShortcut(QKeySequence("Ctrl+P"), self, self.quick_switcher.popup)
+        self.find_replace = FindReplaceDialog(self)
+        QShortcut(QKeySequence("Ctrl+Shift+F"), self, self.find_replace.popup)
+
+        self.watcher_signals = WorkerSignals()
+        self.watcher_signals.result.connect(self.on_vault_changed)
+        self.watcher = VaultWatcher(self.base_dir, self.watcher_signals.result.emit)
+        self.watcher.start()
+
+        self.storage = Storage()
+        self.save_service = self.storage.save_service
+        self.saves_abandoned = False  # Set on close if a save was still stuck after the timeout
+        self.saved_stats = {}  # path -> (size, mtime_ns) our last save left the file with
+        self.save_signals = WorkerSignals()
+        self.save_signals.result.connect(self.on_save_complete)
+        self.save_signals.error.connect(self.on_save_error)
+
+        # Replays edits a previous session journaled but didn't save, before any note is opened.
+        self.journal = EditJournal(self.base_dir)
+        recovered = self.journal.recover()
+        if recover_error is not None:
+            self.status_bar.showMessage(f"Could not undo an interrupted replace: {recover_error}", 10000)
+        elif recovered:
+            self.status_bar.showMessage(f"Recovered unsaved edits in {len(recovered)} note(s)", 10000)
+        elif rolled_back:
+            self.status_bar.showMessage(f"Rolled back an interrupted replace in {len(rolled_back)} note(s)", 10000)
+        self.journal_timer = QTimer()
+        self.journal_timer.setSingleShot(True)
+        self.journal_timer.timeout.connect(self.journal_current_file)
+
         self.autosave_timer = QTimer()
-        self.autosave_timer.setInterval(2000) 
+        self.autosave_timer.setInterval(AUTOSAVE_INTERVAL_MS)
         self.autosave_timer.timeout.connect(self.save_current_file)
         self.autosave_timer.start()
 
+        self.scheduler.submit(warm_up, priority=BACKGROUND, key="warm-up",
+                              on_error=lambda err: logging.error(f"Renderer warm-up failed: {err}"))
+        QTimer.singleShot(PREVIEW_WARM_UP_DELAY_MS, self.ensure_preview)
+
         logging.info(f"UI Initialized with root: {self.base_dir}")
 
     def setup_theme(self):
@@ -145,15 +594,75 @@ class AcropadWindow(QMainWindow):
         palette.setColor(QPalette.ColorRole.WindowText, QColor("#E5E5E5"))
         self.setPalette(palette)
 
-    def read_file_task(self, path):
-        with open(path, 'r', encoding='utf-8') as f:
-            return f.read()
-
-    def on_file_loaded(self, content):
-        self.editor.setPlainText(content)
+    def on_file_loaded(self, result):
+        if result.path != self.current_file:
+            return
+        if self.open_started is not None:
+            metrics.observe("file.open", time.perf_counter() - self.open_started)
+        self.reset_preview()
+        self.show_document(OpenDocument(self.current_file, self.new_document(result.text),
+                                        stat=(result.size, result.mtime_ns)))
         self.update_preview()
         self.editor.setDisabled(False)
         self.status_bar.showMessage("File loaded", 2000)
+        self.update_backlinks()
+
+    def new_document(self, content):
+        document = QTextDocument()
+        document.setDocumentLayout(QPlainTextDocumentLayout(document))
+        document.setDefaultFont(self.editor.font())
+        document.setPlainText(content)
+        document.setModified(False)
+        return document
+
+    def set_editor_document(self, document):
+        self.editor.setDocument(document)
+        self.editor_document = document
+
+    def show_document(self, entry):
+        if entry.highlighter is None:
+            entry.highlighter = MarkdownHighlighter(entry.document)
+        self.open_document = entry
+        self.set_editor_document(entry.document)
+        self.journal.opened(entry.path, entry.document.toPlainText())
+        cursor = QTextCursor(entry.document)
+        anchor, position = entry.cursor
+        cursor.setPosition(min(anchor, entry.document.characterCount() - 1))
+        cursor.setPosition(min(position, entry.document.characterCount() - 1), QTextCursor.MoveMode.KeepAnchor)
+        self.editor.setTextCursor(cursor)
+        self.editor.verticalScrollBar().setValue(entry.scroll)
+
+    def stash_document(self):
+        """Move the note being shown into the document cache, with its cursor, scroll and preview."""
+        entry = self.open_document
+        if entry is None:
+            return
+        self.open_document = None
+        self.journal.closed(entry.path)
+        cursor = self.editor.textCursor()
+        entry.cursor = (cursor.anchor(), cursor.position())
+        entry.scroll = self.editor.verticalScrollBar().value()
+        entry.preview = self.preview_doc.snapshot() if self.preview_state == "ready" else None
+        self.document_cache.put(entry)
+
+    def open_cached_document(self, entry):
+        self.show_document(entry)
+        if entry.preview is not None and self.preview_state == "ready":
+            self.scheduler.cancel("render")
+            self.preview_doc.restore(entry.preview)
+            self.preview_reset = False
+            keys, html = entry.preview
+            self.render_started = time.perf_counter()
+            html = [self.preview_html(html[key]) for key in keys]
+            self.preview.page().runJavaScript(
+                f"acropad.reset({json.dumps(html)});", self.on_preview_patched)
+        else:
+            self.reset_preview()
+            self.update_preview()
+        metrics.observe("file.open", time.perf_counter() - self.open_started)
+        self.editor.setDisabled(False)
+        self.status_bar.showMessage("File loaded", 2000)
+        self.update_backlinks()
 
     def on_file_load_error(self, err):
         self.editor.setDisabled(False)
@@ -161,72 +670,493 @@ class AcropadWindow(QMainWindow):
         self.status_bar.showMessage(f"Error loading file: {err[1]}", 5000)
 
     def on_file_clicked(self, index):
-        path = self.file_model.filePath(index)
-        if os.path.isdir(path):
+        if self.file_model.is_dir(index):
             return
+        self.open_file(self.file_model.file_path(index))
+
+    def open_file(self, path):
+        self.open_started = time.perf_counter()
         self.save_current_file()
+        self.stash_document()
+        self.close_large_file()
         self.current_file = path
         self.filename_label.setText(os.path.basename(path))
+        self.switcher_index.touch(os.path.relpath(path, self.base_dir))
+        if is_large_file(path):
+            self.open_large_file(path)
+            return
+        entry = self.document_cache.take(path)
+        if entry is not None:
+            self.scheduler.cancel("open")
+            self.open_cached_document(entry)
+            return
         self.editor.setDisabled(True) 
         self.status_bar.showMessage(f"Loading {os.path.basename(path)}...")
-        worker = Worker(self.read_file_task, path)
-        worker.signals.result.connect(self.on_file_loaded)
-        worker.signals.error.connect(self.on_file_load_error)
-        self.threadpool.start(worker)
+        # A newer click replaces a load that hasn't finished yet.
+        self.scheduler.submit(self.storage.read, path, priority=INTERACTIVE, key="open",
+                              on_result=self.on_file_loaded, on_error=self.on_file_load_error)
+
+    def open_large_file(self, path):
+        self.status_bar.showMessage(f"Opening {os.path.basename(path)} in large-file mode...")
+        self.scheduler.submit(LargeFile, path, priority=INTERACTIVE, key="open",
+                              on_result=self.on_large_file_opened, on_error=self.on_file_load_error)
+
+    def on_large_file_opened(self, large_file):
+        if large_file.path != self.current_file or self.large_file is not None:
+            large_file.close()
+            return
+        self.large_file = large_file
+        self.set_editor_document(self.new_document(""))
+        self.large_view.set_file(large_file)
+        self.editor_stack.setCurrentWidget(self.large_view)
+        self.preview_pane.hide()
+        self.scheduler.submit(large_file.build_index, priority=BACKGROUND, key="large-index",
+                              on_error=lambda err: logging.error(f"Indexing large file failed: {err}"))
+        self.large_file_timer.start()
+        self.update_backlinks()
+        size_mb = large_file.size / (1024 * 1024)
+        self.status_bar.showMessage(f"Large file ({size_mb:.0f} MB): read-only, preview off")
+
+    def on_large_file_progress(self):
+        if self.large_file is None:
+            self.large_file_timer.stop()
+            return
+        self.large_view.update_scrollbars()
+        self.large_view.viewport().update()
+        if self.large_file.indexed:
+            self.large_file_timer.stop()
+            self.status_bar.showMessage(f"{self.large_file.line_count:,} lines indexed", 3000)
+
+    def close_large_file(self):
+        if self.large_file is None:
+            return
+        self.large_file_timer.stop()
+        self.large_view.set_file(None)
+        self.large_file.close()
+        self.large_file = None
+        self.editor_stack.setCurrentWidget(self.editor)
+        self.preview_pane.show()
 
     def on_text_changed(self):
         self.render_timer.start(300) 
+        self.journal_timer.start(JOURNAL_DELAY_MS)
+
+    def journal_current_file(self):
+        if self.open_document is not None and self.editor.document().isModified():
+            self.journal.record(self.current_file, self.editor.toPlainText())
 
     def update_preview(self):
+        if self.large_file is not None:
+            return
         text = self.editor.toPlainText()
-        html = render_markdown(text)
+        self.ensure_preview()
+        if not self.incremental_preview:
+            html = self.with_thumbnails(render_markdown(text))
+            base_url = QUrl.fromLocalFile(self.base_dir + os.sep)
+            self.preview.setHtml(html, base_url)
+            return
+
+        if self.preview_state != "ready":
+            # Render once the shell is up; it starts out empty, like preview_doc.
+            if self.preview_state is None:
+                self.load_preview_page()
+            self.preview_dirty = True
+            return
+
+        # Only the newest render is applied; an older one still queued is dropped
+        # and one already running bails out at the next block.
+        self.render_started = time.perf_counter()
+        self.scheduler.submit(render_blocks, text, frozenset(self.preview_doc.html),
+                              priority=INTERACTIVE, key="render", cancellable=True,
+                              on_result=self.on_render_complete, on_error=self.on_render_error)
+
+    def on_render_complete(self, blocks):
+        if blocks is None:
+            return
+        if self.preview_state != "ready":
+            self.preview_dirty = True
+            return
+
+        keys, rendered = blocks
+        patch = self.preview_doc.apply(keys, rendered)
+        if self.preview_reset:
+            # New document: swap the content of the live page instead of reloading it.
+            self.preview_reset = False
+            html = [self.preview_html(self.preview_doc.html[key]) for key in keys]
+            self.preview.page().runJavaScript(
+                f"acropad.reset({json.dumps(html)});", self.on_preview_patched)
+        elif patch is not None:
+            start, remove_count, blocks = patch
+            blocks = [self.preview_html(block) for block in blocks]
+            self.preview.page().runJavaScript(
+                f"acropad.patch({start}, {remove_count}, {json.dumps(blocks)});", self.on_preview_patched)
+
+    def preview_html(self, html):
+        """A rendered block as sent to the live page: with thumbnails and cached formulas."""
+        html, missing = self.math_cache.rewrite(self.with_thumbnails(html))
+        if missing:
+            self.math_waiting.update(missing)
+            self.math_polls = 0
+            if not self.math_timer.isActive():
+                self.math_timer.start(MATH_POLL_MS)
+        return html
+
+    def collect_typeset(self):
+        if self.preview_state != "ready":
+            self.math_waiting.clear()
+            return
+        self.preview.page().runJavaScript("acropad.takeTypeset();", self.on_math_typeset)
+
+    def on_math_typeset(self, entries):
+        if entries:
+            entries = [(key, html) for key, html in entries]
+            self.math_waiting.difference_update(key for key, _ in entries)
+            self.math_polls = 0
+            self.scheduler.submit(self.math_cache.store, entries, priority=BACKGROUND,
+                                  on_error=lambda err: logging.error(f"Storing typeset math failed: {err}"))
+        else:
+            self.math_polls += 1
+        if self.math_waiting and self.math_polls < MATH_POLL_LIMIT:
+            self.math_timer.start(MATH_POLL_MS)
+        else:
+            # Whatever is still missing (MathJax unavailable, formula gone) is retried when next shown.
+            self.math_waiting.clear()
+
+    def with_thumbnails(self, html):
+        """Point the images in rendered HTML at thumbnails, queueing the ones not made yet."""
+        html, missing = self.thumbnails.rewrite(html, self.base_dir)
+        for path in missing:
+            if path in self.thumbnails_pending:
+                continue
+            task = self.scheduler.submit(self.thumbnails.generate, path, priority=BACKGROUND,
+                                         on_result=self.on_thumbnail_ready,
+                                         on_error=lambda err, path=path: self.on_thumbnail_error(path, err))
+            if task is not None:
+                self.thumbnails_pending.add(path)
+        return html
+
+    def on_thumbnail_ready(self, result):
+        path, thumb = result
+        self.thumbnails_pending.discard(path)
+        if self.preview_state == "ready":
+            self.preview.page().runJavaScript(
+                f"acropad.thumbnail({json.dumps(file_url(path))}, {json.dumps(file_url(thumb))});")
+
+    def on_thumbnail_error(self, path, err):
+        self.thumbnails_pending.discard(path)
+        logging.error(f"Thumbnail for {path} failed: {err}")
+
+    def on_preview_patched(self, _result):
+        if self.render_started is not None:
+            # Edit (or file switch) to preview on screen
+            metrics.observe("preview.update", time.perf_counter() - self.render_started)
+            self.render_started = None
+        self.log_first_preview()
+
+    def log_first_preview(self):
+        if self.open_started is not None:
+            elapsed = (time.perf_counter() - self.open_started) * 1000
+            self.open_started = None
+            metrics.observe("preview.first", elapsed / 1000)
+            logging.info(f"Time to first preview: {elapsed:.1f} ms")
+
+    def on_render_error(self, err):
+        logging.error(f"Preview render failed: {err}")
+
+    def ensure_preview(self):
+        """Create the preview on first use; importing and starting WebEngine is the slow part of startup."""
+        if self.preview is not None:
+            return
+        with startup.phase("preview (WebEngine)"):
+            from PyQt6.QtWebEngineWidgets import QWebEngineView
+            self.preview = QWebEngineView()
+            self.preview.setStyleSheet("background-color: #171717;")
+            self.preview.loadFinished.connect(self.on_preview_load_finished)
+            self.preview_layout.addWidget(self.preview)
+        logging.info(f"Preview created {startup.mark('preview_created') * 1000:.0f} ms after start")
+        if self.incremental_preview:
+            self.load_preview_page()
+
+    def load_preview_page(self):
+        """Load the preview shell; after this only rendered blocks are sent to it."""
+        self.preview_state = "loading"
+        self.preview_dirty = False
+        self.preview_doc.reset()
+        self.preview_reset = False
+        self.math_waiting.clear()
         base_url = QUrl.fromLocalFile(self.base_dir + os.sep)
-        self.preview.setHtml(html, base_url)
+        self.preview.setHtml(preview_shell(), base_url)
+
+    def on_preview_load_finished(self, ok):
+        if not ok:
+            logging.warning("Preview page failed to load")
+            self.preview_state = None
+            return
+        if not self.incremental_preview:
+            self.log_first_preview()
+            return
+        self.preview_state = "ready"
+        if self.preview_dirty:
+            self.preview_dirty = False
+            self.update_preview()
+
+    def reset_preview(self):
+        """Start over with an empty document (e.g. on file switch); the page itself stays loaded."""
+        self.scheduler.cancel("render")
+        self.preview_doc.reset()
+        if self.preview_state == "ready":
+            self.preview_reset = True
+
+    def on_file_written(self, path, content):
+        # Runs on the save thread once the write is durable.
+        try:
+            st = os.stat(path)
+            self.saved_stats[path] = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            pass
+        self.journal.saved(path, content)
+        self.search_index.update_file(path, content)
+        self.link_index.update_file(path, content)
+        self.save_signals.result.emit(path)
 
-    def write_file_task(self, path, content):
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        return path
+    def on_file_write_error(self, path, err):
+        self.save_signals.error.emit((path,) + err)
 
     def on_save_complete(self, path):
         logging.info(f"Auto-saved: {path}")
+        # The open note isn't in the cache, but is stashed with its stat on switching away.
+        if self.open_document is not None and self.open_document.path == path:
+            self.open_document.saved()
+        else:
+            self.document_cache.saved(path)
         self.status_bar.showMessage("Saved", 1000)
-        self.editor.document().setModified(False)
 
     def on_save_error(self, err):
-        logging.error(f"Failed to save: {err}")
-        self.status_bar.showMessage(f"Save failed: {err[1]}", 5000)
+        path = err[0]
+        logging.error(f"Failed to save {path}: {err[1:]}")
+        self.status_bar.showMessage(f"Save failed: {err[2]}", 5000)
+        if path == self.current_file:
+            self.editor.document().setModified(True)
+        else:
+            self.document_cache.save_failed(path)
 
     def save_current_file(self):
         if self.current_file and self.editor.document().isModified():
             content = self.editor.toPlainText()
-            worker = Worker(self.write_file_task, self.current_file, content)
-            worker.signals.result.connect(self.on_save_complete)
-            worker.signals.error.connect(self.on_save_error)
-            self.threadpool.start(worker)
+            # Cleared now rather than on completion so edits typed while the
+            # write is in flight keep the document marked dirty.
+            self.editor.document().setModified(False)
+            self.journal.checkpoint(self.current_file, content)
+            self.storage.write(self.current_file, content,
+                               on_done=self.on_file_written, on_error=self.on_file_write_error)
+
+    def begin_replace(self):
+        """Before a vault-wide replace: the open note saved, and read-only until it is done."""
+        self.save_current_file()
+        if not self.storage.flush(timeout=10):
+            logging.error("Timed out waiting for pending saves")
+        self.editor.setDisabled(True)
+
+    def end_replace(self, changed):
+        for path in changed:
+            self.document_cache.discard(path)
+        self.editor.setDisabled(False)
+        if self.current_file in changed:
+            self.open_file(self.current_file)
+        if changed:
+            self.status_bar.showMessage(f"Replaced in {len(changed)} notes", 3000)
+
+    def on_vault_changed(self, changes):
+        for change in changes:
+            if change.kind in (REMOVED, MOVED):
+                rel = os.path.relpath(change.old_path or change.path, self.base_dir)
+                self.file_model.remove_file(rel)
+                self.switcher_index.remove(rel)
+                self.document_cache.discard(change.old_path or change.path)
+        # Added and modified notes are stat'ed (and indexed) off the GUI thread.
+        task = self.scheduler.submit(self.index_changes_task, changes, priority=INDEXING,
+                                     on_result=self.on_changes_indexed,
+                                     on_error=lambda err: logging.error(f"Indexing vault changes failed: {err}"))
+        if task is None:
+            # Indexing is backed up; one full refresh later catches everything.
+            self.scheduler.submit(self.index_changes_task, changes, index=False, priority=SAVE,
+                                  on_result=self.on_changes_indexed,
+                                  on_error=lambda err: logging.error(f"Listing vault changes failed: {err}"))
+            self.refresh_indexes(BACKGROUND)
+
+    def on_changes_indexed(self, present):
+        for rel, size, mtime_ns in present:
+            self.file_model.add_file(rel, size, mtime_ns)
+            self.switcher_index.add(rel)
+        self.update_backlinks()
+
+    def refresh_indexes(self, priority):
+        self.scheduler.submit(self.search_index.refresh, priority=priority, key="search-refresh", cancellable=True,
+                              on_error=lambda err: logging.error(f"Search index refresh failed: {err}"))
+        self.scheduler.submit(self.link_index.refresh, priority=priority, key="links-refresh", cancellable=True,
+                              on_result=lambda _: self.update_backlinks(),
+                              on_error=lambda err: logging.error(f"Link index refresh failed: {err}"))
+
+    def scan_vault_task(self, should_cancel=None):
+        table = FileTable.scan(self.base_dir, should_cancel)
+        if table is None:
+            return None
+        # Listed here, off the GUI thread; the model owns the table from now on.
+        return table, list(table.paths())
+
+    def on_vault_scanned(self, scanned):
+        if scanned is None:
+            return
+        table, paths = scanned
+        self.file_model.set_table(table)
+        logging.info(f"Vault scanned: {len(table)} notes, file table {table.memory_usage() / 1024:.0f} KiB")
+        self.scheduler.submit(self.switcher_index.build, paths, priority=INDEXING, key="switcher-index",
+                              on_error=lambda err: logging.error(f"Quick switcher index failed: {err}"))
+
+    def index_changes_task(self, changes, index=True):
+        """
+        Re-index the notes watcher ``changes`` touched (unless ``index`` is false).
+        Returns ``(rel, size, mtime_ns)`` for those still there, for the file list.
+        """
+        indexes = (self.search_index, self.link_index) if index else ()
+        present = []
+        for change in changes:
+            if change.kind == REMOVED:
+                for idx in indexes:
+                    idx.remove_file(change.path)
+                continue
+            if change.kind == MOVED:
+                for idx in indexes:
+                    idx.remove_file(change.old_path)
+            try:
+                st = os.stat(change.path)
+            except OSError:
+                for idx in indexes:
+                    idx.remove_file(change.path)
+                continue
+            present.append((os.path.relpath(change.path, self.base_dir), st.st_size, st.st_mtime_ns))
+            if change.kind != MOVED and self.saved_stats.get(change.path) == (st.st_size, st.st_mtime_ns):
+                continue  # Our own save; on_file_written has indexed it
+            try:
+                content = read_text(change.path).text
+            except OSError:
+                content = None  # Gone again; update_file drops it
+            for idx in indexes:
+                idx.update_file(change.path, content)
+        return present
+
+    def on_search_text_changed(self, text):
+        if not text.strip():
+            self.scheduler.cancel("search")
+            self.search_results.hide()
+            self.tree_view.show()
+            return
+        self.search_timer.start(120)
+
+    def run_search(self):
+        query = self.search_bar.text()
+        if not query.strip():
+            return
+        self.scheduler.submit(self.search_index.search, query, priority=INTERACTIVE, key="search",
+                              on_result=self.on_search_complete,
+                              on_error=lambda err: logging.error(f"Search failed: {err}"))
+
+    def on_search_complete(self, hits):
+        self.search_results.clear()
+        for hit in hits:
+            rel = os.path.relpath(hit.path, self.base_dir)
+            item = QListWidgetItem(f"{hit.title}\n{rel}")
+            item.setToolTip(hit.snippet)
+            item.setData(Qt.ItemDataRole.UserRole, hit.path)
+            self.search_results.addItem(item)
+        self.tree_view.hide()
+        self.search_results.show()
+        self.status_bar.showMessage(f"{len(hits)} matches", 2000)
+        self.storage.prefetch(hit.path for hit in hits[:SEARCH_PREFETCH])
+
+    def on_search_result_clicked(self, item):
+        self.open_file(item.data(Qt.ItemDataRole.UserRole))
+
+    def update_backlinks(self):
+        if not self.current_file:
+            return
+        self.scheduler.submit(self.link_index.backlinks, self.current_file, priority=INTERACTIVE, key="backlinks",
+                              on_result=self.on_backlinks_loaded,
+                              on_error=lambda err: logging.error(f"Backlinks lookup failed: {err}"))
+
+    def on_backlinks_loaded(self, backlinks):
+        self.backlinks_list.clear()
+        for link in backlinks:
+            name = os.path.splitext(os.path.basename(link.path))[0]
+            item = QListWidgetItem(name if link.count == 1 else f"{name} ({link.count})")
+            item.setToolTip(os.path.relpath(link.path, self.base_dir))
+            item.setData(Qt.ItemDataRole.UserRole, link.path)
+            self.backlinks_list.addItem(item)
+        self.backlinks_label.setText(f"BACKLINKS ({len(backlinks)})")
+        self.storage.prefetch(link.path for link in backlinks[:BACKLINKS_PREFETCH])
+
+    def show_unresolved_links(self):
+        self.scheduler.submit(self.link_index.unresolved, 500, priority=INTERACTIVE, key="unresolved",
+                              on_result=self.on_unresolved_loaded,
+                              on_error=lambda err: logging.error(f"Unresolved links report failed: {err}"))
+
+    def on_unresolved_loaded(self, unresolved):
+        # Shown in the backlinks list until the next note is opened; clicking
+        # an entry opens the first note that links to the missing target.
+        self.backlinks_list.clear()
+        for link in unresolved:
+            item = QListWidgetItem(f"{link.target}  ← {len(link.sources)}")
+            item.setToolTip("\n".join(os.path.relpath(src, self.base_dir) for src in link.sources[:20]))
+            item.setData(Qt.ItemDataRole.UserRole, link.sources[0])
+            self.backlinks_list.addItem(item)
+        self.backlinks_label.setText(f"UNRESOLVED ({len(unresolved)})")
 
     def create_new_note(self):
-        import time
         filename = f"Untitled-{int(time.time())}.md"
         filepath = os.path.join(self.base_dir, filename)
-        try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write("# New Note\n\nStart writing here...")
-            logging.info(f"Created new note: {filepath}")
-            self.status_bar.showMessage(f"Created {filename}", 2000)
-            index = self.file_model.index(filepath)
-            if index.isValid():
-                self.tree_view.setCurrentIndex(index)
-                self.on_file_clicked(index)
-            else:
-                self.current_file = filepath
-                self.filename_label.setText(filename)
-                self.editor.setPlainText("# New Note\n\nStart writing here...")
-                self.update_preview()
-        except Exception as e:
-            self.status_bar.showMessage(f"Failed to create note: {e}", 5000)
-            logging.error(f"Failed to create note: {e}")
+        self.scheduler.submit(self.storage.create, filepath, "# New Note\n\nStart writing here...",
+                              priority=INTERACTIVE, on_result=self.on_note_created,
+                              on_error=self.on_note_create_error)
+
+    def on_note_created(self, info):
+        filename = os.path.relpath(info.path, self.base_dir)
+        self.search_index.update_file(info.path)
+        self.link_index.update_file(info.path)
+        self.switcher_index.add(filename)
+        self.file_model.add_file(filename, info.size, info.mtime_ns)
+        logging.info(f"Created new note: {info.path}")
+        self.status_bar.showMessage(f"Created {filename}", 2000)
+        self.tree_view.setCurrentIndex(self.file_model.index_for_path(info.path))
+        self.open_file(info.path)
+
+    def on_note_create_error(self, err):
+        self.status_bar.showMessage(f"Failed to create note: {err[1]}", 5000)
+        logging.error(f"Failed to create note: {err}")
 
     def closeEvent(self, event):
         self.save_current_file()
+        self.close_large_file()
+        if not self.storage.shutdown(timeout=10):
+            logging.error("Timed out waiting for pending saves; exiting without them")
+            self.saves_abandoned = True
+        logging.info(f"Storage: {self.storage.stats()}")
+        self.journal.close()
+        logging.info(f"Journal: {self.journal.stats()}")
+        self.watcher.stop()
+        tasks_done = self.scheduler.shutdown(2000)
+        self.find_replace.engine.close()
+        # Closing checkpoints the indexes' WAL; left open if a task or save might still use them.
+        if tasks_done and not self.saves_abandoned:
+            self.search_index.close()
+            self.link_index.close()
+        else:
+            logging.warning("Background work still running; search and link indexes left open")
+        logging.info(f"Scheduler: {self.scheduler.stats()}")
+        logging.info(f"Render cache: {render_cache.stats()}")
+        logging.info(f"Document cache: {self.document_cache.stats()}")
+        self.thumbnails.save()
+        logging.info(f"Thumbnails: {self.thumbnails.stats()}")
+        self.math_cache.close()
+        logging.info(f"Math cache: {self.math_cache.stats()}")
+        metrics.stop_dumper(final_dump=True)
         event.accept()
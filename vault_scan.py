@@ -0,0 +1,28 @@
+import os
+
+NOTE_EXTENSIONS = (".md", ".txt")
+
+
+def iter_vault_files(root, extensions=NOTE_EXTENSIONS):
+    """
+    Walk ``root`` once and yield ``os.DirEntry`` objects for matching files.
+
+    Hidden directories (``.git``, ``.obsidian``, ...) are skipped and symlinked
+    directories are not followed.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not entry.name.startswith("."):
+                                stack.append(entry.path)
+                        elif entry.name.lower().endswith(extensions):
+                            yield entry
+                    except OSError:
+                        continue
+        except OSError:
+            continue
@@ -0,0 +1,373 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import logging
+import threading
+import ctypes
+import ctypes.util
+from collections import namedtuple
+
+from vault_scan import NOTE_EXTENSIONS, iter_vault_files
+
+ADDED = "added"
+REMOVED = "removed"
+MODIFIED = "modified"
+MOVED = "moved"
+
+Change = namedtuple("Change", "kind path old_path")
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+               | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+_EVENT = struct.Struct("iIII")
+
+
+class ChangeCoalescer:
+    """
+    Folds a burst of raw file events into the net change per path.
+
+    For example ``added`` then ``modified`` is still ``added``, ``added`` then
+    ``removed`` cancels out, and ``removed`` then ``added`` is ``modified``.
+    """
+
+    def __init__(self):
+        self._pending = {}
+
+    def __bool__(self):
+        return bool(self._pending)
+
+    def add(self, kind, path, old_path=None):
+        prev = self._pending.get(path)
+        prev_kind = prev.kind if prev else None
+
+        if kind == ADDED:
+            if prev_kind in (REMOVED, MODIFIED):
+                self._pending[path] = Change(MODIFIED, path, None)
+            elif prev_kind is None:
+                self._pending[path] = Change(ADDED, path, None)
+        elif kind == REMOVED:
+            if prev_kind == ADDED:
+                del self._pending[path]
+            elif prev_kind == MOVED:
+                del self._pending[path]
+                self.add(REMOVED, prev.old_path)
+            else:
+                self._pending[path] = Change(REMOVED, path, None)
+        elif kind == MODIFIED:
+            if prev_kind is None or prev_kind == REMOVED:
+                self._pending[path] = Change(MODIFIED, path, None)
+        elif kind == MOVED:
+            source = self._pending.pop(old_path, None)
+            if source is not None and source.kind == ADDED:
+                self.add(ADDED, path)
+            elif source is not None and source.kind == MOVED:
+                self._pending[path] = Change(MOVED, path, source.old_path)
+            else:
+                self._pending[path] = Change(MOVED, path, old_path)
+
+    def drain(self):
+        changes = list(self._pending.values())
+        self._pending.clear()
+        return changes
+
+
+def _load_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class VaultWatcher:
+    """
+    Watches a vault for note changes and reports coalesced deltas.
+
+    Uses inotify on Linux and falls back to polling an mtime snapshot elsewhere
+    (or when inotify is unavailable or out of watches). ``callback`` receives a
+    list of ``Change`` tuples on the watcher thread once a burst of events has
+    been quiet for ``debounce`` seconds; frontends marshal it to their UI thread.
+    """
+
+    def __init__(self, root, callback, debounce=0.25, max_latency=2.0, poll_interval=5.0,
+                 extensions=NOTE_EXTENSIONS, use_inotify=True):
+        self.root = os.path.abspath(root)
+        self.callback = callback
+        self.debounce = debounce
+        self.max_latency = max_latency
+        self.poll_interval = poll_interval
+        self.extensions = extensions
+        self.backend = None
+        self._libc = _load_inotify() if use_inotify else None
+        self._stop = threading.Event()
+        self._thread = None
+        self._fd = -1
+        self._wds = {}
+        self._known = set()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="VaultWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _is_note(self, path):
+        return path.lower().endswith(self.extensions)
+
+    def _emit(self, changes):
+        if changes:
+            try:
+                self.callback(changes)
+            except Exception:
+                logging.exception("Vault watcher callback failed")
+
+    def _run(self):
+        if self._libc is not None:
+            try:
+                self._setup_inotify()
+            except OSError as e:
+                logging.warning(f"inotify unavailable ({e}); falling back to polling")
+                self._close_inotify()
+        if self._fd >= 0:
+            self.backend = "inotify"
+            try:
+                self._run_inotify()
+            finally:
+                self._close_inotify()
+        else:
+            self.backend = "polling"
+            self._run_polling()
+
+    # --- inotify backend ---
+
+    def _setup_inotify(self):
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._fd = fd
+        self._known = set(self._watch_tree(self.root))
+
+    def _close_inotify(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+        self._fd = -1
+        self._wds.clear()
+
+    def _add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOSPC, errno.EMFILE):
+                raise OSError(err, "inotify watch limit reached")
+            return
+        self._wds[wd] = directory
+
+    def _watch_tree(self, top):
+        """Watch ``top`` and every non-hidden directory below it; return the notes found."""
+        notes = []
+        stack = [top]
+        while stack:
+            directory = stack.pop()
+            self._add_watch(directory)
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not entry.name.startswith("."):
+                                stack.append(entry.path)
+                        elif self._is_note(entry.name):
+                            notes.append(entry.path)
+            except OSError:
+                continue
+        return notes
+
+    def _forget_tree(self, top, coalescer):
+        prefix = os.path.join(top, "")
+        for path in [p for p in self._known if p.startswith(prefix)]:
+            self._known.discard(path)
+            coalescer.add(REMOVED, path)
+        for wd in [wd for wd, d in self._wds.items() if d == top or d.startswith(prefix)]:
+            self._libc.inotify_rm_watch(self._fd, wd)
+            self._wds.pop(wd, None)
+
+    def _run_inotify(self):
+        coalescer = ChangeCoalescer()
+        moves = {}
+        burst_start = None
+        while not self._stop.is_set():
+            timeout = 0.5 if burst_start is None else self.debounce
+            ready, _, _ = select.select([self._fd], [], [], timeout)
+            if ready:
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except BlockingIOError:
+                    data = b""
+                self._handle_events(data, coalescer, moves)
+                if burst_start is None:
+                    burst_start = time.monotonic()
+                if time.monotonic() - burst_start < self.max_latency:
+                    continue
+            if burst_start is None:
+                continue
+            # Quiet (or the burst has run too long): settle unpaired moves and report.
+            for is_dir, old_path in moves.values():
+                self._removed(old_path, is_dir, coalescer)
+            moves.clear()
+            burst_start = None
+            self._emit(coalescer.drain())
+
+    def _handle_events(self, data, coalescer, moves):
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self._resync(coalescer)
+                continue
+            if mask & IN_IGNORED:
+                self._wds.pop(wd, None)
+                continue
+            directory = self._wds.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            is_dir = bool(mask & IN_ISDIR)
+
+            if mask & IN_MOVED_FROM:
+                moves[cookie] = (is_dir, path)
+            elif mask & IN_MOVED_TO:
+                source = moves.pop(cookie, None)
+                if source is not None and source[0] == is_dir:
+                    self._moved(source[1], path, is_dir, coalescer)
+                else:
+                    self._created(path, is_dir, coalescer)
+            elif mask & IN_CREATE:
+                self._created(path, is_dir, coalescer)
+            elif mask & IN_DELETE:
+                self._removed(path, is_dir, coalescer)
+            elif mask & IN_CLOSE_WRITE and not is_dir and self._is_note(path):
+                coalescer.add(MODIFIED, path)
+
+    def _created(self, path, is_dir, coalescer):
+        if is_dir:
+            if os.path.basename(path).startswith("."):
+                return
+            for note in self._watch_tree(path):
+                self._known.add(note)
+                coalescer.add(ADDED, note)
+        elif self._is_note(path):
+            # An atomic save renames a temp file over an existing note.
+            coalescer.add(MODIFIED if path in self._known else ADDED, path)
+            self._known.add(path)
+
+    def _removed(self, path, is_dir, coalescer):
+        if is_dir:
+            self._forget_tree(path, coalescer)
+        elif path in self._known:
+            self._known.discard(path)
+            coalescer.add(REMOVED, path)
+
+    def _moved(self, old_path, new_path, is_dir, coalescer):
+        if not is_dir:
+            old_note, new_note = old_path in self._known, self._is_note(new_path)
+            if old_note and new_note:
+                self._known.discard(old_path)
+                self._known.add(new_path)
+                coalescer.add(MOVED, new_path, old_path)
+            elif old_note:
+                self._removed(old_path, False, coalescer)
+            elif new_note:
+                self._created(new_path, False, coalescer)
+            return
+
+        old_prefix = os.path.join(old_path, "")
+        for wd, directory in list(self._wds.items()):
+            if directory == old_path or directory.startswith(old_prefix):
+                self._wds[wd] = new_path + directory[len(old_path):]
+        for note in [p for p in self._known if p.startswith(old_prefix)]:
+            moved = new_path + note[len(old_path):]
+            self._known.discard(note)
+            self._known.add(moved)
+            coalescer.add(MOVED, moved, note)
+
+    def _resync(self, coalescer):
+        """Event queue overflowed: rebuild watches and diff against what we knew."""
+        logging.warning("inotify queue overflow; resynchronising vault watcher")
+        for wd in list(self._wds):
+            self._libc.inotify_rm_watch(self._fd, wd)
+        self._wds.clear()
+        current = set(self._watch_tree(self.root))
+        for path in self._known - current:
+            coalescer.add(REMOVED, path)
+        for path in current - self._known:
+            coalescer.add(ADDED, path)
+        self._known = current
+
+    # --- polling backend ---
+
+    def _snapshot(self):
+        snapshot = {}
+        for entry in iter_vault_files(self.root, self.extensions):
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            snapshot[entry.path] = (st.st_mtime_ns, st.st_size, st.st_ino)
+        return snapshot
+
+    def _run_polling(self):
+        previous = self._snapshot()
+        while not self._stop.wait(self.poll_interval):
+            current = self._snapshot()
+            self._emit(diff_snapshots(previous, current))
+            previous = current
+
+
+def diff_snapshots(previous, current):
+    """Changes between two ``{path: (mtime_ns, size, inode)}`` snapshots; renames pair by inode."""
+    removed = {path: stat for path, stat in previous.items() if path not in current}
+    added = {path: stat for path, stat in current.items() if path not in previous}
+    removed_by_inode = {stat[2]: path for path, stat in removed.items() if stat[2]}
+
+    changes = []
+    for path, stat in added.items():
+        old_path = removed_by_inode.pop(stat[2], None) if stat[2] else None
+        if old_path is not None:
+            del removed[old_path]
+            changes.append(Change(MOVED, path, old_path))
+        else:
+            changes.append(Change(ADDED, path, None))
+    changes.extend(Change(REMOVED, path, None) for path in removed)
+    changes.extend(Change(MODIFIED, path, None) for path, stat in current.items()
+                   if path in previous and previous[path][:2] != stat[:2])
+    return changes
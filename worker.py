@@ -1,4 +1,5 @@
 import sys
+import logging
 import traceback
 from PyQt6.QtCore import QRunnable, pyqtSlot, QObject, pyqtSignal
 
@@ -41,7 +42,7 @@ class Worker(QRunnable):
         try:
             result = self.fn(*self.args, **self.kwargs)
         except:
-            traceback.print_exc()
+            logging.error(f"Worker {getattr(self.fn, '__name__', self.fn)} failed", exc_info=True)
             exctype, value = sys.exc_info()[:2]
             self.signals.error.emit((exctype, value, traceback.format_exc()))
         else: